@@ -58,6 +58,8 @@ These API's are described in the `CherryPy specification
 
 import importlib.metadata as importlib_metadata
 
+import contextvars as _contextvars
+import functools as _functools
 from threading import local as _local
 
 from ._cperror import (
@@ -79,6 +81,7 @@ import cherrypy.lib.httputil as _httputil
 
 from ._cptree import Application
 from . import _cpwsgi as wsgi
+from . import _cpasgi as asgi
 
 from . import process
 
@@ -104,6 +107,7 @@ __all__ = (
     'Tool',
     'Application',
     'wsgi',
+    'asgi',
     'process',
     'tree',
     'engine',
@@ -143,6 +147,9 @@ engine.autoreload.subscribe()
 engine.thread_manager = process.plugins.ThreadManager(engine)
 engine.thread_manager.subscribe()
 
+engine.event_loop = process.plugins.EventLoop(engine)
+engine.event_loop.subscribe()
+
 engine.signal_handler = process.plugins.SignalHandler(engine)
 
 
@@ -197,41 +204,115 @@ def quickstart(root=None, script_name='', config=None):
     engine.block()
 
 
-class _Serving(_local):
-    """An interface for registering request and response objects.
+class _ServingState(object):
+    """The request, response and other objects served in one context.
 
-    Rather than have a separate "thread local" object for the request
-    and the response, this class works as a single threadlocal container
-    for both objects (and any others which developers wish to define).
-    In this way, we can easily dump those objects when we stop/start a
-    new HTTP conversation, yet still refer to them as module-level
-    globals in a thread-safe way.
+    A new instance is made by :meth:`_Serving.load` for each request, so
+    that a context copied from another (say, by an asyncio task) does not
+    see the objects loaded after the copy was made.
     """
 
     request = _cprequest.Request(
         _httputil.Host('127.0.0.1', 80),
         _httputil.Host('127.0.0.1', 1111),
     )
-    """The request object for the current thread.
+    """The request object for the current context.
 
     In the main thread, and any threads which are not receiving HTTP
-    requests, this is None.
+    requests, this is a dummy request.
     """
 
     response = _cprequest.Response()
-    """The response object for the current thread.
+    """The response object for the current context.
 
     In the main thread, and any threads which are not receiving HTTP
-    requests, this is None.
+    requests, this is a dummy response.
+    """
+
+    def __init__(self, **attrs):
+        self.__dict__.update(attrs)
+
+
+_serving_state = _contextvars.ContextVar('cherrypy.serving')
+"""Holds the _ServingState of the current context.
+
+Until something is loaded, the _ServingState class itself stands in
+for an empty state, so its class attributes supply the defaults.
+"""
+
+_current_state = _functools.partial(_serving_state.get, _ServingState)
+
+
+class _Serving(object):
+    """An interface for registering request and response objects.
+
+    Rather than have a separate "context local" object for the request
+    and the response, this class works as a single container for both
+    objects (and any others which developers wish to define). In this
+    way, we can easily dump those objects when we stop/start a new HTTP
+    conversation, yet still refer to them as module-level globals in a
+    thread-safe way.
+
+    The objects are kept in a :class:`contextvars.ContextVar` rather
+    than a :class:`threading.local`, so each thread (which has its own
+    context) and each task running on an event loop sees its own.
+    """
+
+    current = staticmethod(_current_state)
+    """Return the state object for the current context.
+
+    This is a C-level call; code which reads several objects in a row
+    can use ``state = cherrypy.serving.current()`` and then
+    ``state.request``, ``state.response`` and so on, instead of going
+    through this interface once for each.
     """
 
+    @property
+    def request(self):
+        """The request object for the current context."""
+        return _current_state().request
+
+    @request.setter
+    def request(self, value):
+        self._writable().request = value
+
+    @property
+    def response(self):
+        """The response object for the current context."""
+        return _current_state().response
+
+    @response.setter
+    def response(self, value):
+        self._writable().response = value
+
+    def __getattr__(self, name):
+        return getattr(_current_state(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._writable(), name, value)
+
+    def __delattr__(self, name):
+        state = _current_state()
+        if state is _ServingState:
+            raise AttributeError(name)
+        delattr(state, name)
+
+    def _writable(self):
+        state = _current_state()
+        if state is _ServingState:
+            state = _ServingState()
+            _serving_state.set(state)
+        return state
+
     def load(self, request, response):
-        self.request = request
-        self.response = response
+        """Set the request and response objects for the current context."""
+        _serving_state.set(
+            _ServingState(request=request, response=response),
+        )
 
     def clear(self):
-        """Remove all attributes of self."""
-        self.__dict__.clear()
+        """Remove all objects set for the current context."""
+        _serving_state.set(_ServingState)
 
 
 serving = _Serving()
@@ -240,59 +321,68 @@ serving = _Serving()
 class _ThreadLocalProxy(object):
     __slots__ = ['__attrname__', '__dict__']
 
+    _own_attrs = frozenset(['__attrname__', '__class__', '__dict__'])
+
     def __init__(self, attrname):
         self.__attrname__ = attrname
 
-    def __getattr__(self, name):
-        child = getattr(serving, self.__attrname__)
+    def __getattribute__(self, name):
+        # Going straight to the child, instead of failing the normal
+        # lookup first and falling back to __getattr__, saves raising
+        # and catching an AttributeError on every access.
+        if name in _ThreadLocalProxy._own_attrs:
+            return object.__getattribute__(self, name)
+        child = getattr(_current_state(), _proxied_attrname(self))
         return getattr(child, name)
 
     def __setattr__(self, name, value):
         if name in ('__attrname__',):
             object.__setattr__(self, name, value)
         else:
-            child = getattr(serving, self.__attrname__)
+            child = getattr(_current_state(), self.__attrname__)
             setattr(child, name, value)
 
     def __delattr__(self, name):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         delattr(child, name)
 
     @property
     def __dict__(self):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         d = child.__class__.__dict__.copy()
         d.update(child.__dict__)
         return d
 
     def __getitem__(self, key):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         return child[key]
 
     def __setitem__(self, key, value):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         child[key] = value
 
     def __delitem__(self, key):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         del child[key]
 
     def __contains__(self, key):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         return key in child
 
     def __len__(self):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         return len(child)
 
     def __nonzero__(self):
-        child = getattr(serving, self.__attrname__)
+        child = getattr(_current_state(), self.__attrname__)
         return bool(child)
 
     # Python 3
     __bool__ = __nonzero__
 
 
+_proxied_attrname = _ThreadLocalProxy.__attrname__.__get__
+
 # Create request and response object (the same objects will be used
 #   throughout the entire life of the webserver, but will redirect
 #   to the "serving" object)
@@ -316,7 +406,7 @@ thread_data = _ThreadData()
 def _cherrypy_pydoc_resolve(thing, forceload=0):
     """Given an object or a path to an object, get the object and its name."""
     if isinstance(thing, _ThreadLocalProxy):
-        thing = getattr(serving, thing.__attrname__)
+        thing = getattr(_current_state(), thing.__attrname__)
     return _pydoc._builtin_resolve(thing, forceload)
 
 
@@ -0,0 +1,241 @@
+"""ASGI interface (see https://asgi.readthedocs.io/).
+
+:class:`ASGIApp` lets an ASGI server, such as one built on asyncio,
+serve CherryPy applications. Each HTTP request is translated into a
+WSGI environ, and the WSGI application (``cherrypy.tree`` by default)
+is called in a thread from a bounded pool. That thread waits on the
+event loop whenever it reads the request body from ``receive`` or
+writes the response body to ``send``, so a slow client holds an idle
+connection on the loop rather than a thread. For example::
+
+    import cherrypy
+
+    cherrypy.tree.mount(Root(), '/')
+    cherrypy.server.unsubscribe()
+    app = cherrypy.asgi.ASGIApp()
+
+and then run ``app`` with the ASGI server of your choice. The adapter
+starts ``cherrypy.engine`` and exits it in response to the server's
+lifespan events; unsubscribe ``cherrypy.server`` as above so that the
+engine does not start its own HTTP server too.
+"""
+
+import asyncio
+import concurrent.futures
+import io
+import sys
+
+import cherrypy
+
+
+class _ReceiveStream(io.RawIOBase):
+    """A readable file which gets the request body from ASGI ``receive``.
+
+    It is read in a worker thread, which waits for each message on the
+    event loop.
+    """
+
+    def __init__(self, loop, receive):
+        self.loop = loop
+        self.receive = receive
+        self.pending = b''
+        self.offset = 0
+        self.more_body = True
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self.offset >= len(self.pending) and self.more_body:
+            message = asyncio.run_coroutine_threadsafe(
+                self.receive(),
+                self.loop,
+            ).result()
+            if message['type'] == 'http.disconnect':
+                self.more_body = False
+                raise ConnectionResetError('The client disconnected.')
+            self.pending = message.get('body', b'')
+            self.offset = 0
+            self.more_body = message.get('more_body', False)
+        # Copy from an offset into the current message rather than
+        # slicing off what was read, which would copy the rest each time.
+        start = self.offset
+        size = min(len(buffer), len(self.pending) - start)
+        buffer[:size] = memoryview(self.pending)[start : start + size]
+        self.offset = start + size
+        return size
+
+
+class ASGIApp(object):
+    """An ASGI 3 application which serves a WSGI application.
+
+    :param wsgiapp: The WSGI application to serve. If None (the
+        default), ``cherrypy.tree`` is served.
+    :param max_workers: The number of threads which may run the WSGI
+        application at once (10 by default, like ``server.thread_pool``).
+    """
+
+    url_encoding = 'utf-8'
+    """The encoding of ASGI ``path`` strings, from which the WSGI
+    ``PATH_INFO`` and ``SCRIPT_NAME`` entries are made."""
+
+    headerNames = {
+        b'content-type': 'CONTENT_TYPE',
+        b'content-length': 'CONTENT_LENGTH',
+    }
+    """Request headers which WSGI does not prefix with HTTP_."""
+
+    def __init__(self, wsgiapp=None, max_workers=10):
+        """Initialize an ASGI application."""
+        self.wsgiapp = wsgiapp
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix='CPASGI',
+        )
+
+    async def __call__(self, scope, receive, send):
+        """Handle one ASGI connection scope."""
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                self.executor,
+                self.respond,
+                loop,
+                scope,
+                receive,
+                send,
+            )
+        else:
+            raise ValueError('Unsupported ASGI scope type %r.' % scope['type'])
+
+    async def lifespan(self, receive, send):
+        """Start and exit ``cherrypy.engine`` along with the ASGI server."""
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                try:
+                    await loop.run_in_executor(None, cherrypy.engine.start)
+                except Exception as exc:
+                    await send(
+                        {
+                            'type': 'lifespan.startup.failed',
+                            'message': str(exc),
+                        },
+                    )
+                    return
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await loop.run_in_executor(None, cherrypy.engine.exit)
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def environ(self, loop, scope, receive):
+        """Return a WSGI environ for the given HTTP scope."""
+        enc = self.url_encoding
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path) :]
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', -1)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode(enc).decode('ISO-8859-1'),
+            'PATH_INFO': path.encode(enc).decode('ISO-8859-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode(
+                'ISO-8859-1',
+            ),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'SERVER_PROTOCOL': 'HTTP/%s' % scope.get('http_version', '1.1'),
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.url_encoding': enc,
+            'wsgi.input': io.BufferedReader(_ReceiveStream(loop, receive)),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+            'asgi.scope': scope,
+        }
+        for name, value in scope.get('headers', ()):
+            key = self.headerNames.get(name)
+            if key is None:
+                key = 'HTTP_' + name.decode('ISO-8859-1').upper().replace(
+                    '-',
+                    '_',
+                )
+            value = value.decode('ISO-8859-1')
+            if key in environ:
+                sep = '; ' if key == 'HTTP_COOKIE' else ', '
+                value = environ[key] + sep + value
+            environ[key] = value
+        return environ
+
+    def respond(self, loop, scope, receive, send):
+        """Run the WSGI application for one request (in a worker thread)."""
+
+        def send_message(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        # The status and headers are sent with the first non-empty body
+        # chunk (or the end of the body), so that errors raised before
+        # then may still replace them, as WSGI allows.
+        started = []
+        outstatus = []
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and started:
+                raise exc_info[1].with_traceback(exc_info[2])
+            outstatus[:] = [status, headers]
+            return write
+
+        def start():
+            status, headers = outstatus
+            send_message(
+                {
+                    'type': 'http.response.start',
+                    'status': int(status[:3]),
+                    'headers': [
+                        (k.encode('ISO-8859-1'), v.encode('ISO-8859-1'))
+                        for k, v in headers
+                    ],
+                },
+            )
+            started.append(True)
+
+        def write(chunk):
+            if not started:
+                start()
+            send_message(
+                {
+                    'type': 'http.response.body',
+                    'body': bytes(chunk),
+                    'more_body': True,
+                },
+            )
+
+        wsgiapp = self.wsgiapp or cherrypy.tree
+        response = wsgiapp(self.environ(loop, scope, receive), start_response)
+        try:
+            for chunk in response:
+                if chunk:
+                    write(chunk)
+            if not started:
+                start()
+            send_message(
+                {
+                    'type': 'http.response.body',
+                    'body': b'',
+                    'more_body': False,
+                },
+            )
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
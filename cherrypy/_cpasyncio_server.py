@@ -0,0 +1,818 @@
+"""An HTTP/1.1 server for CherryPy built on asyncio streams.
+
+Select it in place of the default (cheroot) server with the
+``server.instance`` config entry::
+
+    [global]
+    server.instance = 'cherrypy._cpasyncio_server.AsyncioHTTPServer'
+
+Connections are read and written by an asyncio event loop running in
+the thread which :class:`ServerAdapter
+<cherrypy.process.servers.ServerAdapter>` starts the server in, so an
+idle keep-alive connection does not hold a thread. The headers of each
+request are read on the loop, and the request is then handed to a pool
+of ``server.thread_pool`` worker threads, which call the WSGI
+application (``cherrypy.tree``). The worker reads the request body and
+writes the response through the loop, a piece at a time, so a request
+body is never held in memory whole by the server.
+
+Only the standard library is used; HTTPS is served with the builtin
+:mod:`ssl` module when ``server.ssl_certificate`` is set.
+"""
+
+import asyncio
+import concurrent.futures
+import io
+import re
+import ssl
+import sys
+import threading
+from urllib.parse import unquote_to_bytes
+
+import cherrypy
+from cherrypy.lib import httputil
+
+
+_quoted_slash = re.compile(b'(?i)%2F')
+_request_protocol = re.compile(rb'HTTP/(\d)\.(\d)\Z')
+
+
+class _ConnectionLost(Exception):
+    """Raised in a worker thread when the response can no longer be sent."""
+
+
+class _ContentLengthExceeded(Exception):
+    """Raised when the application writes more than its Content-Length."""
+
+
+class MaxSizeExceeded(Exception):
+    """Raised when a chunked request body exceeds its maximum size.
+
+    CherryPy answers this with 413 Request Entity Too Large, as it does
+    for the exception of the same name from the default server.
+    """
+
+
+class _BadRequest(Exception):
+    """Raised while reading a request which should be answered at once."""
+
+    def __init__(self, status, message):
+        self.status = status
+        self.message = message
+
+
+def _simple_response(protocol, status, message):
+    """Return the bytes of a plain text response which closes the socket."""
+    body = message.encode('ISO-8859-1')
+    return b''.join(
+        [
+            ('%s %s\r\n' % (protocol, status)).encode('ISO-8859-1'),
+            b'Content-Type: text/plain\r\n',
+            b'Content-Length: %d\r\n' % len(body),
+            b'Connection: close\r\n\r\n',
+            body,
+        ],
+    )
+
+
+class _RequestBody(io.RawIOBase):
+    """A readable file which gets the request body from the connection.
+
+    It is read in a worker thread, which waits for each piece on the
+    event loop.
+    """
+
+    def __init__(self, server, reader, length, chunked):
+        self.server = server
+        self.reader = reader
+        # The bytes left in the body, or in the current chunk.
+        self.remaining = length
+        self.chunked = chunked
+        self.size = 0
+        self.done = not (length or chunked)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self.done:
+            return 0
+        try:
+            data = asyncio.run_coroutine_threadsafe(
+                self.read_piece(len(buffer)),
+                self.server.loop,
+            ).result()
+        except (concurrent.futures.CancelledError, RuntimeError) as exc:
+            # The loop has been stopped.
+            self.done = True
+            raise ConnectionResetError('The server is stopping.') from exc
+        size = len(data)
+        buffer[:size] = data
+        return size
+
+    async def read_piece(self, size):
+        """Read at most size bytes of the body, on the event loop."""
+        server = self.server
+        try:
+            if self.chunked and not self.remaining:
+                self.remaining = await self._read_chunk_size()
+                if not self.remaining:
+                    return b''
+            data = await asyncio.wait_for(
+                self.reader.read(min(size, self.remaining, server.bufsize)),
+                server.timeout,
+            )
+            if not data:
+                raise ConnectionResetError('The client disconnected.')
+            self.remaining -= len(data)
+            if not self.remaining:
+                if self.chunked:
+                    crlf = await asyncio.wait_for(
+                        self.reader.readexactly(2),
+                        server.timeout,
+                    )
+                    if crlf != b'\r\n':
+                        raise cherrypy.HTTPError(400, 'Bad chunked transfer')
+                else:
+                    self.done = True
+            return data
+        except asyncio.TimeoutError:
+            self.done = True
+            raise cherrypy.HTTPError(408, 'The request timed out.')
+        except BaseException:
+            # The connection cannot be used for another request.
+            self.done = True
+            raise
+
+    async def discard(self):
+        """Read the rest of the body and throw it away, on the event loop.
+
+        Return whether the connection may be used for another request.
+        """
+        try:
+            while not self.done:
+                await self.read_piece(self.server.bufsize)
+        except Exception:
+            return False
+        return True
+
+    async def _read_chunk_size(self):
+        """Read the next chunk-size line; at the end, read the trailers."""
+        server = self.server
+        try:
+            line = await server._readline(self.reader)
+            chunk_size = int(line.split(b';', 1)[0], 16)
+        except (_BadRequest, ValueError):
+            raise cherrypy.HTTPError(400, 'Bad chunked transfer size')
+        # Like the default server, count the chunk delimiters too.
+        self.size += len(line) + chunk_size + 2
+        limit = server.max_request_body_size
+        if limit and self.size > limit:
+            raise MaxSizeExceeded('Request Entity Too Large', limit)
+        if chunk_size <= 0:
+            # Discard any trailers.
+            while (await server._readline(self.reader)) not in (
+                b'\r\n',
+                b'\n',
+                b'',
+            ):
+                pass
+            self.done = True
+            return 0
+        return chunk_size
+
+
+class AsyncioHTTPServer(object):
+    """An asyncio HTTP server which serves a WSGI application.
+
+    Its settings are taken from the given :class:`Server
+    <cherrypy._cpserver.Server>` (by default ``cherrypy.server``).
+    """
+
+    version = 'CherryPy/%s asyncio' % cherrypy.__version__
+    """The value of the Server response header and SERVER_SOFTWARE."""
+
+    ready = False
+    """True while the server is accepting connections."""
+
+    socket = None
+    """The listening socket, once the server has been started."""
+
+    ssl_context = None
+    """The :class:`ssl.SSLContext` used to serve HTTPS, or None."""
+
+    bufsize = 64 * 1024
+    """The most bytes of a request body read at a time. The socket
+    timeout applies to each such read, not to the whole body."""
+
+    def __init__(self, server_adapter=cherrypy.server):
+        """Initialize the server from the settings of a Server adapter."""
+        self.server_adapter = server_adapter
+        self.bind_addr = server_adapter.bind_addr
+        self.wsgi_app = cherrypy.tree
+        self.server_name = (
+            server_adapter.socket_host or server_adapter.socket_file or ''
+        )
+        self.protocol = server_adapter.protocol_version
+        self.thread_pool = server_adapter.thread_pool
+        self.request_queue_size = server_adapter.socket_queue_size
+        self.timeout = server_adapter.socket_timeout
+        self.shutdown_timeout = server_adapter.shutdown_timeout
+        self.max_request_header_size = (
+            server_adapter.max_request_header_size or 0
+        )
+        self.max_request_body_size = server_adapter.max_request_body_size or 0
+
+        if isinstance(server_adapter.ssl_context, ssl.SSLContext):
+            self.ssl_context = server_adapter.ssl_context
+        elif server_adapter.ssl_certificate:
+            self.ssl_context = ssl.create_default_context(
+                ssl.Purpose.CLIENT_AUTH,
+            )
+            self.ssl_context.load_cert_chain(
+                server_adapter.ssl_certificate,
+                server_adapter.ssl_private_key,
+            )
+            if server_adapter.ssl_certificate_chain:
+                self.ssl_context.load_verify_locations(
+                    server_adapter.ssl_certificate_chain,
+                )
+            if server_adapter.ssl_ciphers:
+                self.ssl_context.set_ciphers(server_adapter.ssl_ciphers)
+
+        self.loop = None
+        self.executor = None
+        self._connections = {}
+        self._shutdown = None
+        self._interrupt = None
+        self._stopped = threading.Event()
+        self._stopped.set()
+
+    @property
+    def ssl_adapter(self):
+        """Return the SSL context; ServerAdapter checks it for https URLs."""
+        return self.ssl_context
+
+    def __str__(self):
+        """Render the server class and bind address as a string."""
+        return '%s.%s(%r)' % (
+            self.__module__,
+            self.__class__.__name__,
+            self.bind_addr,
+        )
+
+    @property
+    def interrupt(self):
+        """Set this to an exception to stop the server and raise it."""
+        return self._interrupt
+
+    @interrupt.setter
+    def interrupt(self, interrupt):
+        self._interrupt = interrupt
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._shutdown.set)
+            except RuntimeError:
+                # The loop has closed already.
+                pass
+
+    def start(self):
+        """Serve requests until :meth:`stop` is called."""
+        self._interrupt = None
+        self._stopped.clear()
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self.ready = False
+            self.loop = None
+            self._stopped.set()
+        if self._interrupt is not None:
+            raise self._interrupt
+
+    def stop(self):
+        """Stop serving, and wait until the server has stopped.
+
+        Requests in progress are given ``shutdown_timeout`` seconds to
+        finish; idle connections are closed at once.
+        """
+        loop = self.loop
+        if loop is not None:
+            try:
+                loop.call_soon_threadsafe(self._shutdown.set)
+            except RuntimeError:
+                # The loop has closed already.
+                pass
+        self._stopped.wait()
+
+    async def _serve(self):
+        self.loop = asyncio.get_running_loop()
+        self._shutdown = asyncio.Event()
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.thread_pool,
+            thread_name_prefix='CPAsyncioWorker',
+        )
+        limit = max(self.max_request_header_size, 2**16)
+        if isinstance(self.bind_addr, tuple):
+            host, port = self.bind_addr
+            server = await asyncio.start_server(
+                self._connected,
+                host,
+                port,
+                limit=limit,
+                backlog=self.request_queue_size,
+                ssl=self.ssl_context,
+            )
+        else:
+            server = await asyncio.start_unix_server(
+                self._connected,
+                self.bind_addr,
+                limit=limit,
+                backlog=self.request_queue_size,
+                ssl=self.ssl_context,
+            )
+        self.socket = server.sockets[0]
+        self.ready = True
+        try:
+            await self._shutdown.wait()
+        finally:
+            self.ready = False
+            # Connections made from now on are closed at once (see
+            # _handle); finish or cancel those already open.
+            for task, busy in list(self._connections.items()):
+                if not busy:
+                    task.cancel()
+            if self._connections:
+                await asyncio.wait(
+                    list(self._connections),
+                    timeout=self.shutdown_timeout,
+                )
+            pending = list(self._connections)
+            for task in pending:
+                task.cancel()
+            if pending:
+                # Let the cancelled connections close their transports.
+                await asyncio.wait(pending)
+            # Close the server once no connection is still opening, or
+            # its transport would be abandoned.
+            deadline = self.loop.time() + self.shutdown_timeout
+            while True:
+                opening = asyncio.all_tasks() - {asyncio.current_task()}
+                remaining = deadline - self.loop.time()
+                if not opening or remaining <= 0:
+                    break
+                await asyncio.wait(opening, timeout=remaining)
+            server.close()
+            self.socket = None
+            try:
+                await asyncio.wait_for(
+                    server.wait_closed(),
+                    self.shutdown_timeout,
+                )
+            except asyncio.TimeoutError:
+                pass
+            self.executor.shutdown(wait=False)
+
+    async def _handle(self, reader, writer):
+        """Serve the requests made on one connection."""
+        task = asyncio.current_task()
+        requests_seen = 0
+        try:
+            while not self._shutdown.is_set():
+                try:
+                    first = await asyncio.wait_for(
+                        reader.read(1),
+                        self.timeout,
+                    )
+                except asyncio.TimeoutError:
+                    # Close idle keep-alive connections quietly, but
+                    # tell a client which never sent a request.
+                    if not requests_seen:
+                        raise _BadRequest(
+                            '408 Request Timeout',
+                            'The request timed out.',
+                        )
+                    break
+                if not first:
+                    break
+                try:
+                    request = await self._read_request(reader, writer, first)
+                except asyncio.TimeoutError:
+                    # The client stalled in the middle of a request.
+                    raise _BadRequest(
+                        '408 Request Timeout',
+                        'The request timed out.',
+                    )
+                if request is None:
+                    break
+
+                requests_seen += 1
+                body = request[0]['wsgi.input'].raw
+                self._connections[task] = True
+                keep_alive, tail = await self.loop.run_in_executor(
+                    self.executor,
+                    self._respond,
+                    writer,
+                    *request,
+                )
+                self._connections[task] = False
+                if keep_alive and not body.done:
+                    # The application left some of the body unread.
+                    keep_alive = await body.discard()
+                if tail:
+                    writer.write(tail)
+                    await writer.drain()
+                if not keep_alive:
+                    break
+        except _BadRequest as exc:
+            writer.write(
+                _simple_response(self.protocol, exc.status, exc.message),
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    def _connected(self, reader, writer):
+        """Start serving a new connection."""
+        task = self.loop.create_task(self._handle(reader, writer))
+        self._connections[task] = False
+
+        def closed(task):
+            # Close the connection even if the task was cancelled
+            # before it could start.
+            del self._connections[task]
+            writer.close()
+
+        task.add_done_callback(closed)
+
+    async def _readline(self, reader, start=b''):
+        """Read a CRLF-terminated line, which may have been begun already."""
+        try:
+            line = start
+            if not line.endswith(b'\n'):
+                line += await asyncio.wait_for(reader.readline(), self.timeout)
+        except ValueError:
+            # The line did not fit within the StreamReader limit.
+            raise _BadRequest(
+                '414 Request-URI Too Long',
+                'The Request-URI sent with the request exceeds the maximum '
+                'allowed bytes.',
+            )
+        if line and not line.endswith(b'\r\n'):
+            if not line.endswith(b'\n'):
+                # The client closed the connection in the middle of a line.
+                raise asyncio.IncompleteReadError(line, None)
+            raise _BadRequest(
+                '400 Bad Request',
+                'HTTP requires CRLF terminators',
+            )
+        return line
+
+    async def _read_request(self, reader, writer, first=b''):
+        """Read one request; return None if the client has gone away.
+
+        Otherwise, return the WSGI environ and whether the client wants
+        the connection kept open, along with the response protocol.
+        The first byte(s) of the request may already have been read.
+        """
+        line = await self._readline(reader, first)
+        if line == b'\r\n':
+            # RFC 7230 section 3.5: ignore an empty line before a request.
+            line = await self._readline(reader)
+        if not line:
+            return None
+
+        try:
+            method, target, req_protocol = line.split()
+        except ValueError:
+            raise _BadRequest('400 Bad Request', 'Malformed Request-Line')
+        match = _request_protocol.match(req_protocol)
+        if match is None:
+            raise _BadRequest('400 Bad Request', 'Malformed Request-Line')
+        rp = int(match.group(1)), int(match.group(2))
+        if rp[0] != 1:
+            raise _BadRequest(
+                '505 HTTP Version Not Supported',
+                'Cannot fulfill request',
+            )
+        sp = int(self.protocol[5]), int(self.protocol[7])
+        response_protocol = 'HTTP/%s.%s' % min(rp, sp)
+
+        if method == b'CONNECT':
+            # Only the authority-form is allowed (RFC 7230 section 5.3.3).
+            host, colon, port = target.rpartition(b':')
+            if not (host and port.isdigit()) or any(
+                c in target for c in b'/?#@'
+            ):
+                raise _BadRequest(
+                    '400 Bad Request',
+                    'Invalid path in Request-URI: request-target must '
+                    'match authority-form.',
+                )
+            # Dispatch on the authority, as if it were a path.
+            target = b'/' + target
+        elif b'#' in target:
+            raise _BadRequest(
+                '400 Bad Request',
+                'Illegal #fragment in Request-URI.',
+            )
+        elif b'://' in target and not target.startswith(b'/'):
+            # The absolute-form (RFC 7230 section 5.3.2).
+            atoms = target.split(b'/', 3)
+            target = b'/' + (atoms[3] if len(atoms) > 3 else b'')
+        elif not target.startswith(b'/') and target != b'*':
+            raise _BadRequest(
+                '400 Bad Request', 'Invalid path in Request-URI.'
+            )
+        path, _, qs = target.partition(b'?')
+        path = b'%2F'.join(
+            unquote_to_bytes(atom) for atom in _quoted_slash.split(path)
+        )
+
+        environ = {
+            'REQUEST_METHOD': method.decode('ISO-8859-1'),
+            'SCRIPT_NAME': '',
+            'PATH_INFO': path.decode('ISO-8859-1'),
+            'QUERY_STRING': qs.decode('ISO-8859-1'),
+            'SERVER_NAME': self.server_name,
+            'SERVER_PROTOCOL': req_protocol.decode('ISO-8859-1'),
+            'ACTUAL_SERVER_PROTOCOL': self.protocol,
+            'SERVER_SOFTWARE': self.version,
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'https' if self.ssl_context else 'http',
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        sockname = writer.get_extra_info('sockname')
+        if isinstance(sockname, tuple):
+            environ['SERVER_PORT'] = str(sockname[1])
+        else:
+            environ['SERVER_PORT'] = ''
+        peername = writer.get_extra_info('peername')
+        if isinstance(peername, tuple):
+            environ['REMOTE_ADDR'] = peername[0]
+            environ['REMOTE_PORT'] = str(peername[1])
+        else:
+            environ['REMOTE_ADDR'] = ''
+            environ['REMOTE_PORT'] = ''
+
+        await self._read_headers(reader, environ)
+        body = self._request_body(reader, environ, rp)
+        if not body.done:
+            await self._send_continue(writer, environ)
+        environ['wsgi.input'] = io.BufferedReader(body, self.bufsize)
+
+        connection = environ.get('HTTP_CONNECTION', '').lower()
+        if response_protocol == 'HTTP/1.1':
+            keep_alive = 'close' not in connection
+        else:
+            keep_alive = 'keep-alive' in connection
+        return environ, keep_alive, response_protocol
+
+    async def _read_headers(self, reader, environ):
+        size = 0
+        key = None
+        while True:
+            line = await self._readline(reader)
+            if not line:
+                raise asyncio.IncompleteReadError(b'', None)
+            size += len(line)
+            if self.max_request_header_size and (
+                size > self.max_request_header_size
+            ):
+                raise _BadRequest(
+                    '413 Request Entity Too Large',
+                    'The headers sent with the request exceed the maximum '
+                    'allowed bytes.',
+                )
+            if line in (b'\r\n', b'\n'):
+                return
+
+            if line[:1] in (b' ', b'\t') and key is not None:
+                # An obsolete folded continuation of the previous header.
+                environ[key] += ' ' + line.strip().decode('ISO-8859-1')
+                continue
+
+            name, colon, value = line.partition(b':')
+            if not colon or not name or name != name.strip():
+                raise _BadRequest('400 Bad Request', 'Illegal header line.')
+            name = name.decode('ISO-8859-1').upper().replace('-', '_')
+            if name in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+                key = name
+            else:
+                key = 'HTTP_' + name
+            value = value.strip().decode('ISO-8859-1')
+            if key in environ:
+                value = environ[key] + ', ' + value
+            environ[key] = value
+
+    def _request_body(self, reader, environ, rp):
+        """Return a file from which the worker reads the request body.
+
+        Bodies larger than ``max_request_body_size`` are refused here,
+        by their Content-Length, before any of them is read.
+        """
+        te = environ.get('HTTP_TRANSFER_ENCODING', '').lower()
+        if te and rp >= (1, 1):
+            if te != 'chunked':
+                raise _BadRequest(
+                    '501 Unimplemented',
+                    'Transfer-Encoding %r not supported.' % te,
+                )
+            # CherryPy reads a chunked body to its end, ignoring any
+            # Content-Length.
+            return _RequestBody(self, reader, 0, True)
+        environ.pop('HTTP_TRANSFER_ENCODING', None)
+
+        length = environ.get('CONTENT_LENGTH')
+        if not length:
+            return _RequestBody(self, reader, 0, False)
+        try:
+            length = int(length)
+        except ValueError:
+            raise _BadRequest('400 Bad Request', 'Malformed Content-Length')
+        if length < 0:
+            raise _BadRequest('400 Bad Request', 'Malformed Content-Length')
+        self._check_body_size(length)
+        return _RequestBody(self, reader, length, False)
+
+    def _check_body_size(self, size):
+        if self.max_request_body_size and size > self.max_request_body_size:
+            raise _BadRequest(
+                '413 Request Entity Too Large',
+                'The entity sent with the request exceeds the maximum '
+                'allowed bytes.',
+            )
+
+    async def _send_continue(self, writer, environ):
+        if environ.get('HTTP_EXPECT', '').lower() == '100-continue':
+            writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+            await writer.drain()
+
+    async def _write(self, writer, data):
+        writer.write(data)
+        await writer.drain()
+
+    def _send(self, writer, data):
+        """Write data from a worker thread, waiting until it is buffered."""
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self._write(writer, data),
+                self.loop,
+            ).result()
+        except (ConnectionError, RuntimeError) as exc:
+            # The client went away, or the loop has been stopped.
+            raise _ConnectionLost() from exc
+
+    def _respond(self, writer, environ, keep_alive, response_protocol):
+        """Call the WSGI application for one request in a worker thread.
+
+        Return whether the connection may be kept open, and any bytes
+        which remain to be written.
+        """
+        method = environ['REQUEST_METHOD']
+        # The status and headers wait in 'pending' to be sent along with
+        # the first non-empty body chunk (or the end of the body), so
+        # that errors raised before then may still replace them.
+        state = {
+            'pending': None,
+            'started': False,
+            'chunked': False,
+            'remaining': None,
+        }
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and state['started']:
+                raise exc_info[1].with_traceback(exc_info[2])
+            state['status'] = status
+            state['headers'] = headers
+            return write
+
+        def start(no_body=False):
+            nonlocal keep_alive
+            status = state['status']
+            code = int(status[:3])
+            names = set()
+            lines = [('%s %s\r\n' % (response_protocol, status)).encode()]
+            for name, value in state['headers']:
+                lname = name.lower()
+                names.add(lname)
+                if lname == 'connection' and value.lower() == 'close':
+                    keep_alive = False
+                elif lname == 'content-length':
+                    state['remaining'] = int(value)
+                lines.append(
+                    ('%s: %s\r\n' % (name, value)).encode('ISO-8859-1'),
+                )
+            bodiless = method == 'HEAD' or code < 200 or code in (204, 304)
+            if 'content-length' not in names and not bodiless:
+                if no_body:
+                    lines.append(b'Content-Length: 0\r\n')
+                elif response_protocol == 'HTTP/1.1':
+                    state['chunked'] = True
+                    lines.append(b'Transfer-Encoding: chunked\r\n')
+                else:
+                    # The end of the body is marked by closing the socket.
+                    keep_alive = False
+            if 'date' not in names:
+                lines.append(
+                    ('Date: %s\r\n' % httputil.http_date()).encode(),
+                )
+            if 'server' not in names:
+                lines.append(('Server: %s\r\n' % self.version).encode())
+            if 'connection' not in names:
+                if not keep_alive:
+                    lines.append(b'Connection: close\r\n')
+                elif response_protocol == 'HTTP/1.0':
+                    lines.append(b'Connection: Keep-Alive\r\n')
+            lines.append(b'\r\n')
+            state['pending'] = b''.join(lines)
+            state['started'] = True
+            state['bodiless'] = bodiless
+
+        def write(chunk):
+            if not state['started']:
+                start()
+            if state['bodiless']:
+                return
+            if state['remaining'] is not None:
+                state['remaining'] -= len(chunk)
+                if state['remaining'] < 0:
+                    raise _ContentLengthExceeded()
+            if state['chunked']:
+                chunk = b'%x\r\n%s\r\n' % (len(chunk), chunk)
+            if state['pending']:
+                chunk = state['pending'] + chunk
+                state['pending'] = None
+            self._send(writer, chunk)
+
+        try:
+            result = self.wsgi_app(environ, start_response)
+        except (KeyboardInterrupt, SystemExit) as exc:
+            self.interrupt = exc
+            return False, None
+        except Exception:
+            cherrypy.engine.log(
+                'Error in the WSGI application',
+                level=40,
+                traceback=True,
+            )
+            tail = _simple_response(
+                response_protocol,
+                '500 Internal Server Error',
+                'The server encountered an unexpected internal server error',
+            )
+            return False, tail
+
+        try:
+            for chunk in result:
+                if chunk:
+                    write(bytes(chunk))
+            if not state['started']:
+                start(no_body=True)
+        except _ConnectionLost:
+            return False, None
+        except _ContentLengthExceeded:
+            if state['pending'] is None:
+                # The headers have gone, so the response cannot be fixed.
+                return False, None
+            tail = _simple_response(
+                response_protocol,
+                '500 Internal Server Error',
+                'The requested resource returned more bytes than the '
+                'declared Content-Length.',
+            )
+            return False, tail
+        except (KeyboardInterrupt, SystemExit) as exc:
+            self.interrupt = exc
+            return False, None
+        except Exception:
+            cherrypy.engine.log(
+                'Error while writing the response',
+                level=40,
+                traceback=True,
+            )
+            if state['started']:
+                return False, None
+            tail = _simple_response(
+                response_protocol,
+                '500 Internal Server Error',
+                'The server encountered an unexpected internal server error',
+            )
+            return False, tail
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        tail = state['pending'] or b''
+        if state['chunked']:
+            tail += b'0\r\n\r\n'
+        return keep_alive, tail
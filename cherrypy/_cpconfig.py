@@ -150,6 +150,15 @@ def merge(base, other):
 class Config(reprconf.Config):
     """The 'global' configuration data for the entire CherryPy process."""
 
+    _generation = 0
+    """Incremented whenever entries are set, so that anything derived from
+    the global config can tell when it has gone stale."""
+
+    def reset(self):
+        """Reset self to default values."""
+        super(Config, self).reset()
+        self._generation += 1
+
     def update(self, config):
         """Update self from a dict, file or filename."""
         _if_filename_register_autoreload(config)
@@ -164,6 +173,12 @@ class Config(reprconf.Config):
         if 'tools.staticdir.dir' in config:
             config['tools.staticdir.section'] = 'global'
         super(Config, self)._apply(config)
+        self._generation += 1
+
+    def __setitem__(self, k, v):
+        """Assign a config setting."""
+        super(Config, self).__setitem__(k, v)
+        self._generation += 1
 
     @staticmethod
     def __call__(**kwargs):
@@ -176,6 +191,58 @@ class Config(reprconf.Config):
         return tool_decorator
 
 
+def _read_only(name):
+    """Return a dict mutator which refuses to change a SharedConfig."""
+    method = getattr(dict, name)
+
+    def write(self, *args, **kwargs):
+        raise TypeError('Shared config snapshots are read-only.')
+
+    write.__name__ = name
+    write.__doc__ = method.__doc__
+    return write
+
+
+class SharedConfig(dict):
+    """A collapsed request config which is shared by many requests.
+
+    Dispatchers may keep the very same instance for every request to a
+    given path, so it is never changed: each request gets its own
+    :class:`RequestConfig` copy of it (see :meth:`request_copy`), which
+    it may change as it likes. Anything derived from the config alone
+    (such as the request's :class:`ConfigPlan
+    <cherrypy._cprequest.ConfigPlan>`) may be kept on the snapshot.
+    """
+
+    def request_copy(self):
+        """Return a new RequestConfig with the entries of this snapshot."""
+        return RequestConfig(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+    __setitem__ = _read_only('__setitem__')
+    __delitem__ = _read_only('__delitem__')
+    __ior__ = _read_only('__ior__')
+    clear = _read_only('clear')
+    pop = _read_only('pop')
+    popitem = _read_only('popitem')
+    setdefault = _read_only('setdefault')
+    update = _read_only('update')
+
+
+class RequestConfig(dict):
+    """The config of one request, copied from a :class:`SharedConfig`."""
+
+    def __init__(self, shared):
+        """Copy the given shared config, and remember where from."""
+        dict.__init__(self, shared)
+        self.shared = shared
+
+
 class _Vars(object):
     """Adapter allowing setting a default attribute on a function or class."""
 
@@ -10,9 +10,14 @@ The default dispatcher discovers the page handler by matching path_info
 to a hierarchical arrangement of objects, starting at request.app.root.
 """
 
+import collections
+import math
 import string
 import sys
+import threading
 import types
+import uuid
+import weakref
 
 try:
     classtype = (type, types.ClassType)
@@ -20,6 +25,7 @@ except AttributeError:
     classtype = type
 
 import cherrypy
+from cherrypy._cpconfig import SharedConfig
 
 
 class PageHandler(object):
@@ -54,18 +60,33 @@ class PageHandler(object):
         return cherrypy.serving.request.kwargs
 
     def __call__(self):
-        """Invoke an HTTP handler callable for :class:`PageHandler`."""
-        try:
-            return self.callable(*self.args, **self.kwargs)
-        except TypeError:
-            x = sys.exc_info()[1]
+        """Invoke an HTTP handler callable for :class:`PageHandler`.
+
+        If the callable is a coroutine function (``async def``), the
+        coroutine is run to completion on ``cherrypy.engine.event_loop``
+        while the current thread waits, and its result is returned.
+        """
+        binder = HandlerBinder.for_callable(self.callable)
+        if binder is not None:
+            args, kwargs = self.args, self.kwargs
+            binder.check(args, kwargs)
+            result = self.callable(*args, **kwargs)
+        else:
             try:
-                test_callable_spec(self.callable, self.args, self.kwargs)
-            except cherrypy.HTTPError:
-                raise sys.exc_info()[1]
-            except Exception:
-                raise x
-            raise
+                result = self.callable(*self.args, **self.kwargs)
+            except TypeError:
+                x = sys.exc_info()[1]
+                try:
+                    test_callable_spec(self.callable, self.args, self.kwargs)
+                except cherrypy.HTTPError:
+                    raise sys.exc_info()[1]
+                except Exception:
+                    raise x
+                raise
+
+        if isinstance(result, types.CoroutineType):
+            result = cherrypy.engine.event_loop.run(result)
+        return result
 
 
 def test_callable_spec(callable, callable_args, callable_kwargs):
@@ -231,6 +252,169 @@ else:
         return inspect.getfullargspec(callable)[:4]
 
 
+class HandlerBinder(object):
+    """The parameters of a page handler, compiled from its signature.
+
+    A binder checks the positional (virtual path) and keyword (query
+    string and body) arguments for a request against the handler's
+    signature before the handler is called, raising the same 404 and
+    400 errors as :func:`test_callable_spec` does, but without waiting
+    for a TypeError and inspecting the handler all over again. Binders
+    are compiled once per function and shared; see :meth:`for_callable`.
+    """
+
+    _binders = weakref.WeakKeyDictionary()
+
+    def __init__(self, func, bound=False):
+        """Compile a binder for func, minus its first parameter if bound."""
+        params = list(
+            inspect.signature(func, follow_wrapped=False).parameters.values(),
+        )
+        P = inspect.Parameter
+        if bound and params and params[0].kind != P.VAR_POSITIONAL:
+            # The instance fills *args if that is all the handler takes.
+            params = params[1:]
+
+        positional = [
+            p
+            for p in params
+            if p.kind in (P.POSITIONAL_ONLY, P.POSITIONAL_OR_KEYWORD)
+        ]
+        self.positional = tuple(p.name for p in positional)
+        """The names of the parameters which may be passed positionally."""
+
+        self.required = len(
+            [p for p in positional if p.default is P.empty],
+        )
+        """How many of the positional parameters have no default."""
+
+        self.required_kwonly = tuple(
+            p.name
+            for p in params
+            if p.kind == P.KEYWORD_ONLY and p.default is P.empty
+        )
+        self.keywords = frozenset(
+            p.name
+            for p in params
+            if p.kind in (P.POSITIONAL_OR_KEYWORD, P.KEYWORD_ONLY)
+        )
+        """The names of the parameters which may be passed by keyword."""
+
+        self.varargs = any(p.kind == P.VAR_POSITIONAL for p in params)
+        self.varkw = any(p.kind == P.VAR_KEYWORD for p in params)
+
+        self.converters = dict(
+            (p.name, p.annotation)
+            for p in params
+            if p.annotation is not P.empty and callable(p.annotation)
+        )
+        """A {name: callable} dict of the annotated parameters, for
+        :func:`cherrypy.lib.cptools.convert_params`."""
+
+    @classmethod
+    def for_callable(cls, handler):
+        """Return the binder for the given handler, or None.
+
+        Binders are available for functions, methods and instances of
+        classes defining ``__call__`` in Python; for anything else
+        (such as builtins), None is returned and the handler is checked
+        the old way, when calling it raises TypeError.
+        """
+        if isinstance(handler, types.FunctionType):
+            func, bound = handler, False
+        elif isinstance(handler, types.MethodType):
+            func, bound = handler.__func__, True
+        else:
+            func = getattr(type(handler), '__call__', None)
+            bound = True
+
+        try:
+            return cls._binders[func]
+        except KeyError:
+            pass
+        except TypeError:
+            # Not weakly referenceable, hence not a Python function.
+            return None
+
+        if not isinstance(func, types.FunctionType):
+            return None
+        try:
+            binder = cls(func, bound)
+        except (TypeError, ValueError):
+            binder = None
+        cls._binders[func] = binder
+        return binder
+
+    def check(self, args, kwargs):
+        """Raise HTTPError unless args and kwargs suit the handler."""
+        positional = self.positional
+        nargs = len(args)
+        missing = [
+            name
+            for name in positional[nargs : self.required]
+            if name not in kwargs
+        ]
+        missing.extend(
+            name for name in self.required_kwonly if name not in kwargs
+        )
+        multiple = [name for name in positional[:nargs] if name in kwargs]
+        extra_args = nargs > len(positional) and not self.varargs
+        extra_kwargs = () if self.varkw else kwargs.keys() - self.keywords
+        if missing or multiple or extra_args or extra_kwargs:
+            self._fail(kwargs, missing, multiple, extra_args, extra_kwargs)
+
+    def _fail(self, kwargs, missing, multiple, extra_args, extra_kwargs):
+        """Raise the HTTPError :func:`test_callable_spec` would."""
+        request = cherrypy.serving.request
+        show_mismatched_params = getattr(
+            request,
+            'show_mismatched_params',
+            False,
+        )
+
+        if missing:
+            message = None
+            if show_mismatched_params:
+                message = 'Missing parameters: %s' % ','.join(missing)
+            raise cherrypy.HTTPError(404, message=message)
+
+        # the extra positional arguments come from the path - 404 Not Found
+        if extra_args:
+            raise cherrypy.HTTPError(404)
+
+        body_params = set((request.body.params or {}).keys())
+        qs_params = set(kwargs.keys()) - body_params
+
+        if multiple:
+            # Any repeated parameters from the query string: 404 Not Found;
+            # otherwise they came from the body: 400 Bad Request.
+            error = 404 if qs_params.intersection(multiple) else 400
+            message = None
+            if show_mismatched_params:
+                message = 'Multiple values for parameters: %s' % ','.join(
+                    multiple,
+                )
+            raise cherrypy.HTTPError(error, message=message)
+
+        extra_qs_params = qs_params.intersection(extra_kwargs)
+        if extra_qs_params:
+            message = None
+            if show_mismatched_params:
+                message = 'Unexpected query string parameters: %s' % ', '.join(
+                    extra_qs_params,
+                )
+            raise cherrypy.HTTPError(404, message=message)
+
+        extra_body_params = body_params.intersection(extra_kwargs)
+        if extra_body_params:
+            message = None
+            if show_mismatched_params:
+                message = 'Unexpected body parameters: %s' % ', '.join(
+                    extra_body_params,
+                )
+            raise cherrypy.HTTPError(400, message=message)
+
+
 class LateParamPageHandler(PageHandler):
     """Page handler callable with delayed request parameters binding.
 
@@ -306,16 +490,51 @@ class Dispatcher(object):
     to provide their own dynamic dispatch algorithm.
     """
 
+    cache_size = 0
+    """
+    The maximum number of resolved paths to memoize. The default of 0
+    disables the resolution cache.
+
+    When enabled, the handler, virtual path and merged config found for
+    each (app, path_info) pair are kept in a bounded LRU cache, so repeat
+    requests skip the object tree walk entirely. Entries are discarded
+    whenever ``app.merge`` or ``cherrypy.config`` changes the config; call
+    :meth:`clear_cache` after altering the object tree itself. Paths
+    resolved through a ``_cp_dispatch`` method are never cached.
+    """
+
+    config_cache_size = 0
+    """
+    The maximum number of collapsed request configs to memoize. The
+    default of 0 builds the config dict afresh for every request.
+
+    When enabled, the config for each (app, path_info) pair is collapsed
+    once into a read-only :class:`SharedConfig
+    <cherrypy._cpconfig.SharedConfig>`, and every later request for that
+    path gets a copy of it, for as long as the config layers found along
+    the object tree stay the same. To notice changes made to those layers
+    in place, each is copied when the config is collapsed.
+    """
+
     def __init__(
         self,
         dispatch_method_name=None,
         translate=punctuation_to_underscores,
+        cache_size=None,
+        config_cache_size=None,
     ):
         """Initialize the HTTP request dispatcher."""
         validate_translator(translate)
         self.translate = translate
         if dispatch_method_name:
             self.dispatch_method_name = dispatch_method_name
+        if cache_size is not None:
+            self.cache_size = cache_size
+        if config_cache_size is not None:
+            self.config_cache_size = config_cache_size
+        self._cache = collections.OrderedDict()
+        self._configs = collections.OrderedDict()
+        self._cache_lock = threading.Lock()
 
     def __call__(self, path_info):
         """Set handler and config for the current request."""
@@ -329,6 +548,12 @@ class Dispatcher(object):
         else:
             request.handler = cherrypy.NotFound()
 
+    def clear_cache(self):
+        """Discard all memoized path resolutions and configs."""
+        with self._cache_lock:
+            self._cache.clear()
+            self._configs.clear()
+
     def find_handler(self, path):
         """Return the appropriate page handler, plus any virtual path.
 
@@ -348,10 +573,98 @@ class Dispatcher(object):
         path components are passed to the handler as positional
         arguments.
         """
+        if not self.cache_size:
+            return self._find_handler(path)[:2]
+
+        request = cherrypy.serving.request
+        key = request.app, path
+        stamp = request.app._generation, cherrypy.config._generation
+        cache = self._cache
+        entry = cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            try:
+                cache.move_to_end(key)
+            except KeyError:
+                # Evicted by another thread in the meantime.
+                pass
+            _, func, vpath, config, is_index = entry
+            request.config = config.request_copy()
+            request.is_index = is_index
+            return func, list(vpath)
+
+        func, vpath, dynamic = self._find_handler(path)
+        if not dynamic:
+            config = request.config
+            shared = getattr(config, 'shared', None)
+            if shared is None:
+                shared = SharedConfig(config)
+            entry = (
+                stamp,
+                func,
+                tuple(vpath),
+                shared,
+                request.is_index,
+            )
+            with self._cache_lock:
+                cache[key] = entry
+                while len(cache) > self.cache_size:
+                    cache.popitem(last=False)
+        return func, vpath
+
+    def _collapse_config(self, app, path, fullpath, layers):
+        """Return the config for the given (conf, segleft) layers.
+
+        Unless :attr:`config_cache_size` is 0, this is a copy of a
+        :class:`SharedConfig <cherrypy._cpconfig.SharedConfig>` which is
+        reused for later requests to the same path, as long as neither
+        ``cherrypy.config`` nor any of the layers have changed.
+        """
+        if self.config_cache_size:
+            key = app, path
+            stamp = cherrypy.config._generation
+            configs = self._configs
+            entry = configs.get(key)
+            if entry is not None and entry[0] == stamp and entry[1] == layers:
+                try:
+                    configs.move_to_end(key)
+                except KeyError:
+                    # Evicted by another thread in the meantime.
+                    pass
+                return entry[2].request_copy()
+
+        base = cherrypy.config.copy()
+        # Note that we merge the config from each node
+        # even if that node was None.
+        for conf, segleft in layers:
+            base.update(conf)
+            if 'tools.staticdir.dir' in conf:
+                base['tools.staticdir.section'] = '/' + '/'.join(
+                    fullpath[0 : len(fullpath) - segleft],
+                )
+        if not self.config_cache_size:
+            return base
+
+        base = SharedConfig(base)
+        # Copy the layers, since the handler's own _cp_config
+        # dict is one of them and may be changed in place.
+        layers = [(conf.copy(), segleft) for conf, segleft in layers]
+        with self._cache_lock:
+            configs[key] = stamp, layers, base
+            while len(configs) > self.config_cache_size:
+                configs.popitem(last=False)
+        return base.request_copy()
+
+    def _find_handler(self, path):
+        """Walk the object tree; see :meth:`find_handler`.
+
+        Return a (handler, vpath, dynamic) triple, where ``dynamic`` is
+        True if any node along the way was reached via ``_cp_dispatch``.
+        """
         request = cherrypy.serving.request
         app = request.app
         root = app.root
         dispatch_name = self.dispatch_method_name
+        dynamic = False
 
         # Get config for the root object/path.
         fullpath = [x for x in path.strip('/').split('/') if x] + ['index']
@@ -388,6 +701,7 @@ class Dispatcher(object):
                     index_name = iternames.pop()
                     subnode = dispatch(vpath=iternames)
                     iternames.append(index_name)
+                    dynamic = True
                 else:
                     # We didn't find a path, but keep processing in case there
                     # is a default() handler.
@@ -437,16 +751,8 @@ class Dispatcher(object):
 
             The config being ``cherrypy.request.config``.
             """
-            base = cherrypy.config.copy()
-            # Note that we merge the config from each node
-            # even if that node was None.
-            for name, obj, conf, segleft in object_trail:
-                base.update(conf)
-                if 'tools.staticdir.dir' in conf:
-                    base['tools.staticdir.section'] = '/' + '/'.join(
-                        fullpath[0 : fullpath_len - segleft],
-                    )
-            return base
+            layers = [(conf, segleft) for _, _, conf, segleft in object_trail]
+            return self._collapse_config(app, path, fullpath, layers)
 
         # Try successive objects (reverse order)
         num_candidates = len(object_trail) - 1
@@ -468,7 +774,8 @@ class Dispatcher(object):
                     request.config = set_conf()
                     # See https://github.com/cherrypy/cherrypy/issues/613
                     request.is_index = path.endswith('/')
-                    return defhandler, fullpath[fullpath_len - segleft : -1]
+                    vpath = fullpath[fullpath_len - segleft : -1]
+                    return defhandler, vpath, dynamic
 
             # Uncomment the next line to restrict positional params to
             # "default".
@@ -487,11 +794,12 @@ class Dispatcher(object):
                     # Note that this also includes handlers which take
                     # positional parameters (virtual paths).
                     request.is_index = False
-                return candidate, fullpath[fullpath_len - segleft : -1]
+                vpath = fullpath[fullpath_len - segleft : -1]
+                return candidate, vpath, dynamic
 
         # We didn't find anything
         request.config = set_conf()
-        return None, []
+        return None, [], dynamic
 
 
 class MethodDispatcher(Dispatcher):
@@ -652,6 +960,308 @@ class RoutesDispatcher(object):
         return handler
 
 
+def _to_int(value):
+    """Convert a path segment of ASCII digits to an int."""
+    if not (value.isascii() and value.isdigit()):
+        raise ValueError('%r is not an integer' % (value,))
+    return int(value)
+
+
+def _to_float(value):
+    """Convert a path segment to a finite float."""
+    result = float(value)
+    if not math.isfinite(result):
+        raise ValueError('%r is not a finite number' % (value,))
+    return result
+
+
+class _RadixRoute(object):
+    """A pattern connected to a RadixDispatcher, and its handler."""
+
+    def __init__(self, name, pattern, handler, controller, config, prefix):
+        self.name = name
+        self.pattern = pattern
+        self.handler = handler
+        self.controller = controller
+        self.config = config
+        self.prefix = prefix
+        self.configs = {}
+
+
+class _RadixNode(object):
+    """A node in a RadixDispatcher's tree of path segments."""
+
+    __slots__ = ('params', 'rest', 'routes', 'static')
+
+    def __init__(self):
+        self.static = {}
+        self.params = []
+        self.rest = None
+        self.routes = {}
+
+
+class RadixDispatcher(object):
+    """A dispatcher which matches path_info against connected patterns.
+
+    Patterns are registered with :meth:`connect` and compiled into a
+    tree of path segments. Each node maps literal segments straight to
+    its children and only tries its parameters when no literal segment
+    matches, so the cost of a lookup depends on the depth of the path
+    rather than on the number of routes. For example::
+
+        d = cherrypy.dispatch.RadixDispatcher()
+        d.connect('post', '/users/{id:int}/posts/{slug}', Posts(),
+                  action='show', methods=['GET'])
+        conf = {'/': {'request.dispatch': d}}
+
+    A pattern segment of the form ``{name}`` or ``{name:converter}``
+    matches a whole path segment; the converted value is passed to the
+    handler as the keyword argument ``name``. The builtin converters
+    are ``str`` (the default), ``int``, ``float``, ``uuid``, and
+    ``path``, which matches all remaining segments (slashes included)
+    and so must come last. Add others to :attr:`converters`.
+
+    A request is an index (see :attr:`request.is_index
+    <cherrypy._cprequest.Request.is_index>`) if the pattern it matched
+    ends with a slash, so that ``tools.trailing_slash`` can redirect
+    requests to the pattern's form of the URL.
+
+    Config for the request is collected from global config, from
+    ``app.config`` sections along the path, from the ``_cp_config`` of
+    the controller and handler, and from the ``config`` given to
+    :meth:`connect`, in that order.
+    """
+
+    converters = {
+        'str': str,
+        'int': _to_int,
+        'float': _to_float,
+        'uuid': uuid.UUID,
+        'path': str,
+    }
+    """
+    A map of converter names to callables, which receive a path segment
+    and must return its value or raise ValueError."""
+
+    def __init__(self):
+        """Initialize a radix dispatcher with no routes."""
+        self.root = _RadixNode()
+        self.routes = {}
+        self._configs_lock = threading.Lock()
+
+    def connect(
+        self,
+        name,
+        route,
+        controller,
+        action=None,
+        methods=None,
+        config=None,
+    ):
+        """Connect the given route pattern to a page handler.
+
+        If ``action`` is given, the handler is that attribute of the
+        ``controller`` (which is instantiated first if it is a class);
+        otherwise the controller itself is the handler. If ``methods``
+        is given, the route only matches requests using one of those
+        HTTP methods.
+        """
+        if isinstance(controller, classtype):
+            controller = controller()
+        if action is None:
+            handler, controller = controller, None
+        else:
+            handler = getattr(controller, action)
+
+        node = self.root
+        prefix = []
+        seen = set()
+        segments = [x for x in route.split('/') if x]
+        for i, segment in enumerate(segments):
+            if not (segment.startswith('{') and segment.endswith('}')):
+                if '{' in segment or '}' in segment:
+                    raise ValueError(
+                        'Parameters must span a whole path segment, '
+                        'not %r in %r.' % (segment, route),
+                    )
+                if len(prefix) == i:
+                    prefix.append(segment)
+                node = node.static.setdefault(segment, _RadixNode())
+                continue
+
+            param, _, conv = segment[1:-1].partition(':')
+            conv = conv or 'str'
+            if not param or param in seen:
+                raise ValueError(
+                    'Invalid or repeated parameter %r in %r.'
+                    % (segment, route),
+                )
+            seen.add(param)
+            if conv not in self.converters:
+                raise ValueError(
+                    'Unknown converter %r in %r.' % (conv, route),
+                )
+            if conv == 'path':
+                if i != len(segments) - 1:
+                    raise ValueError(
+                        'A path parameter must come last in %r.' % (route,),
+                    )
+                if node.rest is None:
+                    node.rest = param, _RadixNode()
+                elif node.rest[0] != param:
+                    raise ValueError(
+                        'Conflicting path parameter %r in %r.'
+                        % (segment, route),
+                    )
+                node = node.rest[1]
+                continue
+
+            for p, c, _, child in node.params:
+                if p == param and c == conv:
+                    node = child
+                    break
+            else:
+                child = _RadixNode()
+                node.params.append((param, conv, self.converters[conv], child))
+                node = child
+
+        route_obj = _RadixRoute(
+            name,
+            route,
+            handler,
+            controller,
+            config or {},
+            '/' + '/'.join(prefix),
+        )
+        for method in methods or [None]:
+            if method is not None:
+                method = method.upper()
+            if method in node.routes:
+                raise ValueError(
+                    'Route %r conflicts with route %r.'
+                    % (route, node.routes[method].pattern),
+                )
+            node.routes[method] = route_obj
+        self.routes[name] = route_obj
+
+    def __call__(self, path_info):
+        """Set handler and config for the current request."""
+        request = cherrypy.serving.request
+        node, params = self.find_node(path_info)
+        if node is None:
+            request.config = self._config_for(request.app, None, path_info)
+            request.handler = cherrypy.NotFound()
+            return
+
+        method = request.method
+        route = node.routes.get(method)
+        if route is None and method == 'HEAD':
+            route = node.routes.get('GET')
+        if route is None:
+            route = node.routes.get(None)
+        request.config = self._config_for(request.app, route, path_info)
+        if route is None:
+            methods = sorted(m for m in node.routes if m is not None)
+            if 'GET' in methods and 'HEAD' not in methods:
+                methods.append('HEAD')
+            cherrypy.serving.response.headers['Allow'] = ', '.join(methods)
+            request.handler = cherrypy.HTTPError(405)
+            return
+
+        request.is_index = route.pattern.endswith('/')
+        request.handler = LateParamPageHandler(route.handler, **params)
+
+    def find_node(self, path_info):
+        """Return the tree node matching path_info, plus its parameters.
+
+        Literal segments take precedence over parameters, which are
+        tried in the order in which they were connected. Return
+        (None, {}) if no route matches.
+        """
+        params = {}
+        segments = [x for x in path_info.split('/') if x]
+        node = self._match(self.root, segments, 0, params)
+        if node is None:
+            return None, {}
+        return node, params
+
+    def _match(self, node, segments, i, params):
+        if i == len(segments):
+            return node if node.routes else None
+
+        segment = segments[i]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._match(child, segments, i + 1, params)
+            if found is not None:
+                return found
+
+        for param, _, convert, child in node.params:
+            try:
+                params[param] = convert(segment)
+            except ValueError:
+                continue
+            found = self._match(child, segments, i + 1, params)
+            if found is not None:
+                return found
+            del params[param]
+
+        if node.rest is not None:
+            param, child = node.rest
+            if child.routes:
+                params[param] = '/'.join(segments[i:])
+                return child
+
+        return None
+
+    def _config_for(self, app, route, path_info):
+        """Return the collapsed config for the given route and path.
+
+        The result is shared by every request to the same route which
+        picks up the same ``app.config`` sections, for as long as none
+        of the config involved changes.
+        """
+        layers = []
+        root_conf = getattr(app.root, '_cp_config', None)
+        if root_conf:
+            layers.append((root_conf, '/'))
+        if '/' in app.config:
+            layers.append((app.config['/'], '/'))
+        curpath = ''
+        for atom in [x for x in path_info.split('/') if x]:
+            curpath += '/' + atom
+            if curpath in app.config:
+                layers.append((app.config[curpath], curpath))
+        if route is not None:
+            for obj in (route.controller, route.handler):
+                conf = getattr(obj, '_cp_config', None)
+                if conf:
+                    layers.append((conf, route.prefix))
+            if route.config:
+                layers.append((route.config, route.prefix))
+
+        sections = tuple(section for _, section in layers)
+        stamp = cherrypy.config._generation
+        configs = route.configs if route is not None else {}
+        entry = configs.get((app, sections))
+        if entry is not None and entry[0] == stamp and entry[1] == layers:
+            return entry[2].request_copy()
+
+        base = cherrypy.config.copy()
+        for conf, section in layers:
+            base.update(conf)
+            if 'tools.staticdir.dir' in conf:
+                base['tools.staticdir.section'] = section
+        if route is None:
+            return base
+
+        base = SharedConfig(base)
+        layers = [(conf.copy(), section) for conf, section in layers]
+        with self._configs_lock:
+            configs[(app, sections)] = stamp, layers, base
+        return base.request_copy()
+
+
 def XMLRPCDispatcher(next_dispatcher=Dispatcher()):
     """Chain an HTTP dispatcher variant implementing XML-RPC."""
     from cherrypy.lib import xmlrpcutil
@@ -703,10 +1313,14 @@ def VirtualHost(
         value will be prepended to the URL path before calling the
         next dispatcher. Note that you often need separate entries
         for "example.com" and "www.example.com". In addition, "Host"
-        headers may contain the port number.
+        headers may contain the port number. Keys may also be wildcards
+        such as "*.example.com", or "*" to match any other host; see
+        :class:`cherrypy.lib.httputil.HostMap`.
     """
     from cherrypy.lib import httputil
 
+    domains = httputil.HostMap(domains)
+
     def vhost_dispatch(path_info):
         request = cherrypy.serving.request
         header = request.headers.get
@@ -715,7 +1329,7 @@ def VirtualHost(
         if use_x_forwarded_host:
             domain = header('X-Forwarded-Host', domain)
 
-        prefix = domains.get(domain, '')
+        prefix = domains.match(domain, '')
         if prefix:
             path_info = httputil.urljoin(prefix, path_info)
 
@@ -151,6 +151,8 @@ class InternalRedirect(CherryPyException):
     def __init__(self, path, query_string=''):
         """Initialize the internal redirect exception."""
         self.request = cherrypy.serving.request
+        # The request lives on as the next one's request.prev.
+        self.request.reusable = False
 
         self.query_string = query_string
         if '?' in path:
@@ -271,9 +271,9 @@ class LogManager(object):
             'r': request.request_line,
             's': status,
             'b': dict.get(outheaders, 'Content-Length', '') or '-',
-            'f': dict.get(inheaders, 'Referer', ''),
-            'a': dict.get(inheaders, 'User-Agent', ''),
-            'o': dict.get(inheaders, 'Host', '-'),
+            'f': inheaders.get('Referer', ''),
+            'a': inheaders.get('User-Agent', ''),
+            'o': inheaders.get('Host', '-'),
             'i': request.unique_id,
             'z': LazyRfc3339UtcTime(),
         }
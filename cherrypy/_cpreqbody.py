@@ -112,6 +112,8 @@ try:
     from io import DEFAULT_BUFFER_SIZE
 except ImportError:
     DEFAULT_BUFFER_SIZE = 8192
+import io
+import os
 import re
 import sys
 import tempfile
@@ -124,18 +126,30 @@ from cherrypy._cpcompat import ntou
 from cherrypy.lib import httputil
 
 
+_hextobyte = {
+    (a + b).encode('ascii'): bytes([int(a + b, 16)])
+    for a in '0123456789ABCDEFabcdef'
+    for b in '0123456789ABCDEFabcdef'
+}
+
+
 def unquote_plus(bs):
     """Bytes version of urllib.parse.unquote_plus."""
     bs = bs.replace(b'+', b' ')
+    if b'%' not in bs:
+        return bs
     atoms = bs.split(b'%')
-    for i in range(1, len(atoms)):
-        item = atoms[i]
+    res = [atoms[0]]
+    for item in atoms[1:]:
         try:
-            pct = int(item[:2], 16)
-            atoms[i] = bytes([pct]) + item[2:]
-        except ValueError:
-            pass
-    return b''.join(atoms)
+            res.append(_hextobyte[item[:2]] + item[2:])
+        except KeyError:
+            # Malformed; take what int() makes of it, as always.
+            try:
+                res.append(bytes([int(item[:2], 16)]) + item[2:])
+            except ValueError:
+                res.append(item)
+    return b''.join(res)
 
 
 # ------------------------------- Processors -------------------------------- #
@@ -144,27 +158,40 @@ def unquote_plus(bs):
 def process_urlencoded(entity):
     """Read application/x-www-form-urlencoded data into entity.params."""
     qs = entity.fp.read()
+    # Fields may be separated by ';' as well as '&'.
+    pairs = [pair for pair in qs.replace(b';', b'&').split(b'&') if pair]
+    if entity.max_params is not None and len(pairs) > entity.max_params:
+        raise cherrypy.HTTPError(
+            413,
+            'The request entity has more than %d fields.' % entity.max_params,
+        )
+
+    # Split and unquote each field just once, whatever the charset.
+    max_name = entity.max_param_name_length
+    fields = []
+    for pair in pairs:
+        key, _, value = pair.partition(b'=')
+        if max_name is not None and len(key) > max_name:
+            raise cherrypy.HTTPError(
+                400,
+                'The request entity has a field name longer than %d bytes.'
+                % max_name,
+            )
+        fields.append((unquote_plus(key), unquote_plus(value)))
+
     for charset in entity.attempt_charsets:
         try:
             params = {}
-            for aparam in qs.split(b'&'):
-                for pair in aparam.split(b';'):
-                    if not pair:
-                        continue
-
-                    atoms = pair.split(b'=', 1)
-                    if len(atoms) == 1:
-                        atoms.append(b'')
-
-                    key = unquote_plus(atoms[0]).decode(charset)
-                    value = unquote_plus(atoms[1]).decode(charset)
+            for key, value in fields:
+                key = key.decode(charset)
+                value = value.decode(charset)
 
-                    if key in params:
-                        if not isinstance(params[key], list):
-                            params[key] = [params[key]]
-                        params[key].append(value)
-                    else:
-                        params[key] = value
+                if key in params:
+                    if not isinstance(params[key], list):
+                        params[key] = [params[key]]
+                    params[key].append(value)
+                else:
+                    params[key] = value
         except UnicodeDecodeError:
             pass
         else:
@@ -188,8 +215,11 @@ def process_urlencoded(entity):
             entity.params[key] = value
 
 
-def process_multipart(entity):
-    """Read all multipart parts into entity.parts."""
+def _read_to_first_boundary(entity):
+    """Read the preamble of a multipart entity, up to its first boundary.
+
+    Return the boundary line (as bytes), or None if there is none.
+    """
     ib = ''
     if 'boundary' in entity.content_type.params:
         # http://tools.ietf.org/html/rfc2046#section-5.1.1
@@ -207,15 +237,22 @@ def process_multipart(entity):
     while True:
         b = entity.readline()
         if not b:
-            return
+            return None
 
         b = b.strip()
         if b == ib:
-            break
+            return ib
+
+
+def process_multipart(entity):
+    """Read all multipart parts into entity.parts."""
+    ib = _read_to_first_boundary(entity)
+    if ib is None:
+        return
 
     # Read all parts
     while True:
-        part = entity.part_class.from_fp(entity.fp, ib)
+        part = entity._next_part(ib)
         entity.parts.append(part)
         part.process()
         if part.fp.done:
@@ -283,6 +320,71 @@ def _old_process_multipart(entity):
             params[key] = value
 
 
+def _preallocate(fp_out, entity):
+    """Reserve space for the body of the given entity, if its size is known.
+
+    Only the request body itself is sized exactly by its Content-Length
+    (a multipart part ends wherever its boundary is found), so parts are
+    not preallocated; nor is anything where posix_fallocate is missing.
+    """
+    if (
+        hasattr(os, 'posix_fallocate')
+        and not isinstance(entity, Part)
+        and entity.length
+    ):
+        try:
+            os.posix_fallocate(fp_out.fileno(), 0, entity.length)
+        except OSError:
+            # Not supported by this filesystem; the writes will do.
+            pass
+
+
+def _remove_spool_file(fp_out):
+    fp_out.close()
+    try:
+        os.remove(fp_out.name)
+    except FileNotFoundError:
+        # The page handler moved it.
+        pass
+
+
+def named_spool_file(entity):
+    """Return a temporary file in ``entity.spool_dir`` with a path ``name``.
+
+    A page handler may keep the upload by moving the file to its final
+    place with :func:`os.rename`, instead of copying it; if it is still
+    there at the end of the request, it is removed. Use it with::
+
+        [/upload]
+        request.body.spool_factory = cherrypy._cpreqbody.named_spool_file
+
+    and put the spool_dir on the same filesystem as the final storage.
+    """
+    fp_out = tempfile.NamedTemporaryFile(dir=entity.spool_dir, delete=False)
+    cherrypy.serving.request.hooks.attach(
+        'on_end_request',
+        _remove_spool_file,
+        fp_out=fp_out,
+    )
+    _preallocate(fp_out, entity)
+    return fp_out
+
+
+def memory_spool_file(entity):
+    """Return an anonymous file in memory, made with ``os.memfd_create``.
+
+    Like a file on a tmpfs spool_dir, it is never written to disk, but
+    it needs no such mount. Where memfd_create is not available, this
+    returns an ordinary temporary file in ``entity.spool_dir`` instead.
+    """
+    if not hasattr(os, 'memfd_create'):
+        return tempfile.TemporaryFile(dir=entity.spool_dir)
+    fd = os.memfd_create('cherrypy-upload', os.MFD_CLOEXEC)
+    fp_out = open(fd, 'w+b')
+    _preallocate(fp_out, entity)
+    return fp_out
+
+
 # -------------------------------- Entities --------------------------------- #
 class Entity(object):
     """An HTTP request body, or MIME multipart body.
@@ -398,6 +500,15 @@ class Entity(object):
     the 'before_request_body' and 'before_handler' hooks (assuming that
     process_request_body is True)."""
 
+    max_params = None
+    """The maximum number of fields in an application/x-www-form-urlencoded
+    entity, or None (the default) for no limit. More fields raise 413."""
+
+    max_param_name_length = None
+    """The maximum length, in bytes, of the (still quoted) field names of an
+    application/x-www-form-urlencoded entity, or None (the default) for no
+    limit. Longer names raise 400."""
+
     processors = {
         'application/x-www-form-urlencoded': process_urlencoded,
         'multipart/form-data': process_multipart_form_data,
@@ -416,6 +527,30 @@ class Entity(object):
     of multipart parts.
     """
 
+    spool_dir = None
+    """The directory in which :func:`make_file` makes temporary files.
+
+    If None (the default), the :mod:`tempfile` default is used. Like the
+    other spool settings, this can be set per path with config entries
+    such as ``request.body.spool_dir = '/mnt/tmpfs'``; the parts of a
+    multipart entity take the settings of the entity they are part of.
+    """
+
+    spool_factory = None
+    """A callable which returns a new file for :func:`make_file`.
+
+    It is passed the entity, and should return a writable, seekable
+    file. If None (the default), a :func:`tempfile.TemporaryFile` in
+    :attr:`spool_dir` is made. See :func:`named_spool_file` and
+    :func:`memory_spool_file` for alternatives.
+    """
+
+    part_maxrambytes = None
+    """If not None, this overrides
+    :attr:`Part.maxrambytes<cherrypy._cpreqbody.Part.maxrambytes>` for the
+    parts of this entity.
+    """
+
     def __init__(self, fp, headers, params=None, parts=None):
         """Initialize an HTTP entity."""
         # Make an instance-specific copy of the class processors
@@ -523,13 +658,57 @@ class Entity(object):
         self.read(fp_out=fp_out)
         return fp_out
 
+    def iter_parts(self):
+        """Yield the parts of a multipart entity as they are read.
+
+        Unlike the multipart processors, which read every part (into
+        memory or a temporary file) before the page handler is called,
+        this yields each :class:`Part` as soon as its headers are read.
+        Its ``file`` reads the part body straight from the connection,
+        so it must be read before the next part is asked for; any of it
+        left unread is skipped then. Use the ``tools.stream_parts`` tool
+        to leave the request body to be read this way; it also discards
+        whatever the page handler leaves unread.
+        """
+        ib = _read_to_first_boundary(self)
+        if ib is None:
+            return
+
+        while True:
+            part = self._next_part(ib)
+            chunks = part.iter_to_boundary()
+            part.file = io.BufferedReader(_PartFile(chunks))
+            yield part
+            # Skip whatever was left unread.
+            for _ in chunks:
+                pass
+            if part.fp.done:
+                break
+
     def make_file(self):
         """Return a file-like object into which the request body will be read.
 
-        By default, this will return a TemporaryFile. Override as needed.
-        See also :attr:`cherrypy._cpreqbody.Part.maxrambytes`.
+        By default, this will return a TemporaryFile in :attr:`spool_dir`,
+        or whatever :attr:`spool_factory` returns if that is set. Override
+        as needed. See also :attr:`cherrypy._cpreqbody.Part.maxrambytes`.
         """
-        return tempfile.TemporaryFile()
+        if self.spool_factory is not None:
+            return self.spool_factory(self)
+        return tempfile.TemporaryFile(dir=self.spool_dir)
+
+    def _next_part(self, boundary):
+        """Read the headers of the next part, and return it.
+
+        The part is given the spool settings of this entity.
+        """
+        part = self.part_class.from_fp(self.fp, boundary)
+        for name in ('spool_dir', 'spool_factory', 'part_maxrambytes'):
+            value = getattr(self, name)
+            if value is not None:
+                setattr(part, name, value)
+        if self.part_maxrambytes is not None:
+            part.maxrambytes = self.part_maxrambytes
+        return part
 
     def fullvalue(self):
         """Return this entity as a string, whether stored in a file or not."""
@@ -629,6 +808,9 @@ class Part(Entity):
     module in Python's standard library.
     """
 
+    bufsize = 64 * 1024
+    """The number of bytes read at a time while looking for the boundary."""
+
     def __init__(self, fp, headers, boundary):
         """Initialize an entity part."""
         Entity.__init__(self, fp, headers)
@@ -673,6 +855,74 @@ class Part(Entity):
 
         return headers
 
+    def iter_to_boundary(self):
+        """Read bytes from self.fp up to the boundary, and yield them.
+
+        The body is read ``bufsize`` bytes at a time, and each chunk is
+        searched for the next line starting with the boundary; the bytes
+        before it (less the line break) are yielded as memoryviews,
+        without being split into lines. Bytes read past the boundary
+        line are pushed back onto self.fp for the next part. A line
+        which starts with the boundary but runs on for more than
+        ``bufsize`` bytes is not a boundary line, and is part data.
+        """
+        delim = b'\n' + self.boundary
+        # 'data' holds the bytes read but not yet yielded. It starts with
+        # a line break (which is skipped) so that the boundary is found
+        # at the very start of the part, too.
+        data = bytearray(b'\n')
+        skip = 1
+        search = 0
+        eof = False
+        while True:
+            i = data.find(delim, search)
+            if i == -1:
+                if eof:
+                    raise EOFError('Illegal end of multipart body.')
+                # Keep the bytes which may begin a delimiter.
+                end = max(skip, len(data) - len(delim))
+                search = 0
+            else:
+                j = i + len(delim)
+                eol = data.find(b'\n', j)
+                rest = (data[j:] if eol == -1 else data[j:eol]).rstrip()
+                if eol == -1 and not eof:
+                    if (
+                        rest not in (b'', b'-', b'--')
+                        or len(data) - j > self.bufsize
+                    ):
+                        # Not a boundary: more text follows it, or the
+                        # line is too long to be one.
+                        search = i + 1
+                        continue
+                    # Read the rest of the line before deciding.
+                    end = max(skip, i - 1)
+                    search = i
+                elif rest in (b'', b'--'):
+                    end = i - 1 if data[i - 1 : i] == b'\r' else i
+                    if end > skip:
+                        yield memoryview(data)[skip:end]
+                    if eol != -1:
+                        self.fp.unread(bytes(data[eol + 1 :]))
+                    if rest:
+                        self.fp.finish()
+                    return
+                else:
+                    search = i + 1
+                    continue
+
+            if end > skip:
+                yield memoryview(data)[skip:end]
+                data = data[end:]
+                search = max(0, search - end)
+                skip = 0
+
+            more = self.fp.read(self.bufsize)
+            if more:
+                data += more
+            else:
+                eof = True
+
     def read_lines_to_boundary(self, fp_out=None):
         """Read bytes from self.fp and return or write them to a file.
 
@@ -683,50 +933,22 @@ class Part(Entity):
         object that supports the 'write' method; all bytes read will be
         written to the fp, and that fp is returned.
         """
-        endmarker = self.boundary + b'--'
-        delim = b''
-        prev_lf = True
-        lines = []
+        chunks = []
         seen = 0
-        while True:
-            line = self.fp.readline(1 << 16)
-            if not line:
-                raise EOFError('Illegal end of multipart body.')
-            if line.startswith(b'--') and prev_lf:
-                strippedline = line.strip()
-                if strippedline == self.boundary:
-                    break
-                if strippedline == endmarker:
-                    self.fp.finish()
-                    break
-
-            line = delim + line
-
-            if line.endswith(b'\r\n'):
-                delim = b'\r\n'
-                line = line[:-2]
-                prev_lf = True
-            elif line.endswith(b'\n'):
-                delim = b'\n'
-                line = line[:-1]
-                prev_lf = True
-            else:
-                delim = b''
-                prev_lf = False
-
+        for chunk in self.iter_to_boundary():
             if fp_out is None:
-                lines.append(line)
-                seen += len(line)
+                chunks.append(chunk)
+                seen += len(chunk)
                 if seen > self.maxrambytes:
                     fp_out = self.make_file()
-                    for line in lines:
-                        fp_out.write(line)
+                    for chunk in chunks:
+                        fp_out.write(chunk)
+                    chunks = []
             else:
-                fp_out.write(line)
+                fp_out.write(chunk)
 
         if fp_out is None:
-            result = b''.join(lines)
-            return result
+            return b''.join(chunks)
         else:
             fp_out.seek(0)
             return fp_out
@@ -760,6 +982,29 @@ class Part(Entity):
 
 Entity.part_class = Part
 
+
+class _PartFile(io.RawIOBase):
+    """A readable file of the body of a part, read as it is needed."""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            self.pending = next(self.chunks, None)
+            if self.pending is None:
+                self.pending = b''
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
 inf = float('inf')
 
 
@@ -890,14 +1135,17 @@ class SizedReader:
             pos = data.find(b'\n') + 1
             if pos:
                 chunks.append(data[:pos])
-                remainder = data[pos:]
-                self.buffer += remainder
-                self.bytes_read -= len(remainder)
+                self.unread(data[pos:])
                 break
             else:
                 chunks.append(data)
         return b''.join(chunks)
 
+    def unread(self, data):
+        """Push bytes back onto the request body, to be read again."""
+        self.buffer = data + self.buffer
+        self.bytes_read -= len(data)
+
     def readlines(self, sizehint=None):
         """Read lines from the request body and return them."""
         if self.length is not None:
@@ -1,7 +1,9 @@
+import bisect
 import sys
 import time
 import collections
 import operator
+import warnings
 from http.cookies import SimpleCookie, CookieError
 
 import uuid
@@ -11,6 +13,7 @@ from more_itertools import consume
 import cherrypy
 from cherrypy._cpcompat import ntob
 from cherrypy import _cpreqbody
+from cherrypy._cpconfig import RequestConfig
 from cherrypy._cperror import format_exc, bare_error
 from cherrypy.lib import httputil, reprconf, encoding
 
@@ -86,27 +89,97 @@ class Hook(object):
         )
 
 
+class _HookChain(tuple):  # noqa: SLOT001 - needs a __dict__
+    """The hooks at one call point, as ``HookMap[point]`` returns them.
+
+    Hook chains used to be lists, so ``append`` and ``extend`` still work
+    (with a DeprecationWarning), by inserting into the HookMap the chain
+    came from. Use :meth:`HookMap.attach` or :meth:`HookMap.insert`.
+    """
+
+    def append(self, hook):
+        """Insert the given Hook into the map this chain came from."""
+        warnings.warn(
+            'Hook chains are immutable; appending to one is deprecated. '
+            'Use HookMap.attach or HookMap.insert instead.',
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        self._hookmap.insert(self._point, hook)
+
+    def extend(self, hooks):
+        """Insert the given Hooks into the map this chain came from."""
+        warnings.warn(
+            'Hook chains are immutable; extending one is deprecated. '
+            'Use HookMap.attach or HookMap.insert instead.',
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        for hook in hooks:
+            self._hookmap.insert(self._point, hook)
+
+
 class HookMap(dict):
-    """A map of call points to lists of callbacks (Hook objects)."""
+    """A map of call points to ordered tuples of callbacks (Hook objects).
+
+    Each tuple is kept sorted by priority as hooks are attached, so
+    running a call point never has to sort, and copying a HookMap never
+    has to copy the (immutable) tuples.
+    """
 
     def __new__(cls, points=None):
         """Construct a fresh hook map instance."""
         d = dict.__new__(cls)
         for p in points or []:
-            d[p] = []
+            d[p] = ()
         return d
 
     def __init__(self, *a, **kw):
         """Initialize a hook map instance post-construction."""
         pass
 
+    def __getitem__(self, point):
+        """Return the hooks at the given point, in priority order."""
+        chain = _HookChain(dict.__getitem__(self, point))
+        chain._hookmap = self
+        chain._point = point
+        return chain
+
     def attach(self, point, callback, failsafe=None, priority=None, **kwargs):
-        """Append a new Hook made from the supplied arguments."""
-        self[point].append(Hook(callback, failsafe, priority, **kwargs))
+        """Insert a new Hook made from the supplied arguments."""
+        self.insert(point, Hook(callback, failsafe, priority, **kwargs))
+
+    def insert(self, point, hook):
+        """Insert the given Hook at the given point, in priority order.
+
+        Hooks of equal priority run in the order they were inserted.
+        """
+        hooks = dict.__getitem__(self, point)
+        if type(hooks) is not tuple:
+            hooks = tuple(sorted(hooks))
+        i = bisect.bisect_right(hooks, hook)
+        self[point] = hooks[:i] + (hook,) + hooks[i:]
+
+    def merge(self, chains):
+        """Insert every Hook from the given {point: (hook, ...)} map.
+
+        Each chain must already be in priority order, as the chains of
+        another HookMap are.
+        """
+        for point, chain in chains.items():
+            if dict.__getitem__(self, point):
+                for hook in chain:
+                    self.insert(point, hook)
+            else:
+                self[point] = chain
 
     def run(self, point):
         """Execute all registered Hooks (callbacks) for the given point."""
-        self.run_hooks(iter(sorted(self[point])))
+        hooks = dict.__getitem__(self, point)
+        if type(hooks) is not tuple:
+            # Someone replaced the chain with a list; sort it the old way.
+            hooks = sorted(hooks)
+        self.run_hooks(iter(hooks))
 
     @classmethod
     def run_hooks(cls, hooks):
@@ -140,10 +213,10 @@ class HookMap(dict):
     def __copy__(self):
         """Duplicate object per the copy protocol."""
         newmap = self.__class__()
-        # We can't just use 'update' because we want copies of the
-        # mutable values (each is a list) as well.
+        # The values are normally immutable tuples, which can be shared;
+        # copy any mutable ones so the new map can't change this one.
         for k, v in self.items():
-            newmap[k] = v[:]
+            newmap[k] = v if type(v) is tuple else v[:]
         return newmap
 
     copy = __copy__
@@ -167,7 +240,7 @@ def hooks_namespace(k, v):
         v = cherrypy.lib.reprconf.attributes(v)
     if not isinstance(v, Hook):
         v = Hook(v)
-    cherrypy.serving.request.hooks[hookpoint].append(v)
+    cherrypy.serving.request.hooks.insert(hookpoint, v)
 
 
 def request_namespace(k, v):
@@ -197,6 +270,100 @@ def error_page_namespace(k, v):
     cherrypy.serving.request.error_page[k] = v
 
 
+class ConfigPlan(object):
+    """What applying one shared request config does, compiled once.
+
+    Every request passes its config through ``request.namespaces``,
+    which splits each key on its first dot and hands the entries to each
+    namespace handler in turn. When ``request.config`` was copied from a
+    :class:`SharedConfig <cherrypy._cpconfig.SharedConfig>`, the result
+    of that split is kept in a ConfigPlan stored on the shared config:
+    the bare hooks declared in the ``hooks`` namespace are built once,
+    each Toolbox contributes a :class:`ToolPlan
+    <cherrypy._cptools.ToolPlan>`, and any other handlers are simply
+    passed their (pre-split) entries again for each request.
+
+    Call :meth:`describe` (for example on ``cherrypy.request.config_plan``
+    from within a page handler) to see what a route actually runs.
+    """
+
+    def __init__(self, request, config):
+        """Compile the plan in the context of the given request."""
+        self.handlers = request.namespaces.copy()
+        self.steps = []
+        """A list of (namespace, handler, payload) triples, where payload
+        is a {hookpoint: (hook, ...)} map for the hooks namespace, a plan
+        for toolboxes, and otherwise the {name: value} entries."""
+
+        ns_confs = reprconf.NamespaceSet._split(config)
+        hooks = request.hooks
+        for ns, handler in self.handlers.items():
+            entries = ns_confs.get(ns, {})
+            if handler is hooks_namespace:
+                request.hooks = recorder = HookMap(hooks)
+                try:
+                    for k, v in entries.items():
+                        handler(k, v)
+                finally:
+                    request.hooks = hooks
+                payload = dict((k, v) for k, v in recorder.items() if v)
+                if not payload:
+                    continue
+            elif hasattr(handler, '_plan'):
+                payload = handler._plan(entries)
+            elif entries or hasattr(handler, '__exit__'):
+                payload = entries
+            else:
+                continue
+            self.steps.append((ns, handler, payload))
+
+    @classmethod
+    def for_request(cls, request):
+        """Return the plan for ``request.config``, or None if unshared."""
+        config = request.config
+        if type(config) is not RequestConfig:
+            return None
+        shared = config.shared
+        plan = shared.__dict__.get('_plan')
+        if plan is None or not plan.is_current(request):
+            shared._plan = plan = cls(request, shared)
+        return plan
+
+    def is_current(self, request):
+        """Return True if this plan still applies to the given request."""
+        if self.handlers != request.namespaces:
+            return False
+        for ns, handler, payload in self.steps:
+            if hasattr(payload, 'is_current') and not payload.is_current():
+                return False
+        return True
+
+    def apply(self, request):
+        """Apply the planned config to the given request."""
+        for ns, handler, payload in self.steps:
+            if handler is hooks_namespace:
+                request.hooks.merge(payload)
+            elif hasattr(payload, 'apply'):
+                payload.apply(request)
+            else:
+                reprconf.NamespaceSet._call_handler(handler, payload)
+
+    def describe(self):
+        """Return a human-readable account of this plan, as a string."""
+        lines = []
+        for ns, handler, payload in self.steps:
+            if handler is hooks_namespace:
+                for point, chain in payload.items():
+                    for hook in chain:
+                        lines.append('hooks.%s %r' % (point, hook))
+            elif hasattr(payload, 'describe'):
+                lines.extend(payload.describe())
+            else:
+                for k, v in payload.items():
+                    lines.append('%s.%s = %r' % (ns, k, v))
+        return '\n'.join(lines)
+
+
 hookpoints = [
     'on_start_resource',
     'before_request_body',
@@ -209,6 +376,32 @@ hookpoints = [
 ]
 
 
+class RequestCookie(object):
+    """The cookies sent with the HTTP request, made on first use."""
+
+    def __get__(self, obj, objclass=None):
+        """Return the request cookie, made from the Cookie headers.
+
+        :meth:`Request.process_headers` has already checked those
+        headers (and raised 400 Bad Request for a malformed one), so
+        making the cookie here cannot fail.
+        """
+        if obj is None:
+            # When calling on the class instead of an instance...
+            return self
+
+        cookie = obj.__dict__.get('_cookie')
+        if cookie is None:
+            cookie = SimpleCookie()
+            httputil.load_cookie_pairs(cookie, obj._cookie_pairs)
+            obj._cookie = cookie
+        return cookie
+
+    def __set__(self, obj, value):
+        """Replace the request cookie."""
+        obj._cookie = value
+
+
 class Request(object):
     """An HTTP request.
 
@@ -290,6 +483,13 @@ class Request(object):
     encode back to bytes and re-decode to whatever encoding you like later.
     """
 
+    query_string_cache = None
+    """
+    A :class:`QueryStringCache <cherrypy.lib.httputil.QueryStringCache>`
+    in which to look up the parsed query string, or None (the default)
+    to parse it for every request.
+    """
+
     protocol = (1, 1)
     """The HTTP protocol version corresponding to the set
     of features which should be allowed in the response. If BOTH
@@ -324,8 +524,13 @@ class Request(object):
     httputil.HeaderMap, httputil.HeaderElement.
     """
 
-    cookie = SimpleCookie()
-    """See help(Cookie)."""
+    cookie = RequestCookie()
+    """A SimpleCookie of the cookies sent with the request, loaded from the
+    Cookie headers the first time it is read. See help(Cookie)."""
+
+    _cookie_pairs = ()
+    """The (name, value) pairs of the Cookie headers, checked and split up
+    by :meth:`process_headers` and made into :attr:`cookie` on first use."""
 
     rfile = None
     """
@@ -434,6 +639,12 @@ class Request(object):
     downward).
     """
 
+    config_plan = None
+    """
+    The :class:`ConfigPlan` which applied :attr:`config` to this request,
+    or None if the config was not shared, in which case it was passed
+    through :attr:`namespaces` directly."""
+
     is_index = None
     """
     This will be True if the current request is mapped to an 'index'
@@ -443,12 +654,13 @@ class Request(object):
     the trailing slash. See cherrypy.tools.trailing_slash."""
 
     hooks = HookMap(hookpoints)
-    """A HookMap (dict-like object) of the form: {hookpoint: [hook, ...]}.
+    """A HookMap (dict-like object) of the form: {hookpoint: (hook, ...)}.
 
-    Each key is a str naming the hook point, and each value is a list
-    of hooks which will be called at that hook point during this request.
-    The list of hooks is generally populated as early as possible (mostly
-    from Tools specified in config), but may be extended at any time.
+    Each key is a str naming the hook point, and each value is a tuple
+    of hooks, sorted by priority, which will be called at that hook point
+    during this request. The hooks are generally attached as early as
+    possible (mostly from Tools specified in config), but more may be
+    attached at any time via :meth:`HookMap.attach`.
     See also: _cprequest.Hook, _cprequest.HookMap, and cherrypy.tools.
     """
 
@@ -506,6 +718,12 @@ class Request(object):
     closed = False
     """True once the close method has been called, False otherwise."""
 
+    reusable = True
+    """If False, an Application with ``serving_pool`` on will not reuse this
+    Request once it has been released. Set for requests which must outlive
+    their release, such as those raising InternalRedirect, which become the
+    ``prev`` of the next request."""
+
     stage = None
     """A string containing the stage reached in the request-handling process.
 
@@ -556,6 +774,41 @@ class Request(object):
 
         self.unique_id = LazyUUID4()
 
+    def reset(
+        self,
+        local_host,
+        remote_host,
+        scheme='http',
+        server_protocol='HTTP/1.1',
+    ):
+        """Return this Request to the state a new one starts in.
+
+        Every instance attribute is dropped, so that the class defaults
+        show through again; only the ``error_page`` and ``namespaces``
+        dicts are kept, and refilled from the class. This is how
+        :meth:`Application.get_serving
+        <cherrypy._cptree.Application.get_serving>` reuses a released
+        Request when its ``serving_pool`` is on. Subclasses which set
+        attributes in ``__init__`` must override this to set them again.
+        """
+        error_page, namespaces = self.error_page, self.namespaces
+        self.__dict__.clear()
+
+        error_page.clear()
+        error_page.update(self.error_page)
+        self.error_page = error_page
+        dict.clear(namespaces)
+        dict.update(namespaces, self.namespaces)
+        self.namespaces = namespaces
+
+        self.local = local_host
+        self.remote = remote_host
+        self.scheme = scheme
+        self.server_protocol = server_protocol
+        self.closed = False
+        self.stage = None
+        self.unique_id = LazyUUID4()
+
     def close(self):
         """Run cleanup code.
 
@@ -634,12 +887,11 @@ class Request(object):
             self.request_line = '%s %s %s' % (method, url, req_protocol)
 
             self.header_list = list(headers)
-            self.headers = httputil.HeaderMap()
+            self.headers = httputil.LazyHeaderMap(self.header_list)
 
             self.rfile = rfile
             self.body = None
 
-            self.cookie = SimpleCookie()
             self.handler = None
 
             # path_info should be the path from the
@@ -724,7 +976,11 @@ class Request(object):
             request_params=self.params,
         )
 
-        self.namespaces(self.config)
+        self.config_plan = ConfigPlan.for_request(self)
+        if self.config_plan is None:
+            self.namespaces(self.config)
+        else:
+            self.config_plan.apply(self)
 
         self.stage = 'on_start_resource'
         self.hooks.run('on_start_resource')
@@ -759,11 +1015,15 @@ class Request(object):
 
         (Core)
         """
+        cache = self.query_string_cache
         try:
-            p = httputil.parse_query_string(
-                self.query_string,
-                encoding=self.query_string_encoding,
-            )
+            if cache is None:
+                p = httputil.parse_query_string(
+                    self.query_string,
+                    encoding=self.query_string_encoding,
+                )
+            else:
+                p = cache.parse(self.query_string, self.query_string_encoding)
         except UnicodeDecodeError:
             raise cherrypy.HTTPError(
                 404,
@@ -772,33 +1032,52 @@ class Request(object):
                 % self.query_string_encoding,
             )
 
-        self.params.update(p)
+        if cache is None:
+            self.params.update(p)
+        else:
+            # The cached params are shared; give this request its own
+            # lists of repeated values, which the body may add to.
+            self.params.update(
+                {k: list(v) if type(v) is tuple else v for k, v in p.items()},
+            )
 
     def process_headers(self):
         """Parse HTTP header data into Python structures.
 
         (Core)
         """
-        # Process the headers into self.headers
+        # self.headers decodes each header the first time it is read;
+        # only Host is needed now.
         headers = self.headers
-        for name, value in self.header_list:
-            # Call title() now (and use dict.__method__(headers))
-            # so title doesn't have to be called twice.
-            name = name.title()
-            value = value.strip()
-
-            headers[name] = httputil.decode_TEXT_maybe(value)
-
-            # Some clients, notably Konquoror, supply multiple
-            # cookies on different lines with the same key. To
-            # handle this case, store all cookies in self.cookie.
-            if name == 'Cookie':
-                try:
-                    self.cookie.load(value)
-                except CookieError as exc:
-                    raise cherrypy.HTTPError(400, str(exc))
 
-        if not dict.__contains__(headers, 'Host'):
+        # Some clients, notably Konquoror, supply multiple
+        # cookies on different lines with the same key. To
+        # handle this case, store all cookies in self.cookie.
+        # Malformed cookies are a 400 here, but plain name=value
+        # pairs are only split up, and made into self.cookie when
+        # it is first read.
+        pairs = []
+        try:
+            for name, value in self.header_list:
+                if len(name) == 6 and name.title() == 'Cookie':
+                    split = httputil.split_cookie(value.strip())
+                    if split is None:
+                        # Not just name=value pairs; parse them all now.
+                        cookie = SimpleCookie()
+                        for hname, hvalue in self.header_list:
+                            if len(hname) == 6 and hname.title() == 'Cookie':
+                                httputil.load_cookie(cookie, hvalue.strip())
+                        self.cookie = cookie
+                        pairs = ()
+                        break
+                    pairs.extend(split)
+        except CookieError as exc:
+            raise cherrypy.HTTPError(400, str(exc))
+        if pairs:
+            self._cookie_pairs = pairs
+
+        host = headers.get('Host')
+        if host is None:
             # All Internet-based HTTP/1.1 servers MUST respond with a 400
             # (Bad Request) status code to any HTTP/1.1 request message
             # which lacks a Host header field.
@@ -806,9 +1085,10 @@ class Request(object):
                 msg = "HTTP/1.1 requires a 'Host' request header."
                 raise cherrypy.HTTPError(400, msg)
         else:
-            headers['Host'] = httputil.SanitizedHost(dict.get(headers, 'Host'))
+            # Replace the value in place, without building the whole map.
+            host = httputil.SanitizedHost(host)
+            dict.__setitem__(headers, 'Host', host)
 
-        host = dict.get(headers, 'Host')
         if not host:
             host = self.local.name or self.local.ip
         self.base = '%s://%s' % (self.scheme, host)
@@ -918,25 +1198,49 @@ class Response(object):
     stream = False
     """If False, buffer the response body."""
 
+    set_cookie_cache_size = 1000
+    """The number of distinct sets of cookie attributes (path, expiry,
+    flags...) whose encoding :meth:`finalize` keeps."""
+
+    _set_cookie_attrs = {}
+
     def __init__(self):
         """Intialize the HTTP response instance."""
+        self.headers = httputil.HeaderMap()
+        self.cookie = SimpleCookie()
+        self.reset()
+
+    def reset(self):
+        """Return this Response to the state a new one starts in.
+
+        Every instance attribute is dropped, except that the ``headers``
+        and ``cookie`` objects are emptied and kept, so that a released
+        Response may be reused (see :meth:`Request.reset`). Subclasses
+        which set attributes in ``__init__`` must override this to set
+        them again.
+        """
+        headers, cookie = self.headers, self.cookie
+        self.__dict__.clear()
+
         self.status = None
         self.header_list = None
         self._body = []
         self.time = time.time()
 
-        self.headers = httputil.HeaderMap()
+        dict.clear(headers)
         # Since we know all our keys are titled strings, we can
         # bypass HeaderMap.update and get a big speed boost.
         dict.update(
-            self.headers,
+            headers,
             {
                 'Content-Type': 'text/html',
                 'Server': 'CherryPy/' + cherrypy.__version__,
-                'Date': httputil.HTTPDate(self.time),
+                'Date': httputil.http_date(self.time),
             },
         )
-        self.cookie = SimpleCookie()
+        self.headers = headers
+        cookie.clear()
+        self.cookie = cookie
 
     def collapse_body(self):
         """Collapse self.body to a single string; replace it and return it."""
@@ -944,6 +1248,17 @@ class Response(object):
         self.body = new_body
         return new_body
 
+    def collect_body(self):
+        """Exhaust self.body into a list of chunks; replace it and return it.
+
+        Unlike :meth:`collapse_body`, this never joins the chunks, so a
+        large body made of several chunks is not copied into one.
+        """
+        body = self.body
+        if type(body) is not list:
+            body = self.body = list(body)
+        return body
+
     def _flush_body(self):
         """Exhaust the body iterator.
 
@@ -989,21 +1304,47 @@ class Response(object):
             # Responses which are not streamed should have a Content-Length,
             # but allow user code to set Content-Length if desired.
             if dict.get(headers, 'Content-Length') is None:
-                content = self.collapse_body()
-                dict.__setitem__(headers, 'Content-Length', len(content))
+                content_length = sum(
+                    chunk.nbytes if type(chunk) is memoryview else len(chunk)
+                    for chunk in self.collect_body()
+                )
+                dict.__setitem__(headers, 'Content-Length', content_length)
 
         # Transform our header dict into a list of tuples.
         self.header_list = h = headers.output()
 
-        cookie = self.cookie.output()
-        if cookie:
-            for line in cookie.split('\r\n'):
-                name, value = line.split(': ', 1)
-                if isinstance(name, str):
-                    name = name.encode('ISO-8859-1')
-                if isinstance(value, str):
-                    value = headers.encode(value)
-                h.append((name, value))
+        for name, morsel in sorted(self.cookie.items()):
+            h.append((b'Set-Cookie', self._encode_set_cookie(morsel)))
+
+    def _encode_set_cookie(self, morsel):
+        """Return the Set-Cookie header value for the given Morsel.
+
+        Everything after ``name=value`` is the same for every client
+        given the same attributes, as it is for session cookies, so it
+        is encoded once and reused (until the expiry date moves on).
+        """
+        prefix = '%s=%s' % (morsel.key, morsel.coded_value)
+        cache = self._set_cookie_attrs
+        try:
+            key = tuple(dict.items(morsel))
+            attrs = cache.get(key)
+        except TypeError:
+            # An unhashable attribute value; don't cache it.
+            key = attrs = None
+        if attrs is not None and prefix.isascii():
+            return prefix.encode('ascii') + attrs
+
+        line = morsel.OutputString()
+        # An int 'expires' is relative to now, so it never repeats.
+        if (
+            key is not None
+            and line.isascii()
+            and not isinstance(morsel['expires'], int)
+        ):
+            if len(cache) >= self.set_cookie_cache_size:
+                cache.clear()
+            cache[key] = line[len(prefix) :].encode('ascii')
+        return self.headers.encode(line)
 
 
 class LazyUUID4(object):
@@ -490,6 +490,10 @@ class Toolbox(object):
                     tool = getattr(self, name)
                     tool._setup()
 
+    def _plan(self, entries):
+        """Return a :class:`ToolPlan` for the given {'tool.arg': v} entries."""
+        return ToolPlan(self, entries)
+
     def register(self, point, **kwargs):
         """Register a hook point handler in the toolbox.
 
@@ -506,6 +510,125 @@ class Toolbox(object):
         return decorator
 
 
+_static_setups = (
+    Tool._setup,
+    HandlerTool._setup,
+    SessionTool._setup,
+    CachingTool._setup,
+)
+"""Tool setups which do nothing but attach hooks built from config."""
+
+
+class ToolPlan(object):
+    """The tools which one request config turns on, compiled once.
+
+    Running a Toolbox as a config namespace handler means splitting its
+    entries into ``request.toolmaps`` and calling ``_setup()`` on each
+    tool which is turned on, for every request. A ToolPlan does that
+    work once: for tools whose ``_setup`` is one of the builtin ones,
+    which only attach hooks, the hooks they attach are recorded and
+    merely inserted into ``request.hooks`` when the plan is applied.
+    Any other tool still has its ``_setup`` called for each request.
+
+    The ``toolmap`` of a plan is shared by every request it is applied
+    to, and must not be modified.
+    """
+
+    def __init__(self, toolbox, entries):
+        """Compile the plan in the context of the current request."""
+        self.toolbox = toolbox
+        self.namespace = toolbox.namespace
+
+        self.toolmap = map = {}
+        for k, v in entries.items():
+            toolname, arg = k.split('.', 1)
+            bucket = map.setdefault(toolname, {})
+            bucket[arg] = v
+
+        self.tools = []
+        """A list of (name, tool, hooks) for each tool which is on, where
+        hooks is a {hookpoint: (hook, ...)} map of what the tool attaches,
+        or None if the tool must be set up for each request."""
+
+        self.steps = []
+        """The {hookpoint: (hook, ...)} maps to merge into request.hooks,
+        and tools to set up, in order."""
+
+        request = cherrypy.serving.request
+        request.toolmaps[self.namespace] = map
+        hooks = request.hooks
+        try:
+            for name, settings in map.items():
+                if not settings.get('on', False):
+                    continue
+                tool = getattr(toolbox, name)
+                setup = getattr(type(tool), '_setup', None)
+                if setup not in _static_setups or (
+                    type(tool)._merged_args is not Tool._merged_args
+                ):
+                    self.tools.append((name, tool, None))
+                    self.steps.append(tool)
+                    continue
+
+                request.hooks = recorder = hooks.__class__(hooks)
+                tool._setup()
+                attached = dict((k, v) for k, v in recorder.items() if v)
+                self.tools.append((name, tool, attached))
+                if not self.steps or not isinstance(self.steps[-1], dict):
+                    self.steps.append(hooks.__class__(hooks))
+                group = self.steps[-1]
+                for point, chain in attached.items():
+                    for hook in chain:
+                        group.insert(point, hook)
+        finally:
+            request.hooks = hooks
+
+        for i, step in enumerate(self.steps):
+            if isinstance(step, dict):
+                self.steps[i] = dict((k, v) for k, v in step.items() if v)
+
+    def is_current(self):
+        """Return True if every planned tool is still in the toolbox."""
+        toolbox = self.toolbox
+        for name, tool, hooks in self.tools:
+            if getattr(toolbox, name, None) is not tool:
+                return False
+        return True
+
+    def apply(self, request):
+        """Set up the planned tools for the given request."""
+        request.toolmaps[self.namespace] = self.toolmap
+        for step in self.steps:
+            if isinstance(step, dict):
+                request.hooks.merge(step)
+            else:
+                step._setup()
+
+    def describe(self):
+        """Return a list of lines showing what this plan does."""
+        lines = []
+        for name, tool, hooks in self.tools:
+            args = dict(self.toolmap[name])
+            args.pop('on', None)
+            lines.append('%s.%s %r' % (self.namespace, name, args))
+            if hooks is None:
+                lines.append('    (set up for each request)')
+                continue
+            for point, chain in hooks.items():
+                for hook in chain:
+                    lines.append(
+                        '    %s [%s] %s'
+                        % (point, hook.priority, _callback_name(hook)),
+                    )
+        return lines
+
+
+def _callback_name(hook):
+    """Return a short name for the callback of the given Hook."""
+    callback = hook.callback
+    return getattr(callback, '__qualname__', None) or repr(callback)
+
+
 default_toolbox = _d = Toolbox('tools')
 _d.session_auth = SessionAuthTool(cptools.session_auth)
 _d.allow = Tool('on_start_resource', cptools.allow)
@@ -538,5 +661,6 @@ _d.json_out = Tool('before_handler', jsontools.json_out, priority=30)
 _d.auth_basic = Tool('before_handler', auth_basic.basic_auth, priority=1)
 _d.auth_digest = Tool('before_handler', auth_digest.digest_auth, priority=1)
 _d.params = Tool('before_handler', cptools.convert_params, priority=15)
+_d.stream_parts = Tool('before_request_body', cptools.stream_parts)
 
 del _d, cptools, encoding, static
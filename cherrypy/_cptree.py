@@ -1,12 +1,18 @@
 """CherryPy Application and Tree objects."""
 
 import os
+import threading
 
 import cherrypy
 from cherrypy import _cpconfig, _cplogging, _cprequest, _cpwsgi, tools
 from cherrypy.lib import httputil, reprconf
 
 
+def _resettable(cls, base):
+    """Return True if ``reset`` restores all that ``__init__`` sets up."""
+    return cls.__init__ is base.__init__ or cls.reset is not base.reset
+
+
 class Application(object):
     """A CherryPy Application.
 
@@ -51,12 +57,34 @@ class Application(object):
 
     relative_urls = False
 
+    serving_pool = False
+    """If True, reuse Request and Response objects rather than building new
+    ones for every request. Each thread keeps the pair it released last,
+    which :meth:`get_serving` resets (see :meth:`Request.reset
+    <cherrypy._cprequest.Request.reset>`) and hands out again. Only turn
+    this on if nothing holds on to ``cherrypy.request`` or
+    ``cherrypy.response`` after the request is over.
+
+    A ``request_class`` or ``response_class`` which overrides ``__init__``
+    is only reused if it overrides ``reset`` as well, to set up again
+    whatever its ``__init__`` does; otherwise it is not pooled."""
+
+    _generation = 0
+    """Incremented on every :meth:`merge`, so that anything derived from
+    ``self.config`` can tell when it has gone stale."""
+
+    find_config_cache_size = 1000
+    """The maximum number of (path, key) lookups :meth:`find_config` keeps."""
+
+    _config_index = None
+
     def __init__(self, root, script_name='', config=None):
         """Initialize Application with given root."""
         self.log = _cplogging.LogManager(id(self), cherrypy.log.logger_root)
         self.root = root
         self.script_name = script_name
         self.wsgiapp = _cpwsgi.CPWSGIApp(self)
+        self._pool = threading.local()
 
         self.namespaces = self.namespaces.copy()
         self.namespaces['log'] = lambda k, v: setattr(self.log, k, v)
@@ -128,18 +156,89 @@ class Application(object):
     def merge(self, config):
         """Merge the given config into self.config."""
         _cpconfig.merge(self.config, config)
+        self._generation += 1
+        self._config_index = None
 
         # Handle namespaces specified in config.
         self.namespaces(self.config.get('/', {}))
 
     def find_config(self, path, key, default=None):
-        """Return the most-specific value for key along path, or default."""
+        """Return the most-specific value for key along path, or default.
+
+        Lookups are answered from an index of which config sections
+        define each key, plus a bounded cache of the section found for
+        each (path, key) pair. Both are rebuilt after :meth:`merge`, and
+        when ``self.config`` is replaced or changed in place in a way
+        which changes the number of sections, or of keys in a section;
+        values changed in place are always read afresh.
+        """
+        config = self.config
+        index = self._config_index
+        if (
+            index is None
+            or index[0] is not config
+            or index[1] != self._config_sizes(config)
+        ):
+            index = self._index_config()
+        _, _, sections, found = index
+
+        defined_in = sections.get(key)
+        if defined_in is None:
+            return default
+        try:
+            if defined_in == ('/',) and (not path or path[:1] == '/'):
+                return config['/'][key]
+
+            try:
+                section = found[path, key]
+            except KeyError:
+                section = self._find_config_section(path, key)
+                if len(found) >= self.find_config_cache_size:
+                    found.clear()
+                found[path, key] = section
+
+            if section is None:
+                return default
+            return config[section][key]
+        except KeyError:
+            # A key was removed and another added in its place, which
+            # left the sizes of the sections as they were.
+            self._config_index = None
+            section = self._find_config_section(path, key)
+            if section is None:
+                return default
+            return config[section][key]
+
+    @staticmethod
+    def _config_sizes(config):
+        """Return the number of entries in each section of config."""
+        try:
+            return list(map(len, config.values()))
+        except TypeError:
+            # Not all sections; compare unequal, so as not to use an index.
+            return object()
+
+    def _index_config(self):
+        """Index which sections of self.config define which keys."""
+        config = self.config
+        sections = {}
+        for section, nodeconf in config.items():
+            if isinstance(nodeconf, dict):
+                for key in nodeconf:
+                    sections.setdefault(key, []).append(section)
+        sections = dict((k, tuple(v)) for k, v in sections.items())
+        index = config, self._config_sizes(config), sections, {}
+        self._config_index = index
+        return index
+
+    def _find_config_section(self, path, key):
+        """Return the most-specific section defining key along path."""
         trail = path or '/'
         while trail:
             nodeconf = self.config.get(trail, {})
 
             if key in nodeconf:
-                return nodeconf[key]
+                return trail
 
             lastslash = trail.rfind('/')
             if lastslash == -1:
@@ -149,17 +248,24 @@ class Application(object):
             else:
                 trail = trail[:lastslash]
 
-        return default
+        return None
 
     def get_serving(self, local, remote, scheme, sproto):
         """Create and return a Request and Response object."""
-        req = self.request_class(local, remote, scheme, sproto)
+        pooled = self.serving_pool and getattr(self._pool, 'serving', None)
+        if pooled:
+            self._pool.serving = None
+            req, resp = pooled
+            req.reset(local, remote, scheme, sproto)
+            resp.reset()
+        else:
+            req = self.request_class(local, remote, scheme, sproto)
+            resp = self.response_class()
         req.app = self
 
         for name, toolbox in self.toolboxes.items():
             req.namespaces[name] = toolbox
 
-        resp = self.response_class()
         cherrypy.serving.load(req, resp)
         cherrypy.engine.publish('acquire_thread')
         cherrypy.engine.publish('before_request')
@@ -168,7 +274,9 @@ class Application(object):
 
     def release_serving(self):
         """Release the current serving (request and response)."""
-        req = cherrypy.serving.request
+        state = cherrypy.serving.current()
+        req = state.request
+        resp = state.response
 
         cherrypy.engine.publish('after_request')
 
@@ -179,11 +287,88 @@ class Application(object):
 
         cherrypy.serving.clear()
 
+        if (
+            self.serving_pool
+            and req.app is self
+            and req.reusable
+            and type(req) is self.request_class
+            and type(resp) is self.response_class
+            and _resettable(self.request_class, _cprequest.Request)
+            and _resettable(self.response_class, _cprequest.Response)
+        ):
+            self._pool.serving = req, resp
+
     def __call__(self, environ, start_response):
         """Call a WSGI-callable."""
         return self.wsgiapp(environ, start_response)
 
 
+class _ScriptNameIndex(object):
+    """A trie of mounted script names, keyed by path segment."""
+
+    __slots__ = ('children', 'script_name')
+
+    def __init__(self):
+        self.children = {}
+        self.script_name = None
+
+    def add(self, script_name):
+        """Index the given script name."""
+        node = self
+        if script_name:
+            for segment in script_name.split('/'):
+                child = node.children.get(segment)
+                if child is None:
+                    child = node.children[segment] = _ScriptNameIndex()
+                node = child
+        node.script_name = script_name
+
+    def longest_prefix(self, path):
+        """Return the longest indexed script name which prefixes path.
+
+        Only whole segments are matched, so "/a" prefixes "/a/b" but
+        not "/ab". Return None if no script name matches.
+        """
+        found = self.script_name
+        node = self
+        for segment in path.split('/'):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.script_name is not None:
+                found = node.script_name
+        return found
+
+
+class _AppMap(dict):
+    """A {script name: application} dict with an index of script names.
+
+    The index is rebuilt whenever the dict changes, which happens
+    seldom (normally only in :meth:`Tree.mount` and :meth:`Tree.graft`),
+    and lets :meth:`Tree.script_name` find the app for a path in one
+    pass over its segments.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(_AppMap, self).__init__(*args, **kwargs)
+        self._reindex()
+
+    def _reindex(self):
+        index = _ScriptNameIndex()
+        for script_name in list(self):
+            index.add(script_name)
+        self._index = index
+
+    __setitem__ = httputil._reindexing('__setitem__')
+    __delitem__ = httputil._reindexing('__delitem__')
+    __ior__ = httputil._reindexing('__ior__')
+    clear = httputil._reindexing('clear')
+    pop = httputil._reindexing('pop')
+    popitem = httputil._reindexing('popitem')
+    setdefault = httputil._reindexing('setdefault')
+    update = httputil._reindexing('update')
+
+
 class Tree(object):
     """A registry of CherryPy applications, mounted at diverse points.
 
@@ -192,16 +377,33 @@ class Tree(object):
     apps.
     """
 
-    apps = {}
+    copy_environ = True
     """
-    A dict of the form {script name: application}, where "script name"
-    is a string declaring the URI mount point (no trailing slash), and
-    "application" is an instance of cherrypy.Application (or an arbitrary
-    WSGI callable if you happen to be using a WSGI server)."""
+    If True (the default), the WSGI environ is copied before SCRIPT_NAME
+    and PATH_INFO are corrected for the app being called. Set this to
+    False to correct them in place, saving a copy per request, if the
+    WSGI server does not reuse the environ after the app returns."""
 
-    def __init__(self):
+    def __init__(self, copy_environ=None):
         """Initialize registry Tree."""
         self.apps = {}
+        if copy_environ is not None:
+            self.copy_environ = copy_environ
+
+    @property
+    def apps(self):
+        """Map each mount point to the application mounted there.
+
+        A dict of the form {script name: application}, where "script name"
+        is a string declaring the URI mount point (no trailing slash), and
+        "application" is an instance of cherrypy.Application (or an
+        arbitrary WSGI callable if you happen to be using a WSGI server).
+        """
+        return self._apps
+
+    @apps.setter
+    def apps(self, apps):
+        self._apps = _AppMap(apps)
 
     def mount(self, root, script_name='', config=None):
         """Mount a new app from a root object, script_name, and config.
@@ -287,15 +489,7 @@ class Tree(object):
             except AttributeError:
                 return None
 
-        while True:
-            if path in self.apps:
-                return path
-
-            if path == '':
-                return None
-
-            # Move one node up the tree and try again.
-            path = path[: path.rfind('/')]
+        return self._apps._index.longest_prefix(path)
 
     def __call__(self, environ, start_response):
         """Pre-initialize WSGI env and call WSGI-callable."""
@@ -315,7 +509,8 @@ class Tree(object):
         app = self.apps[sn]
 
         # Correct the SCRIPT_NAME and PATH_INFO environ entries.
-        environ = environ.copy()
+        if self.copy_environ:
+            environ = environ.copy()
         environ['SCRIPT_NAME'] = sn
         environ['PATH_INFO'] = path[len(sn.rstrip('/')) :]
         return app(environ, start_response)
@@ -16,6 +16,9 @@ from cherrypy import _cperror
 from cherrypy.lib import httputil
 from cherrypy.lib import is_closable_iterator
 
+# Response body chunks which are passed to the server as bytes.
+_buffer_types = (bytearray, memoryview)
+
 
 def downgrade_wsgi_ux_to_1x(environ):
     """Return new environ dict for WSGI 1.x from provided WSGI u.x environ."""
@@ -65,14 +68,23 @@ class VirtualHost(object):
     request header will be used instead of the "Host" header. This
     is commonly added by HTTP servers (such as Apache) when proxying."""
 
-    domains = {}
-    """A dict of {host header value: application} pairs.
-    The incoming "Host" request header is looked up in this dict, and,
-    if a match is found, the corresponding WSGI application will be
-    called instead of the default. Note that you often need separate
-    entries for "example.com" and "www.example.com". In addition, "Host"
-    headers may contain the port number.
-    """
+    @property
+    def domains(self):
+        """A dict of {host header value: application} pairs.
+
+        The incoming "Host" request header is looked up in this dict, and,
+        if a match is found, the corresponding WSGI application will be
+        called instead of the default. Note that you often need separate
+        entries for "example.com" and "www.example.com". In addition,
+        "Host" headers may contain the port number. Keys may also be
+        wildcards such as "*.example.com"; see
+        :class:`cherrypy.lib.httputil.HostMap`.
+        """
+        return self._domains
+
+    @domains.setter
+    def domains(self, domains):
+        self._domains = httputil.HostMap(domains)
 
     def __init__(self, default, domains=None, use_x_forwarded_host=True):
         """
@@ -103,7 +115,7 @@ class VirtualHost(object):
         if self.use_x_forwarded_host:
             domain = environ.get('HTTP_X_FORWARDED_HOST', domain)
 
-        nextapp = self.domains.get(domain)
+        nextapp = self._domains.match(domain)
         if nextapp is None:
             nextapp = self.default
         return nextapp(environ, start_response)
@@ -300,7 +312,11 @@ class AppResponse(object):
 
     def __next__(self):
         """Iterate over the app response."""
-        return next(self.iter_response)
+        chunk = next(self.iter_response)
+        if type(chunk) is not bytes and isinstance(chunk, _buffer_types):
+            # WSGI servers only take bytes; copy this chunk, but only it.
+            chunk = bytes(chunk)
+        return chunk
 
     def close(self):
         """Close and de-reference the current request and response.
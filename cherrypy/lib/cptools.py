@@ -6,6 +6,7 @@ from hashlib import md5
 import urllib.parse
 
 import cherrypy
+from cherrypy import _cpreqbody
 from cherrypy._cpcompat import text_or_bytes
 from cherrypy.lib import httputil as _httputil
 from cherrypy.lib import is_iterator
@@ -51,8 +52,10 @@ def validate_etags(autotags=False, debug=False):
         if debug:
             cherrypy.log('Status not 200', 'TOOLS.ETAGS')
     else:
-        etag = response.collapse_body()
-        etag = '"%s"' % md5(etag).hexdigest()
+        etag = md5()
+        for chunk in response.collect_body():
+            etag.update(chunk)
+        etag = '"%s"' % etag.hexdigest()
         if debug:
             cherrypy.log('Setting ETag: %s' % etag, 'TOOLS.ETAGS')
         response.headers['ETag'] = etag
@@ -524,9 +527,7 @@ def log_hooks(debug=False):
 
     for k in points:
         msg.append('    %s:' % k)
-        v = request.hooks.get(k, [])
-        v.sort()
-        for h in v:
+        for h in sorted(request.hooks.get(k, ())):
             msg.append('        %r' % h)
     cherrypy.log(
         '\nRequest Hooks for ' + cherrypy.url() + ':\n' + '\n'.join(msg),
@@ -729,7 +730,79 @@ def convert_params(exception=ValueError, error=400):
     :type error: int
     """
     request = cherrypy.serving.request
-    types = request.handler.callable.__annotations__
+    callable = request.handler.callable
+    binder = cherrypy.dispatch.HandlerBinder.for_callable(callable)
+    if binder is None:
+        types = callable.__annotations__
+    else:
+        types = binder.converters
     with cherrypy.HTTPError.handle(exception, error):
         for key in set(types).intersection(request.params):
             request.params[key] = types[key](request.params[key])
+
+
+def _leave_parts_unread(entity):
+    """Leave a multipart entity for the page handler to read.
+
+    This is the body processor which ``tools.stream_parts`` puts in place
+    of the multipart ones, so that nothing is read before the handler
+    asks for it; :func:`_drain_parts` reads whatever it leaves.
+    """
+
+
+def _drain_parts():
+    """Read and discard whatever is left of a streamed request body.
+
+    Whether the page handler stopped iterating the parts early, or never
+    started, the rest of the body must be read before the response is
+    sent, so that the connection can be used for another request. A
+    streamed response may still read parts, so it is left until the end
+    of the request then. If the handler raises, the body is read before
+    the error response is sent instead.
+    """
+    if cherrypy.serving.response.stream:
+        cherrypy.serving.request.hooks.attach('on_end_request', _drain_body)
+    else:
+        _drain_body()
+
+
+def _drain_body():
+    fp = cherrypy.serving.request.body.fp
+    if not isinstance(fp, _cpreqbody.SizedReader):
+        # The body was never processed.
+        return
+    try:
+        while fp.read(fp.bufsize):
+            pass
+    except cherrypy.HTTPError:
+        # The body is too large; the server will close the connection.
+        pass
+
+
+def stream_parts(debug=False):
+    """Leave multipart request bodies for the page handler to read.
+
+    The parts are not read before the page handler is called, so they
+    are neither kept in memory nor spooled to temporary files. Instead,
+    the handler reads them in order from
+    :meth:`request.body.iter_parts() <cherrypy._cpreqbody.Entity.iter_parts>`,
+    each part body straight off the connection::
+
+        @cherrypy.expose
+        @cherrypy.tools.stream_parts()
+        def upload(self):
+            for part in cherrypy.request.body.iter_parts():
+                if part.filename:
+                    storage.save(part.filename, part.file)
+
+    Multipart form fields are not added to ``request.params``. Any
+    parts which the handler does not read are read and discarded once it
+    returns or raises.
+    """
+    request = cherrypy.serving.request
+    if debug:
+        cherrypy.log('Leaving multipart parts unread', 'TOOLS.STREAM_PARTS')
+    for content_type in ('multipart', 'multipart/form-data'):
+        request.body.processors[content_type] = _leave_parts_unread
+    request.hooks.attach('before_finalize', _drain_parts)
+    request.hooks.attach('after_error_response', _drain_body)
@@ -7,13 +7,18 @@ FuManChu will personally hang you up by your thumbs and submit you
 to a public caning.
 """
 
+import collections
 import functools
 import email.utils
 import re
 import builtins
+import threading
+import time
 from binascii import b2a_base64
 from email.header import decode_header
+from http.cookies import CookieError, Morsel
 from http.server import BaseHTTPRequestHandler
+from types import MappingProxyType
 from urllib.parse import unquote_plus
 
 import jaraco.collections
@@ -42,6 +47,27 @@ response_codes[503] = (
 
 HTTPDate = functools.partial(email.utils.formatdate, usegmt=True)
 
+_http_dates = {}
+
+
+def http_date(timeval=None):
+    """Return the given time (default now) as an HTTP date, like HTTPDate.
+
+    HTTP dates only go down to the second, so the dates of the last few
+    seconds asked for are kept, to be formatted once rather than for
+    every response.
+    """
+    if timeval is None:
+        timeval = time.time()
+    second = int(timeval // 1)
+    try:
+        return _http_dates[second]
+    except KeyError:
+        if len(_http_dates) >= 64:
+            _http_dates.clear()
+        date = _http_dates[second] = HTTPDate(second)
+        return date
+
 
 def urljoin(*atoms):
     r"""Return the given path \*atoms, joined into a single URL.
@@ -246,23 +272,44 @@ class AcceptElement(HeaderElement):
 RE_HEADER_SPLIT = re.compile(',(?=(?:[^"]*"[^"]*")*[^"]*$)')
 
 
+_parsed_elements = {}
+"""Parsed header values, as sorted (class, value, params) triples, by the
+(is-an-Accept-header, value) pairs they were parsed from."""
+
+header_elements_cache_size = 1000
+"""The most header values :func:`header_elements` keeps parsed."""
+
+
 def header_elements(fieldname, fieldvalue):
     """Return a sorted :class:`HeaderElement` list.
 
-    Constucted from a comma-separated header string.
+    Constucted from a comma-separated header string. The same values
+    come up over and over (Accept, Content-Type...), so each is parsed
+    once; fresh elements are returned every time, as callers may change
+    their params.
     """
     if not fieldvalue:
         return []
 
-    result = []
-    for element in RE_HEADER_SPLIT.split(fieldvalue):
-        if fieldname.startswith('Accept') or fieldname == 'TE':
-            hv = AcceptElement.from_str(element)
-        else:
-            hv = HeaderElement.from_str(element)
-        result.append(hv)
+    accept = fieldname.startswith('Accept') or fieldname == 'TE'
+    try:
+        parsed = _parsed_elements[accept, fieldvalue]
+    except KeyError:
+        result = []
+        for element in RE_HEADER_SPLIT.split(fieldvalue):
+            if accept:
+                hv = AcceptElement.from_str(element)
+            else:
+                hv = HeaderElement.from_str(element)
+            result.append(hv)
+        result = list(reversed(sorted(result)))
+
+        parsed = tuple((type(e), e.value, e.params) for e in result)
+        if len(_parsed_elements) >= header_elements_cache_size:
+            _parsed_elements.clear()
+        _parsed_elements[accept, fieldvalue] = parsed
 
-    return list(reversed(sorted(result)))
+    return [cls(value, dict(params)) for cls, value, params in parsed]
 
 
 def decode_TEXT(value):
@@ -285,6 +332,70 @@ def decode_TEXT_maybe(value):
     return decode_TEXT(value) if '=?' in value else value
 
 
+# The characters http.cookies accepts in unquoted cookie names and values
+# (less "$", which starts an attribute, in names).
+_cookie_name = re.compile(r"[\w!#%&'~`><@,:/*+\-.^|)(?}{]+", re.ASCII)
+_cookie_value = re.compile(r"[\w!#%&'~`><@,:/$*+\-.^|)(?}{=\[\]]*", re.ASCII)
+# The characters a Morsel allows in its key.
+_cookie_key = re.compile(r"[\w!#$%&'*+\-.^`|~:]+", re.ASCII)
+
+
+def split_cookie(value):
+    """Split the value of a Cookie request header into (name, value) pairs.
+
+    Only headers of plain ``name=value`` pairs, by far the most common
+    kind, are split up, much faster than ``SimpleCookie.load`` parses
+    them; None is returned for anything else (quoted values, attributes
+    and so on), which must be given to ``SimpleCookie.load``. CookieError
+    is raised for names a cookie may not have.
+    """
+    pairs = []
+    parts = value.split(';')
+    if not parts[-1].strip():
+        parts.pop()
+    for part in parts:
+        name, sep, val = part.partition('=')
+        name = name.strip()
+        val = val.strip()
+        if not (
+            sep
+            and _cookie_name.fullmatch(name)
+            and _cookie_value.fullmatch(val)
+            and name.lower() not in Morsel._reserved
+        ):
+            return None
+        if not _cookie_key.fullmatch(name):
+            raise CookieError('Illegal key %r' % (name,))
+        pairs.append((name, val))
+    return pairs
+
+
+def load_cookie_pairs(cookie, pairs):
+    """Load (name, value) pairs from split_cookie into a SimpleCookie."""
+    for name, val in pairs:
+        # As SimpleCookie.load would; unquoted values are not decoded.
+        morsel = cookie.get(name) or Morsel()
+        morsel.set(name, val, val)
+        dict.__setitem__(cookie, name, morsel)
+
+
+def load_cookie(cookie, value):
+    """Load the value of a Cookie request header into a SimpleCookie.
+
+    Plain ``name=value`` pairs are split up by :func:`split_cookie`;
+    anything else is passed to ``cookie.load``. Either way, CookieError
+    is raised for names a cookie may not have.
+    """
+    pairs = split_cookie(value)
+    if pairs is None:
+        cookie.load(value)
+    else:
+        load_cookie_pairs(cookie, pairs)
+
+
+_valid_statuses = {}
+
+
 def valid_status(status):
     """Return legal HTTP status Code, Reason-phrase and Message.
 
@@ -300,7 +411,25 @@ def valid_status(status):
     ...     int(http.client.ACCEPTED),
     ... ) + BaseHTTPRequestHandler.responses[http.client.ACCEPTED]
     True
+
+    Results are kept for each (hashable) status value.
     """
+    try:
+        return _valid_statuses[status]
+    except (KeyError, TypeError):
+        pass
+
+    result = _parse_status(status)
+    if len(_valid_statuses) < 256:
+        try:
+            _valid_statuses[status] = result
+        except TypeError:
+            pass
+    return result
+
+
+def _parse_status(status):
+    """Return (code, reason, message) for :func:`valid_status`."""
     if not status:
         status = 200
 
@@ -404,12 +533,144 @@ def parse_query_string(query_string, keep_blank_values=True, encoding='utf-8'):
     return pm
 
 
+class QueryStringCache(object):
+    """A bounded LRU cache of :func:`parse_query_string` results.
+
+    Set an instance as ``request.query_string_cache`` (globally, or for
+    an app or path) to parse each distinct query string only once::
+
+        cherrypy.config.update({
+            'request.query_string_cache': httputil.QueryStringCache(500),
+        })
+
+    The :attr:`hits` and :attr:`misses` counters tell how well it works.
+    """
+
+    hits = 0
+    """The number of query strings found in the cache."""
+
+    misses = 0
+    """The number of query strings parsed and added to the cache."""
+
+    def __init__(self, maxsize=1000):
+        """Initialize a cache of at most maxsize query strings."""
+        self.maxsize = maxsize
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse(self, query_string, encoding='utf-8'):
+        """Return the params of the given query string.
+
+        The result is a read-only mapping shared by all callers, so
+        repeated keys map to tuples of values rather than lists. It is
+        not cached if the query string cannot be decoded.
+        """
+        key = query_string, encoding
+        cache = self._cache
+        with self._lock:
+            params = cache.get(key)
+            if params is not None:
+                cache.move_to_end(key)
+                self.hits += 1
+                return params
+
+        params = parse_query_string(query_string, encoding=encoding)
+        for name, value in params.items():
+            if isinstance(value, list):
+                params[name] = tuple(value)
+        params = MappingProxyType(params)
+        with self._lock:
+            self.misses += 1
+            cache[key] = params
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+        return params
+
+    def clear(self):
+        """Discard all cached query strings, and reset the counters."""
+        with self._lock:
+            self._cache.clear()
+            self.hits = self.misses = 0
+
+
+# Header names common enough to be known in advance, in title case.
+_common_header_names = (
+    'Accept',
+    'Accept-Charset',
+    'Accept-Encoding',
+    'Accept-Language',
+    'Accept-Ranges',
+    'Age',
+    'Allow',
+    'Authorization',
+    'Cache-Control',
+    'Connection',
+    'Content-Disposition',
+    'Content-Encoding',
+    'Content-Language',
+    'Content-Length',
+    'Content-Location',
+    'Content-Range',
+    'Content-Type',
+    'Cookie',
+    'Date',
+    'Etag',
+    'Expect',
+    'Expires',
+    'Host',
+    'If-Match',
+    'If-Modified-Since',
+    'If-None-Match',
+    'If-Range',
+    'If-Unmodified-Since',
+    'Last-Modified',
+    'Location',
+    'Origin',
+    'Pragma',
+    'Range',
+    'Referer',
+    'Remote-Addr',
+    'Remote-Host',
+    'Server',
+    'Set-Cookie',
+    'Te',
+    'Transfer-Encoding',
+    'Upgrade',
+    'User-Agent',
+    'Vary',
+    'Www-Authenticate',
+    'X-Forwarded-For',
+    'X-Forwarded-Host',
+    'X-Forwarded-Proto',
+)
+
+
 class CaseInsensitiveDict(jaraco.collections.KeyTransformingDict):
     """A case-insensitive dict subclass.
 
-    Each key is changed on entry to title case.
+    Each key is changed on entry to title case. The title-cased form of
+    each key is remembered in a dict shared by the class (which starts
+    out with the common HTTP header names in title and lower case), so
+    most lookups cost a dict lookup instead of a call to
+    :meth:`transform_key`. Subclasses which override ``transform_key``
+    get a dict of their own.
     """
 
+    key_cache_size = 1000
+    """The most keys to remember the title-cased form of."""
+
+    _keys = dict(
+        (key, name)
+        for name in _common_header_names
+        for key in (name, name.lower(), name.upper())
+    )
+
+    def __init_subclass__(cls, **kwargs):
+        """Give subclasses with their own transform_key their own cache."""
+        super(CaseInsensitiveDict, cls).__init_subclass__(**kwargs)
+        if 'transform_key' in cls.__dict__:
+            cls._keys = {}
+
     @staticmethod
     def transform_key(key):
         """Title-case an HTTP header name."""
@@ -418,6 +679,56 @@ class CaseInsensitiveDict(jaraco.collections.KeyTransformingDict):
             return 'None'
         return key.title()
 
+    def _new_key(self, key):
+        """Transform the given key, and remember it if there is room."""
+        transformed = self.transform_key(key)
+        if len(self._keys) < self.key_cache_size:
+            self._keys[key] = transformed
+        return transformed
+
+    def __setitem__(self, key, value):
+        """Set the value for the given key, in any case."""
+        dict.__setitem__(
+            self, self._keys.get(key) or self._new_key(key), value
+        )
+
+    def __getitem__(self, key):
+        """Return the value for the given key, in any case."""
+        return dict.__getitem__(
+            self, self._keys.get(key) or self._new_key(key)
+        )
+
+    def __contains__(self, key):
+        """Return True if the given key, in any case, is present."""
+        return dict.__contains__(
+            self,
+            self._keys.get(key) or self._new_key(key),
+        )
+
+    def __delitem__(self, key):
+        """Remove the given key, in any case."""
+        dict.__delitem__(self, self._keys.get(key) or self._new_key(key))
+
+    def get(self, key, default=None):
+        """Return the value for the given key, in any case, or default."""
+        return dict.get(
+            self,
+            self._keys.get(key) or self._new_key(key),
+            default,
+        )
+
+    def setdefault(self, key, default=None):
+        """Return the value for the given key, setting it if missing."""
+        return dict.setdefault(
+            self,
+            self._keys.get(key) or self._new_key(key),
+            default,
+        )
+
+    def pop(self, key, *args):
+        """Remove the given key, in any case, and return its value."""
+        return dict.pop(self, self._keys.get(key) or self._new_key(key), *args)
+
 
 #   TEXT = <any OCTET except CTLs, but including LWS>
 #
@@ -453,9 +764,41 @@ class HeaderMap(CaseInsensitiveDict):
     # ISO-8859-1 only when encoded according to the rules of RFC 2047."
     use_rfc_2047 = True
 
+    repeated_headers = frozenset(
+        (
+            'Accept-Ranges',
+            'Allow',
+            'Cache-Control',
+            'Connection',
+            'Content-Encoding',
+            'Content-Language',
+            'Content-Type',
+            'Date',
+            'Expires',
+            'Last-Modified',
+            'Pragma',
+            'Server',
+            'Vary',
+        ),
+    )
+    """The headers whose values are the same for many responses (such as
+    the Content-Type, Server and Date every response starts out with),
+    and so are worth keeping encoded."""
+
+    _encoded_names = {}
+    _encoded_values = {}
+
+    def __init_subclass__(cls, **kwargs):
+        """Give subclasses which encode differently their own caches."""
+        super(HeaderMap, cls).__init_subclass__(**kwargs)
+        if 'encode' in cls.__dict__ or 'encode_header_item' in cls.__dict__:
+            cls._encoded_names = {}
+            cls._encoded_values = {}
+
     def elements(self, key):
         """Return a sorted list of HeaderElements for the given header."""
-        return header_elements(self.transform_key(key), self.get(key))
+        key = self._keys.get(key) or self._new_key(key)
+        return header_elements(key, self.get(key))
 
     def values(self, key):
         """Return a sorted list of HeaderElement.value for the given header."""
@@ -470,13 +813,38 @@ class HeaderMap(CaseInsensitiveDict):
         """Emit tuples of wire-ready HTTP headers.
 
         Prepare the sequence of name, value tuples into a form suitable for
-        transmitting on the wire for HTTP.
+        transmitting on the wire for HTTP. The encoded form of each ASCII
+        header name is kept, so names are only encoded once, and so are
+        ASCII values of the :attr:`repeated_headers`.
         """
+        names = cls._encoded_names
+        values = cls._encoded_values
+        repeated = cls.repeated_headers
         for k, v in header_items:
             if not isinstance(v, str) and not isinstance(v, bytes):
                 v = str(v)
 
-            yield tuple(map(cls.encode_header_item, (k, v)))
+            name = names.get(k)
+            if name is None:
+                name = cls.encode_header_item(k)
+                if (
+                    isinstance(k, str)
+                    and k.isascii()
+                    and len(names) < cls.key_cache_size
+                ):
+                    names[k] = name
+
+            if k in repeated and isinstance(v, str):
+                value = values.get(v)
+                if value is None:
+                    value = cls.encode_header_item(v)
+                    if v.isascii():
+                        if len(values) >= cls.key_cache_size:
+                            values.clear()
+                        values[v] = value
+            else:
+                value = cls.encode_header_item(v)
+            yield name, value
 
     @classmethod
     def encode_header_item(cls, item):
@@ -515,6 +883,103 @@ class HeaderMap(CaseInsensitiveDict):
         )
 
 
+def _materializing(name):
+    """Return a HeaderMap method which first builds a LazyHeaderMap."""
+    method = getattr(HeaderMap, name)
+
+    def materialize_first(self, *args, **kwargs):
+        if self._raw is not None:
+            self._materialize()
+        return method(self, *args, **kwargs)
+
+    materialize_first.__name__ = name
+    materialize_first.__doc__ = method.__doc__
+    return materialize_first
+
+
+class LazyHeaderMap(HeaderMap):
+    """A HeaderMap of request headers, built from them as it is read.
+
+    The map starts out empty, over the list of raw (name, value) pairs
+    received. Looking a header up by name title-cases, strips and
+    decodes (:rfc:`2047`) only the header asked for; anything which
+    needs the whole map, such as iterating over it, taking its length
+    or writing to it, builds all of it first, in the order received.
+    As with ``HeaderMap``, the last of several headers of the same name
+    wins. Code which reads the map with ``dict`` methods directly must
+    look each key up the ordinary way first.
+    """
+
+    _raw = None
+    """The raw (name, value) pairs, until the whole map has been built."""
+
+    def __init__(self, header_list=()):
+        """Initialize the map over a list of raw (name, value) pairs."""
+        super(LazyHeaderMap, self).__init__()
+        self._raw = header_list
+
+    def _find(self, key):
+        """Load the given (title-cased) header from the raw list."""
+        size = len(key)
+        value = None
+        for name, raw in self._raw:
+            if len(name) == size and name.title() == key:
+                value = raw
+        if value is not None:
+            dict.__setitem__(self, key, decode_TEXT_maybe(value.strip()))
+
+    def _materialize(self):
+        """Load every raw header, keeping the values loaded so far."""
+        loaded = dict(dict.items(self))
+        raw, self._raw = self._raw, None
+        for name, value in raw:
+            dict.__setitem__(
+                self,
+                name.title(),
+                decode_TEXT_maybe(value.strip()),
+            )
+        dict.update(self, loaded)
+
+    def _resolve(self, key):
+        key = self._keys.get(key) or self._new_key(key)
+        if self._raw is not None and not dict.__contains__(self, key):
+            self._find(key)
+        return key
+
+    def __getitem__(self, key):
+        """Return the value of the given header."""
+        return dict.__getitem__(self, self._resolve(key))
+
+    def __contains__(self, key):
+        """Return True if the given header was received."""
+        return dict.__contains__(self, self._resolve(key))
+
+    def get(self, key, default=None):
+        """Return the value of the given header, or default."""
+        return dict.get(self, self._resolve(key), default)
+
+    __iter__ = _materializing('__iter__')
+    __len__ = _materializing('__len__')
+    __repr__ = _materializing('__repr__')
+    __eq__ = _materializing('__eq__')
+    __ne__ = _materializing('__ne__')
+    __reversed__ = _materializing('__reversed__')
+    __or__ = _materializing('__or__')
+    __ior__ = _materializing('__ior__')
+    __setitem__ = _materializing('__setitem__')
+    __delitem__ = _materializing('__delitem__')
+    clear = _materializing('clear')
+    copy = _materializing('copy')
+    items = _materializing('items')
+    keys = _materializing('keys')
+    output = _materializing('output')
+    pop = _materializing('pop')
+    popitem = _materializing('popitem')
+    setdefault = _materializing('setdefault')
+    update = _materializing('update')
+    __hash__ = None
+
+
 class Host(object):
     """An internet address.
 
@@ -573,3 +1038,127 @@ class SanitizedHost(str):
     def _sanitize(cls, raw):
         """Clean up the CR LF chars from input."""
         return cls.dangerous.sub('', raw)
+
+
+_no_host_match = object()
+
+
+def _split_host(host):
+    """Return the normalized (name, port) of a Host header value.
+
+    The name is lowercased and loses any trailing dot; the port is ''
+    if none was given.
+    """
+    host = host.lower()
+    name, port = host, ''
+    if not host.endswith(']'):
+        head, sep, tail = host.rpartition(':')
+        if sep:
+            name, port = head, tail
+    return name.rstrip('.'), port
+
+
+def _reindexing(name):
+    """Return a dict mutator which also calls ``self._reindex()``."""
+    method = getattr(dict, name)
+
+    def mutate(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self._reindex()
+
+    mutate.__name__ = name
+    mutate.__doc__ = method.__doc__
+    return mutate
+
+
+class HostMap(dict):
+    """A dict of {host: target} pairs which matches Host header values.
+
+    Keys may be exact host names such as ``'www.example.com'``, which
+    may include a port (``'www.example.com:8080'``), or wildcards such
+    as ``'*.example.com'``, which match any subdomain of example.com
+    (but not example.com itself) and may also include a port. Matching
+    ignores case and a trailing dot, and the most specific wildcard
+    wins. The special key ``'*'`` matches any host not matched
+    otherwise.
+
+    Wildcards are indexed by their reversed labels, so a lookup costs
+    one step per label of the Host value rather than one per key, and
+    the result is cached per Host value (up to :attr:`cache_size`
+    distinct values) since the same few hosts are looked up over and
+    over again.
+    """
+
+    cache_size = 1024
+    """The maximum number of distinct Host values to cache matches for."""
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the map and index its keys."""
+        super(HostMap, self).__init__(*args, **kwargs)
+        self._reindex()
+
+    def _reindex(self):
+        exact = {}
+        wildcards = {}
+        for key, target in self.items():
+            if key == '*':
+                continue
+            name, port = _split_host(key)
+            if not name.startswith('*.'):
+                exact.setdefault((name, port), target)
+                continue
+            node = wildcards.setdefault(port, {})
+            for label in reversed(name[2:].split('.')):
+                node = node.setdefault(label, {})
+            node[None] = target
+        self._exact = exact
+        self._wildcards = wildcards
+        self._cache = {}
+
+    def match(self, host, default=None):
+        """Return the target for the given Host value, or default."""
+        try:
+            found = self._cache[host]
+        except KeyError:
+            found = self._match(host)
+            cache = self._cache
+            if len(cache) >= self.cache_size:
+                cache.clear()
+            cache[host] = found
+        if found is _no_host_match:
+            return default
+        return found
+
+    def _match(self, host):
+        if dict.__contains__(self, host):
+            return dict.__getitem__(self, host)
+
+        name, port = _split_host(host)
+        found = self._exact.get((name, port), _no_host_match)
+        if found is not _no_host_match:
+            return found
+
+        node = self._wildcards.get(port)
+        if node is not None:
+            labels = name.split('.')
+            # A wildcard must match at least one more label.
+            for label in reversed(labels[1:]):
+                node = node.get(label)
+                if node is None:
+                    break
+                found = node.get(None, found)
+
+        if found is _no_host_match:
+            found = self.get('*', _no_host_match)
+        return found
+
+    __setitem__ = _reindexing('__setitem__')
+    __delitem__ = _reindexing('__delitem__')
+    __ior__ = _reindexing('__ior__')
+    clear = _reindexing('clear')
+    pop = _reindexing('pop')
+    popitem = _reindexing('popitem')
+    setdefault = _reindexing('setdefault')
+    update = _reindexing('update')
@@ -52,44 +52,52 @@ class NamespaceSet(dict):
         {'tools.gzip.on': v} will call the 'tools' namespace handler
         with the args: ('gzip.on', v)
         """
-        # Separate the given config into namespaces
+        ns_confs = self._split(config)
+        for ns, handler in self.items():
+            self._call_handler(handler, ns_confs.get(ns, {}))
+
+    @staticmethod
+    def _split(config):
+        """Separate the given config into {namespace: {name: value}}."""
         ns_confs = {}
         for k in config:
             if '.' in k:
                 ns, name = k.split('.', 1)
                 bucket = ns_confs.setdefault(ns, {})
                 bucket[name] = config[k]
+        return ns_confs
 
+    @staticmethod
+    def _call_handler(handler, entries):
+        """Pass each of the given {name: value} entries to handler."""
         # I chose __enter__ and __exit__ so someday this could be
         # rewritten using 'with' statement:
-        # for ns, handler in self.items():
-        #     with handler as callable:
-        #         for k, v in ns_confs.get(ns, {}).items():
-        #             callable(k, v)
-        for ns, handler in self.items():
-            exit = getattr(handler, '__exit__', None)
-            if exit:
-                callable = handler.__enter__()
-                no_exc = True
+        # with handler as callable:
+        #     for k, v in entries.items():
+        #         callable(k, v)
+        exit = getattr(handler, '__exit__', None)
+        if exit:
+            callable = handler.__enter__()
+            no_exc = True
+            try:
                 try:
-                    try:
-                        for k, v in ns_confs.get(ns, {}).items():
-                            callable(k, v)
-                    except Exception:
-                        # The exceptional case is handled here
-                        no_exc = False
-                        if exit is None:
-                            raise
-                        if not exit(*sys.exc_info()):
-                            raise
-                        # The exception is swallowed if exit() returns true
-                finally:
-                    # The normal and non-local-goto cases are handled here
-                    if no_exc and exit:
-                        exit(None, None, None)
-            else:
-                for k, v in ns_confs.get(ns, {}).items():
-                    handler(k, v)
+                    for k, v in entries.items():
+                        callable(k, v)
+                except Exception:
+                    # The exceptional case is handled here
+                    no_exc = False
+                    if exit is None:
+                        raise
+                    if not exit(*sys.exc_info()):
+                        raise
+                    # The exception is swallowed if exit() returns true
+            finally:
+                # The normal and non-local-goto cases are handled here
+                if no_exc and exit:
+                    exit(None, None, None)
+        else:
+            for k, v in entries.items():
+                handler(k, v)
 
     def __repr__(self):
         """Render representation of a :class:`NamespaceSet` instance."""
@@ -759,7 +759,7 @@ def save():
         # If the body is not being streamed, we save the data now
         # (so we can release the lock).
         if is_iterator(response.body):
-            response.collapse_body()
+            response.collect_body()
         cherrypy.session.save()
 
 
@@ -982,7 +982,7 @@ def _add_MSIE_max_age_workaround(cookie, timeout):
     the browser. So we have to use the old "expires" ... sigh ...
     """
     expires = time.time() + timeout * 60
-    cookie['expires'] = httputil.HTTPDate(expires)
+    cookie['expires'] = httputil.http_date(expires)
 
 
 def expire():
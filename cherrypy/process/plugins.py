@@ -1,5 +1,9 @@
 """Site services for use with a Web Site Process Bus."""
 
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
 import os
 import re
 import signal as _signal
@@ -815,3 +819,106 @@ class ThreadManager(SimplePlugin):
         self.threads.clear()
 
     graceful = stop
+
+
+def _settle(future, task):
+    """Copy the outcome of an asyncio task to a concurrent future."""
+    if task.cancelled():
+        # asyncio.CancelledError is a BaseException; hand the waiting
+        # thread the ordinary Exception instead.
+        future.set_exception(concurrent.futures.CancelledError())
+    elif task.exception() is not None:
+        future.set_exception(task.exception())
+    else:
+        future.set_result(task.result())
+
+
+class EventLoop(SimplePlugin):
+    """WSPBus plugin which runs coroutines on a shared asyncio event loop.
+
+    The loop runs in its own thread, which is started the first time a
+    coroutine is run and stopped when the bus stops; any tasks still
+    pending then are cancelled. CherryPy uses this to run page handlers
+    defined with ``async def``.
+    """
+
+    loop = None
+    """The running :class:`asyncio.AbstractEventLoop`, or None."""
+
+    thread = None
+    """The thread running :attr:`loop`, or None."""
+
+    def __init__(self, bus):
+        """Initialize the event loop plugin."""
+        SimplePlugin.__init__(self, bus)
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # Called with self._lock held.
+        loop = asyncio.new_event_loop()
+        thread = threading.Thread(
+            target=loop.run_forever,
+            name='CPEventLoop',
+            daemon=True,
+        )
+        thread.start()
+        self.loop, self.thread = loop, thread
+        self.bus.log('Started asyncio event loop.')
+        return loop
+
+    def run(self, coro):
+        """Run the given coroutine on the loop and return its result.
+
+        The calling thread blocks until the coroutine is done. The
+        coroutine runs in a copy of the caller's context, so context
+        variables (including the objects behind ``cherrypy.request``
+        and ``cherrypy.response``) are those of the caller. If the loop
+        is stopped before the coroutine could start, it is never run and
+        :class:`concurrent.futures.CancelledError` is raised.
+        """
+        if threading.current_thread() is self.thread:
+            coro.close()
+            raise RuntimeError(
+                'Coroutines cannot be run from the event loop thread.',
+            )
+        future = concurrent.futures.Future()
+
+        def begin():
+            # If stop() has begun, its tasks have been (or are being)
+            # collected to be cancelled; don't start another.
+            if self.loop is not loop:
+                future.cancel()
+            if future.set_running_or_notify_cancel():
+                task = loop.create_task(coro)
+                task.add_done_callback(functools.partial(_settle, future))
+            else:
+                coro.close()
+
+        with self._lock:
+            loop = self.loop or self._start()
+            loop.call_soon_threadsafe(
+                begin,
+                context=contextvars.copy_context(),
+            )
+        return future.result()
+
+    def stop(self):
+        """Stop the event loop and its thread."""
+        with self._lock:
+            loop, thread = self.loop, self.thread
+            self.loop = self.thread = None
+        if loop is None:
+            return
+
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        pending = asyncio.all_tasks(loop)
+        for task in pending:
+            task.cancel()
+        if pending:
+            loop.run_until_complete(
+                asyncio.gather(*pending, return_exceptions=True),
+            )
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.close()
+        self.bus.log('Stopped asyncio event loop.')
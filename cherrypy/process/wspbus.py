@@ -70,7 +70,6 @@ except ImportError:
     """
     ctypes = None
 
-import operator
 import os
 import sys
 import threading
@@ -181,6 +180,7 @@ class Bus(object):
         channels = 'start', 'stop', 'exit', 'graceful', 'log', 'main'
         self.listeners = dict((channel, set()) for channel in channels)
         self._priorities = {}
+        self._ordered = {}
 
     def subscribe(self, channel, callback=None, priority=None):
         """Add the given callback at the given channel (if not present).
@@ -201,6 +201,7 @@ class Bus(object):
         if priority is None:
             priority = getattr(callback, 'priority', 50)
         self._priorities[(channel, callback)] = priority
+        self._ordered.pop(channel, None)
 
     def unsubscribe(self, channel, callback):
         """Discard the given callback (if present)."""
@@ -208,21 +209,44 @@ class Bus(object):
         if listeners and callback in listeners:
             listeners.discard(callback)
             del self._priorities[(channel, callback)]
+            self._ordered.pop(channel, None)
+
+    def _listeners_for(self, channel):
+        """Return the listeners for the given channel in priority order.
+
+        The sorted tuple is cached until the channel is subscribed to or
+        unsubscribed from (or its set of listeners is replaced), so the
+        channels published for every request do not sort each time.
+        """
+        listeners = self.listeners[channel]
+        cached = self._ordered.get(channel)
+        if (
+            cached is not None
+            and cached[1] is listeners
+            and cached[2] == len(listeners)
+        ):
+            return cached[0]
+
+        priorities = self._priorities
+        ordered = tuple(
+            sorted(
+                listeners,
+                key=lambda listener: priorities[(channel, listener)],
+            ),
+        )
+        self._ordered[channel] = ordered, listeners, len(listeners)
+        return ordered
 
     def publish(self, channel, *args, **kwargs):
         """Return output of all subscribers for the given channel."""
         if channel not in self.listeners:
             return []
 
-        exc = ChannelFailures()
+        # Most channels published per request have a single listener, so
+        # ChannelFailures is only created once one of them has failed.
+        exc = None
         output = []
-
-        raw_items = (
-            (self._priorities[(channel, listener)], listener)
-            for listener in self.listeners[channel]
-        )
-        items = sorted(raw_items, key=operator.itemgetter(0))
-        for priority, listener in items:
+        for listener in self._listeners_for(channel):
             try:
                 output.append(listener(*args, **kwargs))
             except KeyboardInterrupt:
@@ -234,6 +258,8 @@ class Bus(object):
                     e.code = 1
                 raise
             except Exception:
+                if exc is None:
+                    exc = ChannelFailures()
                 exc.handle_exception()
                 if channel == 'log':
                     # Assume any further messages to 'log' will fail.
@@ -0,0 +1,148 @@
+"""Compare the lookup speed of CherryPy's builtin dispatchers.
+
+Usage:
+    python -m cherrypy.test.benchmark_dispatch [routes ...]
+
+For each number of routes given (10, 1000 and 10000 by default), an
+application with that many parameterized URLs of the form
+``/section<N>/items/<id>`` is built for ``Dispatcher``,
+``RoutesDispatcher`` (skipped if the Routes package is not installed)
+and ``RadixDispatcher``, and the average time each takes to dispatch a
+request is printed. No server is started; each dispatcher is called
+directly, as ``Request.get_resource`` would call it.
+"""
+
+import importlib
+import sys
+import timeit
+
+import cherrypy
+from cherrypy import _cprequest
+from cherrypy.lib import httputil
+
+
+__all__ = ['run']
+
+DEFAULT_COUNTS = (10, 1000, 10000)
+LOOKUPS = 2000
+
+
+class Items:
+    """A controller shared by all the routes."""
+
+    @cherrypy.expose
+    def show(self, id):
+        """Return the item id."""
+        return id
+
+
+class Section:
+    """One /section<N> branch of the object tree."""
+
+    def __init__(self, items):
+        """Attach the shared controller."""
+        self.items = items
+
+
+def make_tree(count):
+    """Build a tree of ``count`` sections for ``Dispatcher``."""
+
+    class Root:
+        pass
+
+    root = Root()
+    items = Items()
+    items.default = items.show
+    for n in range(count):
+        setattr(root, 'section%d' % n, Section(items))
+    return root, cherrypy.dispatch.Dispatcher()
+
+
+def make_routes(count):
+    """Connect ``count`` routes to a ``RoutesDispatcher``."""
+    d = cherrypy.dispatch.RoutesDispatcher()
+    items = Items()
+    for n in range(count):
+        d.connect(
+            'section%d' % n,
+            '/section%d/items/:id' % n,
+            controller=items,
+            action='show',
+        )
+    return None, d
+
+
+def make_radix(count):
+    """Connect ``count`` routes to a ``RadixDispatcher``."""
+    d = cherrypy.dispatch.RadixDispatcher()
+    items = Items()
+    for n in range(count):
+        d.connect(
+            'section%d' % n,
+            '/section%d/items/{id:int}' % n,
+            items,
+            action='show',
+        )
+    return None, d
+
+
+def available():
+    """Return the (name, factory) pairs which can run here."""
+    factories = [('Dispatcher', make_tree)]
+    try:
+        importlib.import_module('routes')
+    except ImportError:
+        print('Routes is not installed; skipping RoutesDispatcher.')
+    else:
+        factories.append(('RoutesDispatcher', make_routes))
+    factories.append(('RadixDispatcher', make_radix))
+    return factories
+
+
+def time_dispatch(factory, count, lookups=LOOKUPS):
+    """Return the mean seconds per request for one dispatcher."""
+    root, dispatcher = factory(count)
+    app = cherrypy.Application(root, '')
+    app.merge({'/': {'request.dispatch': dispatcher}})
+
+    request = _cprequest.Request(
+        httputil.Host('127.0.0.1', 80),
+        httputil.Host('127.0.0.1', 1111),
+    )
+    request.app = app
+    request.method = 'GET'
+    request.headers = httputil.HeaderMap({'Host': 'localhost'})
+    cherrypy.serving.load(request, _cprequest.Response())
+
+    # Spread the lookups over the routes, in no particular order.
+    paths = [
+        '/section%d/items/%d' % (i * 7919 % count, i) for i in range(lookups)
+    ]
+
+    def run_lookups():
+        for path in paths:
+            request.params = {}
+            dispatcher(path)
+            if isinstance(request.handler, cherrypy.HTTPError):
+                raise AssertionError(
+                    '%s did not match %s' % (dispatcher, path),
+                )
+
+    run_lookups()
+    return min(timeit.repeat(run_lookups, number=1, repeat=3)) / lookups
+
+
+def run(counts=DEFAULT_COUNTS):
+    """Print a table of dispatch timings for the given route counts."""
+    cherrypy.config.update({'environment': 'embedded'})
+    factories = available()
+    print('%8s  ' % 'routes' + ''.join('%18s' % n for n, _ in factories))
+    for count in counts:
+        row = [time_dispatch(factory, count) for _, factory in factories]
+        print(
+            '%8d  ' % count + ''.join('%15.1f us' % (t * 1e6) for t in row),
+        )
+
+
+if __name__ == '__main__':
+    run([int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS)
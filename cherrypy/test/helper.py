@@ -145,6 +145,21 @@ class LocalWSGISupervisor(LocalSupervisor):
         return app
 
 
+class AsyncioServerSupervisor(LocalWSGISupervisor):
+    """Server supervisor for the asyncio HTTP server."""
+
+    httpserver_class = 'cherrypy._cpasyncio_server.AsyncioHTTPServer'
+
+    def __init__(self, **kwargs):
+        """Initialize the supervisor and select the asyncio server."""
+        super(AsyncioServerSupervisor, self).__init__(**kwargs)
+        cherrypy.server.instance = self.httpserver_class
+
+    def __str__(self):
+        """Render a :class:`AsyncioServerSupervisor` instance as a string."""
+        return 'Asyncio HTTP Server on %s:%s' % (self.host, self.port)
+
+
 def get_cpmodpy_supervisor(**options):
     """Load a CherryPy ``mod_python`` supervisor."""
     from cherrypy.test import modpy
@@ -201,6 +216,7 @@ class CPWebCase(webtest.WebCase):
         'wsgi': LocalWSGISupervisor,
         'wsgi_u': get_wsgi_u_supervisor,
         'native': NativeServerSupervisor,
+        'asyncio': AsyncioServerSupervisor,
         'cpmodpy': get_cpmodpy_supervisor,
         'modpygw': get_modpygw_supervisor,
         'modwsgi': get_modwsgi_supervisor,
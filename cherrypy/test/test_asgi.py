@@ -0,0 +1,150 @@
+"""Tests for the ASGI adapter, driven by a minimal in-process server."""
+
+import asyncio
+
+import pytest
+
+import cherrypy
+from cherrypy import _cptree
+
+
+def call_asgi(app, path, method='GET', query_string=b'', headers=(), body=()):
+    """Run one HTTP request through an ASGI app and return its messages.
+
+    The request body is given to the app in the chunks listed in body.
+    """
+    incoming = [
+        {'type': 'http.request', 'body': chunk, 'more_body': True}
+        for chunk in body
+    ]
+    incoming.append({'type': 'http.request', 'body': b'', 'more_body': False})
+    messages = []
+
+    async def receive():
+        await asyncio.sleep(0)
+        if incoming:
+            return incoming.pop(0)
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        await asyncio.sleep(0)
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': method,
+        'scheme': 'http',
+        'path': path,
+        'query_string': query_string,
+        'root_path': '',
+        'headers': [(b'host', b'example.com')] + list(headers),
+        'client': ('127.0.0.1', 54321),
+        'server': ('127.0.0.1', 8000),
+    }
+    asyncio.run(app(scope, receive, send))
+    return messages
+
+
+@pytest.fixture
+def app():
+    """Make an ASGI app serving a test tree, and shut its pool down."""
+
+    class Root:
+        @cherrypy.expose
+        def index(self, name='world'):
+            return 'hello %s from %s' % (
+                name,
+                cherrypy.request.headers['Host'],
+            )
+
+        @cherrypy.expose
+        def echo(self, text):
+            return '%s %s' % (cherrypy.request.method, text)
+
+        @cherrypy.expose
+        @cherrypy.config(**{'response.stream': True})
+        def stream(self):
+            def chunks():
+                for n in range(3):
+                    yield ('%s%d;' % (cherrypy.request.path_info, n)).encode()
+
+            return chunks()
+
+    tree = _cptree.Tree()
+    tree.mount(Root(), '/app', {'/': {'log.screen': False}})
+    asgi_app = cherrypy.asgi.ASGIApp(tree, max_workers=2)
+    yield asgi_app
+    asgi_app.executor.shutdown(wait=True)
+
+
+@pytest.fixture
+def engine():
+    """Run the engine, as the ASGI lifespan startup would, sans server."""
+    cherrypy.server.unsubscribe()
+    cherrypy.engine.start()
+    yield cherrypy.engine
+    cherrypy.engine.stop()
+    cherrypy.server.subscribe()
+
+
+def test_asgi_requests(engine, app):
+    start, body, end = call_asgi(app, '/app/', query_string=b'name=asgi')
+    assert start['type'] == 'http.response.start'
+    assert start['status'] == 200
+    assert (b'Content-Length', b'27') in start['headers']
+    assert body['body'] == b'hello asgi from example.com'
+    assert end == {
+        'type': 'http.response.body',
+        'body': b'',
+        'more_body': False,
+    }
+
+    messages = call_asgi(
+        app,
+        '/app/echo',
+        method='POST',
+        headers=[
+            (b'content-type', b'application/x-www-form-urlencoded'),
+            (b'content-length', b'15'),
+        ],
+        body=[b'text=spl', b'it+body'],
+    )
+    assert messages[1]['body'] == b'POST split body'
+
+    messages = call_asgi(app, '/app/stream')
+    assert [m['body'] for m in messages[1:]] == [
+        b'/stream0;',
+        b'/stream1;',
+        b'/stream2;',
+        b'',
+    ]
+
+    messages = call_asgi(app, '/elsewhere')
+    assert messages[0]['status'] == 404
+
+
+def test_receive_stream_reads_in_pieces():
+    """The body is read across messages, in pieces of any size."""
+    incoming = [
+        {'type': 'http.request', 'body': b'abcde', 'more_body': True},
+        {'type': 'http.request', 'body': b'', 'more_body': True},
+        {'type': 'http.request', 'body': b'fgh', 'more_body': False},
+    ]
+
+    async def receive():
+        await asyncio.sleep(0)
+        return incoming.pop(0)
+
+    async def read_all():
+        loop = asyncio.get_running_loop()
+        stream = cherrypy.asgi._ReceiveStream(loop, receive)
+        pieces = []
+        while True:
+            piece = await loop.run_in_executor(None, stream.read, 2)
+            if not piece:
+                return pieces
+            pieces.append(piece)
+
+    assert asyncio.run(read_all()) == [b'ab', b'cd', b'e', b'fg', b'h']
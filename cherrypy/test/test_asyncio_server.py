@@ -0,0 +1,195 @@
+"""Tests for the asyncio HTTP server."""
+
+import socket
+import time
+
+import cherrypy
+from cherrypy._cpasyncio_server import AsyncioHTTPServer
+from cherrypy.test import helper
+
+
+class AsyncioServerTest(helper.CPWebCase):
+    @staticmethod
+    def setup_server():
+        class Root:
+            @cherrypy.expose
+            def index(self):
+                return 'Hello from HTTP/%d.%d' % cherrypy.request.protocol
+
+            @cherrypy.expose
+            def echo(self):
+                return cherrypy.request.body.read()
+
+            @cherrypy.expose
+            @cherrypy.config(**{'response.stream': True})
+            def stream(self):
+                def chunks():
+                    for n in range(3):
+                        yield b'chunk%d;' % n
+
+                return chunks()
+
+        cherrypy.config.update(
+            {
+                'server.instance': (
+                    'cherrypy._cpasyncio_server.AsyncioHTTPServer'
+                ),
+                'server.max_request_body_size': 1000,
+                'server.socket_timeout': 1,
+            },
+        )
+        cherrypy.tree.mount(Root())
+
+    @classmethod
+    def teardown_class(cls):
+        super(AsyncioServerTest, cls).teardown_class()
+        cherrypy.server.instance = None
+
+    def test_server_instance(self):
+        self.assertTrue(
+            isinstance(cherrypy.server.httpserver, AsyncioHTTPServer),
+        )
+        self.getPage('/')
+        self.assertStatus(200)
+        self.assertBody('Hello from HTTP/1.1')
+
+    def test_keep_alive(self):
+        self.persistent = True
+        try:
+            for _ in range(3):
+                self.getPage('/')
+                self.assertStatus(200)
+                self.assertNoHeader('Connection')
+            self.getPage('/', headers=[('Connection', 'close')])
+            self.assertStatus(200)
+            self.assertHeader('Connection', 'close')
+        finally:
+            self.persistent = False
+
+    def test_http10(self):
+        self.getPage('/', protocol='HTTP/1.0')
+        self.assertStatus(200)
+        self.assertBody('Hello from HTTP/1.0')
+
+    def test_request_body(self):
+        body = b'x' * 500
+        self.getPage(
+            '/echo',
+            method='POST',
+            headers=[
+                ('Content-Type', 'text/plain'),
+                ('Content-Length', str(len(body))),
+            ],
+            body=body,
+        )
+        self.assertStatus(200)
+        self.assertBody(body)
+
+        body = b'x' * 1001
+        self.getPage(
+            '/echo',
+            method='POST',
+            headers=[
+                ('Content-Type', 'text/plain'),
+                ('Content-Length', str(len(body))),
+            ],
+            body=body,
+        )
+        self.assertStatus(413)
+
+    def test_chunked_request_body(self):
+        self.getPage(
+            '/echo',
+            method='POST',
+            headers=[
+                ('Content-Type', 'text/plain'),
+                ('Transfer-Encoding', 'chunked'),
+            ],
+            body=b'5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n',
+        )
+        self.assertStatus(200)
+        self.assertBody(b'hello world')
+
+    def test_large_body_refused_unread(self):
+        # The Content-Length is checked before any of the body is sent.
+        with socket.create_connection((self.HOST, self.PORT)) as sock:
+            sock.settimeout(5)
+            sock.sendall(
+                b'POST /echo HTTP/1.1\r\n'
+                b'Host: localhost\r\n'
+                b'Content-Type: text/plain\r\n'
+                b'Content-Length: 100000\r\n'
+                b'Expect: 100-continue\r\n\r\n',
+            )
+            response = sock.makefile('rb').read()
+        self.assertTrue(
+            response.startswith(b'HTTP/1.1 413 Request Entity Too Large'),
+        )
+
+    def test_large_chunked_body(self):
+        chunk = b'x' * 400
+        body = b'%x\r\n%s\r\n' % (len(chunk), chunk) * 3 + b'0\r\n\r\n'
+        self.getPage(
+            '/echo',
+            method='POST',
+            headers=[
+                ('Content-Type', 'text/plain'),
+                ('Transfer-Encoding', 'chunked'),
+            ],
+            body=body,
+        )
+        self.assertStatus(413)
+
+    def test_continue(self):
+        with socket.create_connection((self.HOST, self.PORT)) as sock:
+            sock.settimeout(5)
+            sock.sendall(
+                b'POST /echo HTTP/1.1\r\n'
+                b'Host: localhost\r\n'
+                b'Content-Type: text/plain\r\n'
+                b'Content-Length: 5\r\n'
+                b'Connection: close\r\n'
+                b'Expect: 100-continue\r\n\r\n',
+            )
+            rfile = sock.makefile('rb')
+            self.assertEqual(rfile.readline(), b'HTTP/1.1 100 Continue\r\n')
+            self.assertEqual(rfile.readline(), b'\r\n')
+            sock.sendall(b'hello')
+            response = rfile.read()
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK'))
+        self.assertTrue(response.endswith(b'\r\n\r\nhello'))
+
+    def test_chunked_response(self):
+        self.getPage('/stream')
+        self.assertStatus(200)
+        self.assertHeader('Transfer-Encoding', 'chunked')
+        self.assertBody(b'chunk0;chunk1;chunk2;')
+
+    def test_bad_request_line(self):
+        with socket.create_connection((self.HOST, self.PORT)) as sock:
+            sock.sendall(b'GET /\r\n\r\n')
+            response = sock.makefile('rb').read()
+        self.assertTrue(response.startswith(b'HTTP/1.1 400 Bad Request'))
+
+    def test_slow_request_body(self):
+        # The timeout applies to each read, not to the whole body.
+        with socket.create_connection((self.HOST, self.PORT)) as sock:
+            sock.sendall(
+                b'POST /echo HTTP/1.1\r\n'
+                b'Host: localhost\r\n'
+                b'Content-Type: text/plain\r\n'
+                b'Content-Length: 6\r\n'
+                b'Connection: close\r\n\r\n',
+            )
+            for piece in (b'sl', b'ow', b'ly'):
+                time.sleep(0.6)
+                sock.sendall(piece)
+            response = sock.makefile('rb').read()
+        self.assertTrue(response.startswith(b'HTTP/1.1 200 OK'))
+        self.assertTrue(response.endswith(b'\r\n\r\nslowly'))
+
+    def test_stalled_request(self):
+        with socket.create_connection((self.HOST, self.PORT)) as sock:
+            sock.sendall(b'GET / HTTP/1.1\r\nHost: local')
+            response = sock.makefile('rb').read()
+        self.assertTrue(response.startswith(b'HTTP/1.1 408 Request Timeout'))
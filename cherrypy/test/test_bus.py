@@ -104,6 +104,34 @@ def test_custom_channels(bus, listener):
     assert listener.responses == expected
 
 
+def test_listener_order_is_cached(bus):
+    """Test that the sorted listeners follow (un)subscriptions."""
+    calls = []
+
+    def first():
+        calls.append('first')
+
+    def second():
+        calls.append('second')
+
+    bus.subscribe('ch', second, priority=60)
+    assert bus.publish('ch') == [None]
+    ordered = bus._listeners_for('ch')
+    assert bus._listeners_for('ch') is ordered
+
+    bus.subscribe('ch', first, priority=40)
+    bus.publish('ch')
+    assert calls == ['second', 'first', 'second']
+
+    bus.subscribe('ch', second, priority=30)
+    bus.unsubscribe('ch', first)
+    bus.publish('ch')
+    assert calls[3:] == ['second']
+
+    bus.listeners['ch'] = set()
+    assert bus.publish('ch') == []
+
+
 def test_listener_errors(bus, listener):
     """Test that unhandled exceptions raise channel failures."""
     expected = []
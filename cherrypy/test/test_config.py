@@ -300,3 +300,47 @@ class CallablesInConfigTest(unittest.TestCase):
         self.assertEqual(cherrypy.config['my']['value']['foo'], 'buzz')
         self.assertEqual(cherrypy.config['my']['value'], test_dict)
         del cherrypy._test_dict
+
+
+class FindConfigTest(unittest.TestCase):
+    def test_most_specific_section_wins(self):
+        app = cherrypy.Application(None)
+        app.merge(
+            {
+                '/': {'a': 'root', 'b': 'root'},
+                '/x': {'b': 'x'},
+                '/x/y/': {'b': 'y/'},
+            },
+        )
+        for _ in range(2):
+            self.assertEqual(app.find_config('/x/y/z', 'a'), 'root')
+            self.assertEqual(app.find_config('', 'a'), 'root')
+            self.assertEqual(app.find_config('/x/y/z', 'b'), 'x')
+            self.assertEqual(app.find_config('/x/y/', 'b'), 'y/')
+            self.assertEqual(app.find_config('/xy', 'b'), 'root')
+            self.assertEqual(app.find_config('/x', 'c', 'none'), 'none')
+
+        app.merge({'/x/y': {'b': 'y', 'c': 'y'}})
+        self.assertEqual(app.find_config('/x/y/z', 'b'), 'y')
+        self.assertEqual(app.find_config('/x/y/z', 'c'), 'y')
+        self.assertEqual(app.find_config('/x', 'c'), None)
+
+    def test_changed_in_place(self):
+        tree = cherrypy._cptree.Tree()
+        app = tree.mount(None, '/app', {'/': {'a': 'root'}, '/x': {}})
+        self.assertEqual(app.find_config('/x/y', 'a'), 'root')
+        self.assertEqual(app.find_config('/x/y', 'b', 'none'), 'none')
+
+        app.config['/']['a'] = 'changed'
+        app.config['/']['b'] = 'root'
+        self.assertEqual(app.find_config('/x/y', 'a'), 'changed')
+        self.assertEqual(app.find_config('/x/y', 'b'), 'root')
+
+        app.config['/x']['a'] = 'x'
+        app.config['/x/y'] = {'b': 'y'}
+        self.assertEqual(app.find_config('/x/y', 'a'), 'x')
+        self.assertEqual(app.find_config('/x/y', 'b'), 'y')
+
+        del app.config['/x']['a']
+        app.config['/x']['c'] = 'x'
+        self.assertEqual(app.find_config('/x/y', 'a'), 'changed')
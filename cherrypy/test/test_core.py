@@ -1,8 +1,10 @@
 # coding: utf-8
 """Basic tests for the CherryPy core: request handling."""
 
+import asyncio
 import os
 import sys
+import threading
 import types
 
 import cherrypy
@@ -251,6 +253,13 @@ class CoreRequestHandlingTest(helper.CPWebCase):
                 for chunk in self.as_yield():
                     yield chunk
 
+            def as_buffers(self):
+                return [
+                    b'con',
+                    bytearray(b'te'),
+                    memoryview(b'\0\0n\0t\0').cast('H')[1:],
+                ]
+
         class Ranges(Test):
             def get_ranges(self, bytes):
                 return repr(httputil.get_ranges('bytes=%s' % bytes, 8))
@@ -561,6 +570,10 @@ class CoreRequestHandlingTest(helper.CPWebCase):
             self.getPage(url)
             self.assertBody('content')
 
+        self.getPage('/flatten/as_buffers')
+        self.assertBody('conten\0t\0')
+        self.assertHeader('Content-Length', '9')
+
     def testRanges(self):
         self.getPage('/ranges/get_ranges?bytes=3-6')
         self.assertBody('[(3, 7)]')
@@ -665,6 +678,10 @@ class CoreRequestHandlingTest(helper.CPWebCase):
         )
         self.assertStatus(400)
 
+        # Even where the handler never reads its cookies.
+        self.getPage('/', [('Cookie', 'Something-With,Comma=some-value')])
+        self.assertStatus(400)
+
     def testDefaultContentType(self):
         self.getPage('/')
         self.assertHeader('Content-Type', 'text/html;charset=utf-8')
@@ -852,6 +869,64 @@ class ErrorTests(helper.CPWebCase):
         )
 
 
+class CoroutineHandlerTest(helper.CPWebCase):
+    @staticmethod
+    def setup_server():
+        async def path_after(delay):
+            await asyncio.sleep(delay)
+            return cherrypy.request.path_info
+
+        class Root:
+            @cherrypy.expose
+            async def index(self, name='world'):
+                await asyncio.sleep(0)
+                return 'hello %s' % name
+
+            @cherrypy.expose
+            async def gather(self):
+                paths = await asyncio.gather(
+                    path_after(0.01),
+                    path_after(0),
+                )
+                return ','.join(paths)
+
+            @cherrypy.expose
+            @cherrypy.tools.json_out()
+            @cherrypy.config(
+                **{
+                    'tools.response_headers.on': True,
+                    'tools.response_headers.headers': [('X-Async', 'yes')],
+                },
+            )
+            async def data(self):
+                await asyncio.sleep(0)
+                return {'thread': threading.current_thread().name}
+
+            @cherrypy.expose
+            async def missing(self):
+                await asyncio.sleep(0)
+                raise cherrypy.NotFound()
+
+        cherrypy.tree.mount(Root())
+
+    def test_coroutine_handlers(self):
+        self.getPage('/?name=async')
+        self.assertBody('hello async')
+
+        self.getPage('/gather')
+        self.assertBody('/gather,/gather')
+
+        self.getPage('/data')
+        self.assertHeader('X-Async', 'yes')
+        self.assertBody('{"thread": "CPEventLoop"}')
+
+        self.getPage('/missing')
+        self.assertStatus(404)
+
+        self.getPage('/index/a/b')
+        self.assertStatus(404)
+
+
 class TestBinding:
     def test_bind_ephemeral_port(self):
         """
@@ -2,6 +2,7 @@
 
 import pytest
 import http.client
+from http.cookies import CookieError, SimpleCookie
 
 from cherrypy.lib import httputil
 
@@ -80,3 +81,193 @@ def test_invalid_status(status_code, error_msg):
     """Check that invalid status cause certain errors."""
     with pytest.raises(ValueError, match=error_msg):
         httputil.valid_status(status_code)
+
+
+@pytest.mark.parametrize(
+    'host,expected',
+    [
+        ('www.example.com', 'exact'),
+        ('WWW.Example.com.', 'exact'),
+        ('www.example.com:8080', 'port'),
+        ('shop.example.com', 'wild'),
+        ('a.shop.example.com', 'wilder'),
+        ('b.a.shop.example.com', 'wilder'),
+        ('shop.example.com:8080', 'wild-port'),
+        ('example.com', 'fallback'),
+        ('example.org', 'fallback'),
+        ('[::1]:8080', 'ipv6'),
+    ],
+)
+def test_host_map(host, expected):
+    """Check exact, wildcard and fallback Host matching."""
+    hosts = httputil.HostMap(
+        {
+            'www.example.com': 'exact',
+            'www.example.com:8080': 'port',
+            '*.example.com': 'wild',
+            '*.shop.example.com': 'wilder',
+            '*.example.com:8080': 'wild-port',
+            '[::1]:8080': 'ipv6',
+            '*': 'fallback',
+        },
+    )
+    assert hosts.match(host) == expected
+    # A second lookup is served from the cache.
+    assert hosts.match(host) == expected
+
+
+def test_host_map_reindexes():
+    """Changing a HostMap drops cached matches."""
+    hosts = httputil.HostMap({'*.example.com': 'wild'})
+    assert hosts.match('a.example.com') == 'wild'
+    assert hosts.match('example.com', 'none') == 'none'
+    hosts['a.example.com'] = 'exact'
+    assert hosts.match('a.example.com') == 'exact'
+    del hosts['*.example.com']
+    assert hosts.match('b.example.com') is None
+
+
+def test_lazy_header_map():
+    """Headers are decoded as they are read, and all of them on demand."""
+    raw = [
+        ('content-TYPE', ' text/plain '),
+        ('X-Subject', '=?utf-8?q?f=C3=BCr?='),
+        ('Accept', 'text/html'),
+        ('ACCEPT', 'text/*'),
+    ]
+    headers = httputil.LazyHeaderMap(raw)
+    assert headers['Content-Type'] == 'text/plain'
+    assert dict.__len__(headers) == 1
+    assert 'x-subject' in headers
+    assert headers.get('Missing') is None
+    assert headers.elements('Accept')[0].value == 'text/*'
+    assert dict.__len__(headers) == 3
+
+    dict.__setitem__(headers, 'Accept', 'text/plain')
+    assert list(headers.items()) == [
+        ('Content-Type', 'text/plain'),
+        ('X-Subject', 'f\xfcr'),
+        ('Accept', 'text/plain'),
+    ]
+    headers['Accept'] = '*/*'
+    assert headers == {
+        'Content-Type': 'text/plain',
+        'X-Subject': 'f\xfcr',
+        'Accept': '*/*',
+    }
+
+
+@pytest.mark.parametrize(
+    'value',
+    (
+        '',
+        'a=1',
+        'a=1; b=2;',
+        'a = 1 ;b=x=y',
+        'a=/x,y(z)',
+        'a=1;;b=2',
+        'a="quoted value"; b=2',
+        '$Version=1; a=1; $Path=/',
+        'a=1; Path=/; Secure',
+        'a',
+        'a=b c',
+    ),
+)
+def test_load_cookie(value):
+    """load_cookie loads a Cookie header as SimpleCookie.load does."""
+    expected = SimpleCookie()
+    expected.load(value)
+    cookie = SimpleCookie()
+    httputil.load_cookie(cookie, value)
+    assert cookie.output() == expected.output()
+    assert [(m.key, m.value, m.coded_value) for m in cookie.values()] == [
+        (m.key, m.value, m.coded_value) for m in expected.values()
+    ]
+
+
+def test_split_cookie_illegal_key():
+    """split_cookie rejects the names SimpleCookie.load rejects."""
+    with pytest.raises(CookieError):
+        SimpleCookie().load('a,b=1')
+    with pytest.raises(CookieError):
+        httputil.split_cookie('ok=1; a,b=1')
+
+
+def test_header_map_keys():
+    """Keys are title-cased however they are looked up."""
+    headers = httputil.HeaderMap()
+    headers['content-TYPE'] = 'text/plain'
+    headers['X-NEW-header'] = '1'
+    assert headers['CONTENT-TYPE'] == headers.get('content-type')
+    assert 'x-new-HEADER' in headers
+    assert list(headers) == ['Content-Type', 'X-New-Header']
+    assert headers.pop('x-new-header') == '1'
+    assert headers.setdefault('vary', 'Accept') == 'Accept'
+    del headers['VARY']
+    assert headers.output() == [(b'Content-Type', b'text/plain')]
+
+    class UpperMap(httputil.CaseInsensitiveDict):
+        @staticmethod
+        def transform_key(key):
+            return key.upper()
+
+    upper = UpperMap({'content-type': 'text/plain'})
+    assert list(upper) == ['CONTENT-TYPE']
+    assert httputil.HeaderMap({'content-type': 'x'}).keys() == {'Content-Type'}
+
+
+def test_header_elements_are_fresh():
+    """Parsed header values are cached, but not the elements themselves."""
+    headers = httputil.HeaderMap({'Content-Type': 'text/plain;charset=utf-8'})
+    first = headers.elements('Content-Type')[0]
+    first.params['charset'] = 'latin-1'
+    second = headers.elements('content-type')[0]
+    assert second is not first
+    assert second.params == {'charset': 'utf-8'}
+    assert str(second) == 'text/plain;charset=utf-8'
+
+
+def test_http_date():
+    """Cached dates match freshly formatted ones."""
+    for timeval in (0, 1.999, 784111777, 784111777.5):
+        expected = httputil.HTTPDate(timeval)
+        assert httputil.http_date(timeval) == expected
+        assert httputil.http_date(timeval) == expected
+
+
+def test_repeated_header_encoding():
+    """Encoded values of repeated headers are reused, but stay correct."""
+    headers = httputil.HeaderMap(
+        {'Server': 'CherryPy', 'Date': 'Sun, 06 Nov 1994 08:49:37 GMT'},
+    )
+    headers['X-Name'] = '舀'
+    for x in range(2):
+        assert headers.output() == [
+            (b'Server', b'CherryPy'),
+            (b'Date', b'Sun, 06 Nov 1994 08:49:37 GMT'),
+            (b'X-Name', b'=?utf-8?b?6IiA?='),
+        ]
+
+
+def test_query_string_cache():
+    """Parsed query strings are shared, read-only and evicted LRU."""
+    cache = httputil.QueryStringCache(maxsize=2)
+    params = cache.parse('a=1&a=2&b=%C3%A9')
+    assert params == {'a': ('1', '2'), 'b': '\xe9'}
+    with pytest.raises(TypeError):
+        params['c'] = '3'
+    assert cache.parse('a=1&a=2&b=%C3%A9') is params
+    assert cache.parse('a=1&a=2&b=%C3%A9', 'latin-1') == {
+        'a': ('1', '2'),
+        'b': '\xc3\xa9',
+    }
+    assert (cache.hits, cache.misses) == (1, 2)
+
+    cache.parse('x=1')
+    assert cache.parse('a=1&a=2&b=%C3%A9') is not params
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    with pytest.raises(UnicodeDecodeError):
+        cache.parse('b=%E9')
+    cache.clear()
+    assert (cache.hits, cache.misses) == (0, 0)
@@ -1,11 +1,21 @@
 """Tests for various MIME issues, including the safe_multipart Tool."""
 
+import hashlib
+import io
+import os
+import pathlib
+import tempfile
+import time
+
 import cherrypy
+from cherrypy import _cpreqbody
 from cherrypy._cpcompat import ntou
 from cherrypy.test import helper
 
 
 def setup_server():
+    spool_dir = tempfile.mkdtemp()
+
     class Root:
         @cherrypy.expose
         def multipart(self, parts):
@@ -23,6 +33,80 @@ def setup_server():
                 Filedata.file.read(),
             )
 
+        @cherrypy.expose
+        def upload(self, data, note):
+            content = data.file.read()
+            return '%s: %d bytes, sha256 %s' % (
+                note,
+                len(content),
+                hashlib.sha256(content).hexdigest(),
+            )
+
+        @cherrypy.expose
+        @cherrypy.tools.stream_parts()
+        def stream_parts(self, **kwargs):
+            summary = ['params: %s' % ', '.join(sorted(kwargs))]
+            for part in cherrypy.request.body.iter_parts():
+                if part.name == 'skipped':
+                    continue
+                if part.name == 'head':
+                    content = part.file.readline()
+                else:
+                    content = part.file.read()
+                summary.append('%s: %r' % (part.name, content[:20]))
+            return '\n'.join(summary)
+
+        def record_unread():
+            fp = cherrypy.request.body.fp
+            Root.unread.append(fp.length - fp.bytes_read)
+
+        @cherrypy.expose
+        @cherrypy.tools.stream_parts()
+        @cherrypy.config(
+            **{
+                'hooks.on_end_request': cherrypy._cprequest.Hook(
+                    record_unread,
+                    priority=90,
+                ),
+            },
+        )
+        def stream_first(self, **kwargs):
+            for part in cherrypy.request.body.iter_parts():
+                return part.file.read(5)
+            return 'no parts'
+
+        @cherrypy.expose
+        @cherrypy.tools.stream_parts()
+        @cherrypy.config(
+            **{
+                'hooks.on_end_request': cherrypy._cprequest.Hook(
+                    record_unread,
+                    priority=90,
+                ),
+            },
+        )
+        def stream_error(self, **kwargs):
+            for part in cherrypy.request.body.iter_parts():
+                raise ValueError(part.file.read(5))
+            return 'no parts'
+
+        @cherrypy.expose
+        @cherrypy.config(
+            **{
+                'request.body.spool_dir': spool_dir,
+                'request.body.spool_factory': _cpreqbody.named_spool_file,
+                'request.body.part_maxrambytes': 0,
+            },
+        )
+        def keep(self, data, note):
+            if os.path.dirname(data.file.name) != spool_dir:
+                raise ValueError('Not spooled in %r' % spool_dir)
+            pathlib.Path(data.file.name).rename(os.path.join(spool_dir, note))
+            return note
+
+    Root.spool_dir = spool_dir
+    Root.unread = []
+
     cherrypy.config.update({'server.max_request_body_size': 0})
     cherrypy.tree.mount(Root())
 
@@ -105,6 +189,181 @@ This is the <strong>HTML</strong> version
             repr([('baz', [ntou('111'), ntou('333')]), ('foo', ntou('bar'))]),
         )
 
+    def test_large_upload(self):
+        # Larger than Part.bufsize, with few line breaks, and with lines
+        # which look like (but are not) the boundary.
+        filedata = b''.join(
+            [
+                bytes(range(256)) * 300,
+                b'\r\n--Xfoo\r\n--X \tnot the end\n',
+                bytes(range(255, -1, -1)) * 300,
+                b'\r\n-',
+            ],
+        )
+        body = b''.join(
+            [
+                b'--X\r\n',
+                b'Content-Disposition: form-data; name="data"; '
+                b'filename="data.bin"\r\n',
+                b'Content-Type: application/octet-stream\r\n',
+                b'\r\n',
+                filedata,
+                b'\r\n--X\r\n',
+                b'Content-Disposition: form-data; name="note"\r\n',
+                b'\r\n',
+                b'spreadsheet\n',
+                b'--X--\r\n',
+            ],
+        )
+        self.getPage(
+            '/upload',
+            method='POST',
+            headers=[
+                ('Content-Type', 'multipart/form-data; boundary=X'),
+                ('Content-Length', str(len(body))),
+            ],
+            body=body,
+        )
+        self.assertStatus(200)
+        self.assertBody(
+            'spreadsheet: %d bytes, sha256 %s'
+            % (len(filedata), hashlib.sha256(filedata).hexdigest()),
+        )
+
+    def test_stream_parts(self):
+        body = b'\r\n'.join(
+            [
+                b'preamble',
+                b'--X',
+                b'Content-Disposition: form-data; name="skipped"',
+                b'',
+                b'y' * 100000,
+                b'--X',
+                b'Content-Disposition: form-data; name="head"; '
+                b'filename="big.txt"',
+                b'',
+                b'first line\r\nsecond line\r\n' + b'z' * 100000,
+                b'--X',
+                b'Content-Disposition: form-data; name="empty"',
+                b'',
+                b'',
+                b'--X',
+                b'Content-Disposition: form-data; name="last"',
+                b'',
+                b'the end',
+                b'--X--',
+                b'',
+            ],
+        )
+        self.getPage(
+            '/stream_parts?query=1',
+            method='POST',
+            headers=[
+                ('Content-Type', 'multipart/form-data; boundary=X'),
+                ('Content-Length', str(len(body))),
+            ],
+            body=body,
+        )
+        self.assertStatus(200)
+        self.assertBody(
+            '\n'.join(
+                [
+                    'params: query',
+                    "head: b'first line\\r\\n'",
+                    "empty: b''",
+                    "last: b'the end'",
+                ],
+            ),
+        )
+
+    def test_stream_parts_drained(self):
+        self._test_stream_parts_drained('/stream_first', 200, 'first')
+
+    def test_stream_parts_drained_on_error(self):
+        self._test_stream_parts_drained('/stream_error', 500)
+
+    def _test_stream_parts_drained(self, url, status, content=None):
+        body = b'\r\n'.join(
+            [
+                b'--X',
+                b'Content-Disposition: form-data; name="first"',
+                b'',
+                b'first' + b'x' * 100000,
+                b'--X',
+                b'Content-Disposition: form-data; name="second"',
+                b'',
+                b'y' * 100000,
+                b'--X--',
+                b'',
+            ],
+        )
+        unread = cherrypy.tree.apps[''].root.unread
+        del unread[:]
+        self.persistent = True
+        try:
+            for _ in range(2):
+                self.getPage(
+                    url,
+                    method='POST',
+                    headers=[
+                        ('Content-Type', 'multipart/form-data; boundary=X'),
+                        ('Content-Length', str(len(body))),
+                    ],
+                    body=body,
+                )
+                self.assertStatus(status)
+                if content is not None:
+                    self.assertBody(content)
+        finally:
+            self.persistent = False
+
+        for _ in range(50):
+            if len(unread) == 2:
+                break
+            time.sleep(0.1)
+        self.assertEqual(unread, [0, 0])
+
+    def test_named_spool_file(self):
+        spool_dir = cherrypy.tree.apps[''].root.spool_dir
+        body = b'\r\n'.join(
+            [
+                b'--X',
+                b'Content-Disposition: form-data; name="data"; '
+                b'filename="data.bin"',
+                b'',
+                b'the upload',
+                b'--X',
+                b'Content-Disposition: form-data; name="note"',
+                b'',
+                b'kept',
+                b'--X--',
+                b'',
+            ],
+        )
+        self.getPage(
+            '/keep',
+            method='POST',
+            headers=[
+                ('Content-Type', 'multipart/form-data; boundary=X'),
+                ('Content-Length', str(len(body))),
+            ],
+            body=body,
+        )
+        self.assertStatus(200)
+        self.assertBody('kept')
+
+        # The (also spooled) note is removed when the request ends,
+        # which may be just after the response is sent.
+        for _ in range(50):
+            if os.listdir(spool_dir) == ['kept']:
+                break
+            time.sleep(0.1)
+        self.assertEqual(os.listdir(spool_dir), ['kept'])
+        kept = os.path.join(spool_dir, 'kept')
+        with open(kept, 'rb') as f:
+            self.assertEqual(f.read(), b'the upload')
+        os.remove(kept)
+
 
 class SafeMultipartHandlingTest(helper.CPWebCase):
     setup_server = staticmethod(setup_server)
@@ -150,3 +409,17 @@ class SafeMultipartHandlingTest(helper.CPWebCase):
             'Upload: Submit Query, Filename: .project, Filedata: %r'
             % filedata,
         )
+
+
+def test_long_boundary_line_is_data():
+    """A line which only starts with the boundary is not buffered whole."""
+    filedata = b'a\n--X' + b' ' * (_cpreqbody.Part.bufsize * 4) + b'b'
+    body = filedata + b'\r\n--X--\r\n'
+    fp = _cpreqbody.SizedReader(io.BytesIO(body), len(body), None)
+    part = _cpreqbody.Part(fp, cherrypy.lib.httputil.HeaderMap(), b'--X')
+
+    chunks = part.iter_to_boundary()
+    first = bytes(next(chunks))
+    # Data is given out before the rest of the line has been read.
+    assert fp.bytes_read < len(filedata)
+    assert first + b''.join(bytes(c) for c in chunks) == filedata
@@ -432,3 +432,199 @@ cherrypy.tree.mount(Application(Root(), '/keywords'))""")
         self.assertStatus(200)
         self.getPage('/keywords/hello/extra')
         self.assertStatus(404)
+
+
+class CachedDispatchTest(helper.CPWebCase):
+    @staticmethod
+    def setup_server():
+        class Sub:
+            @cherrypy.expose
+            def index(self):
+                return cherrypy.request.config.get('greeting', 'sub')
+
+        class Dynamic:
+            def __init__(self):
+                self.calls = 0
+
+            def _cp_dispatch(self, vpath):
+                self.calls += 1
+                vpath.pop(0)
+                return Sub()
+
+        class Root:
+            sub = Sub()
+            dynamic = Dynamic()
+
+            @cherrypy.expose
+            def index(self):
+                return 'root'
+
+            @cherrypy.expose
+            def default(self, *args):
+                return 'default:%s:%s' % (
+                    '/'.join(args),
+                    cherrypy.request.is_index,
+                )
+
+        dispatcher = cherrypy.dispatch.Dispatcher(cache_size=4)
+        CachedDispatchTest.dispatcher = dispatcher
+        CachedDispatchTest.root = root = Root()
+        CachedDispatchTest.app = cherrypy.tree.mount(
+            root,
+            config={'/': {'request.dispatch': dispatcher}},
+        )
+
+    def test_repeat_requests(self):
+        for _ in range(3):
+            self.getPage('/')
+            self.assertBody('root')
+            self.getPage('/sub/')
+            self.assertBody('sub')
+            self.getPage('/a/b/')
+            self.assertBody('default:a/b:True')
+            self.getPage('/a/b')
+            self.assertBody('default:a/b:False')
+        assert len(self.dispatcher._cache) == 4
+
+    def test_invalidation(self):
+        self.getPage('/sub/')
+        self.assertBody('sub')
+
+        self.app.merge({'/sub': {'greeting': 'hello'}})
+        self.getPage('/sub/')
+        self.assertBody('hello')
+
+        class Other:
+            @cherrypy.expose
+            def index(self):
+                return 'other'
+
+        old_sub = self.root.sub
+        self.root.sub = Other()
+        try:
+            self.getPage('/sub/')
+            self.assertBody('hello')
+            self.dispatcher.clear_cache()
+            self.getPage('/sub/')
+            self.assertBody('other')
+        finally:
+            self.root.sub = old_sub
+            self.app.merge({'/sub': {'greeting': 'sub'}})
+
+    def test_cp_dispatch_bypasses_cache(self):
+        dynamic = self.root.dynamic
+        calls = dynamic.calls
+        for _ in range(3):
+            self.getPage('/dynamic/anything/')
+            self.assertBody('sub')
+        assert dynamic.calls == calls + 3
+
+
+class SharedConfigTest(helper.CPWebCase):
+    @staticmethod
+    def setup_server():
+        seen = SharedConfigTest.seen = []
+
+        class Root:
+            @cherrypy.expose
+            def index(self):
+                seen.append(cherrypy.request.config)
+                return cherrypy.request.config.get('color', 'none')
+
+            @cherrypy.expose
+            def paint(self, color):
+                config = cherrypy.request.config
+                config['color'] = color
+                assert cherrypy.request.config is config
+                seen.append(config)
+                return config['color']
+
+            @cherrypy.expose
+            @cherrypy.config(**{'color': 'blue'})
+            def blue(self):
+                return cherrypy.request.config['color']
+
+        dispatcher = cherrypy.dispatch.Dispatcher(config_cache_size=10)
+        cherrypy.tree.mount(
+            Root(),
+            '/shared',
+            {'/': {'request.dispatch': dispatcher}},
+        )
+        cherrypy.tree.mount(Root(), '/unshared')
+
+    def test_shared_across_requests(self):
+        del self.seen[:]
+        self.getPage('/shared/')
+        self.assertBody('none')
+        self.getPage('/shared/')
+        self.assertBody('none')
+        first, second = self.seen
+        assert first is not second
+        assert isinstance(first, cherrypy._cpconfig.RequestConfig)
+        assert first.shared is second.shared
+
+        self.getPage('/shared/blue')
+        self.assertBody('blue')
+
+        # The cache is opt-in.
+        self.getPage('/unshared/')
+        assert type(self.seen[-1]) is dict
+
+    def test_writes_are_private(self):
+        del self.seen[:]
+        self.getPage('/shared/paint?color=red')
+        self.assertBody('red')
+        self.getPage('/shared/paint?color=green')
+        self.assertBody('green')
+        self.getPage('/shared/')
+        self.assertBody('none')
+        painted, _, unpainted = self.seen
+        assert painted['color'] == 'red'
+        assert 'color' not in painted.shared
+        assert 'color' not in unpainted
+
+    def test_read_only(self):
+        config = cherrypy._cpconfig.SharedConfig({'a': 1})
+        with self.assertRaises(TypeError):
+            config['a'] = 2
+        with self.assertRaises(TypeError):
+            config.update(b=2)
+        assert config == {'a': 1}
+        assert type(config.copy()) is dict
+
+
+def test_tree_script_name_index():
+    """Tree.script_name finds the longest mounted prefix by segment."""
+    tree = cherrypy._cptree.Tree()
+    for script_name in ('', '/a', '/a/b'):
+        tree.graft(lambda environ, start_response: [], script_name)
+
+    assert tree.script_name('/a/b/c') == '/a/b'
+    assert tree.script_name('/a/bc') == '/a'
+    assert tree.script_name('/a/') == '/a'
+    assert tree.script_name('/elsewhere') == ''
+
+    del tree.apps['']
+    assert tree.script_name('/elsewhere') is None
+
+    tree.apps = {'/z': None}
+    assert tree.script_name('/z/y') == '/z'
+    assert tree.script_name('/a/b') is None
+
+
+def test_tree_copy_environ():
+    """Tree can correct the environ of the called app in place."""
+    seen = []
+
+    def app(environ, start_response):
+        seen.append(environ)
+        return []
+
+    for copy_environ in (True, False):
+        tree = cherrypy._cptree.Tree(copy_environ=copy_environ)
+        tree.graft(app, '/app')
+        environ = {'SCRIPT_NAME': '', 'PATH_INFO': '/app/x'}
+        tree(environ, None)
+        assert seen[-1]['SCRIPT_NAME'] == '/app'
+        assert seen[-1]['PATH_INFO'] == '/x'
+        assert (seen[-1] is environ) is not copy_environ
@@ -18,6 +18,14 @@ class ParamsTest(helper.CPWebCase):
             # for testing on Py 2
             resource.__annotations__ = {'limit': int}
 
+            @cherrypy.expose
+            def pair(self, a, b=None, *, c='c'):
+                return '%s %s %s' % (a, b, c)
+
+            @cherrypy.expose
+            def broken(self):
+                raise TypeError('not a binding error')
+
         conf = {'/': {'tools.params.on': True}}
         cherrypy.tree.mount(Root(), config=conf)
 
@@ -44,6 +52,53 @@ class ParamsTest(helper.CPWebCase):
         self.getPage('/resource?limit=')
         self.assertStatus(500)
 
+    def test_binding(self):
+        self.getPage('/pair?a=1&c=3')
+        self.assertBody('1 None 3')
+        self.getPage('/pair/1/2')
+        self.assertBody('1 2 c')
+
+        self.getPage('/pair')
+        self.assertStatus(404)
+        self.assertInBody('Missing parameters: a')
+        self.getPage('/pair/1/2/3')
+        self.assertStatus(404)
+        self.getPage('/pair/1?a=1')
+        self.assertStatus(404)
+        self.assertInBody('Multiple values for parameters: a')
+        self.getPage('/pair?a=1&d=4')
+        self.assertStatus(404)
+        self.assertInBody('Unexpected query string parameters: d')
+        self.getPage('/pair?a=1', method='POST', body='d=4')
+        self.assertStatus(400)
+        self.assertInBody('Unexpected body parameters: d')
+
+        self.getPage('/broken')
+        self.assertStatus(500)
+        self.assertInBody('not a binding error')
+
+    def test_binder_is_shared(self):
+        class Handler:
+            def method(self, a, b: int = 0):
+                pass
+
+        binder = cherrypy.dispatch.HandlerBinder.for_callable(
+            Handler().method,
+        )
+        assert binder is cherrypy.dispatch.HandlerBinder.for_callable(
+            Handler().method,
+        )
+        assert binder.positional == ('a', 'b')
+        assert binder.converters == {'b': int}
+        assert cherrypy.dispatch.HandlerBinder.for_callable(len) is None
+
+        class Tool:
+            def handle(*args, **kwargs):
+                pass
+
+        binder = cherrypy.dispatch.HandlerBinder.for_callable(Tool().handle)
+        assert binder.varargs and binder.varkw
+
     def test_syntax(self):
         if sys.version_info < (3,):
             return self.skip('skipped (Python 3 only)')
@@ -1,4 +1,12 @@
-from cherrypy.process import plugins
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+import time
+
+import pytest
+
+from cherrypy.process import plugins, wspbus
 
 
 __metaclass__ = type
@@ -12,3 +20,83 @@ class TestAutoreloader:
             __file__ = None
 
         assert plugins.Autoreloader._file_for_file_module(test_module) is None
+
+
+class TestEventLoop:
+    def test_run_and_stop(self):
+        """Coroutines run in the caller's context until the bus stops."""
+        bus = wspbus.Bus()
+        event_loop = plugins.EventLoop(bus)
+        event_loop.subscribe()
+        var = contextvars.ContextVar('var')
+        var.set('caller')
+
+        async def read_var():
+            await asyncio.sleep(0)
+            return var.get()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise ValueError('boom')
+
+        assert event_loop.loop is None
+        assert event_loop.run(read_var()) == 'caller'
+        thread = event_loop.thread
+        assert thread.is_alive()
+        with pytest.raises(ValueError, match='boom'):
+            event_loop.run(fail())
+
+        bus.exit()
+        assert event_loop.loop is None
+        assert not thread.is_alive()
+
+    def test_run_while_stopping(self):
+        """A coroutine which arrives as the loop stops is cancelled."""
+        bus = wspbus.Bus()
+        event_loop = plugins.EventLoop(bus)
+
+        async def noop():
+            pass
+
+        event_loop.run(noop())
+        loop = event_loop.loop
+        blocked = threading.Event()
+        release = threading.Event()
+
+        def block():
+            blocked.set()
+            release.wait()
+
+        loop.call_soon_threadsafe(block)
+        blocked.wait()
+        results = []
+
+        queued = threading.Event()
+        call_soon_threadsafe = loop.call_soon_threadsafe
+
+        def traced(*args, **kwargs):
+            handle = call_soon_threadsafe(*args, **kwargs)
+            queued.set()
+            return handle
+
+        loop.call_soon_threadsafe = traced
+
+        def run():
+            try:
+                results.append(event_loop.run(noop()))
+            except concurrent.futures.CancelledError:
+                results.append('cancelled')
+
+        runner = threading.Thread(target=run)
+        runner.start()
+        # Let the runner queue its coroutine behind block().
+        queued.wait()
+        stopper = threading.Thread(target=event_loop.stop)
+        stopper.start()
+        while event_loop.loop is not None:
+            time.sleep(0.01)
+        release.set()
+        stopper.join(5)
+        runner.join(5)
+        assert results == ['cancelled']
+        assert loop.is_closed()
@@ -0,0 +1,180 @@
+"""Test the radix tree dispatcher."""
+
+import uuid
+
+import pytest
+
+import cherrypy
+from cherrypy.test import helper
+
+
+class RadixDispatchTest(helper.CPWebCase):
+    """Radix dispatcher test suite."""
+
+    @staticmethod
+    def setup_server():
+        """Set up cherrypy test instance."""
+
+        class Users:
+            def __init__(self):
+                self.names = {1: 'alice'}
+
+            def show(self, id):
+                return 'user %r' % (id,)
+
+            @cherrypy.config(
+                **{
+                    'tools.response_headers.on': True,
+                    'tools.response_headers.headers': [
+                        ('Content-Language', 'en-GB'),
+                    ],
+                },
+            )
+            def post(self, id, slug):
+                return 'post %r %s' % (id, slug)
+
+            def rename(self, id, name):
+                self.names[id] = name
+                return 'renamed %s' % name
+
+            def me(self):
+                return 'me'
+
+        def item(key):
+            return 'item %s' % key
+
+        def files(path):
+            return 'files %s' % path
+
+        def index():
+            return 'index'
+
+        d = cherrypy.dispatch.RadixDispatcher()
+        users = Users()
+        d.connect('index', '/', index)
+        d.connect('docs', '/docs/', index)
+        d.connect('me', '/users/me', users, action='me')
+        d.connect(
+            'user',
+            '/users/{id:int}',
+            users,
+            action='show',
+            methods=['GET'],
+        )
+        d.connect(
+            'rename',
+            '/users/{id:int}',
+            users,
+            action='rename',
+            methods=['POST'],
+        )
+        d.connect('post', '/users/{id:int}/posts/{slug}', users, action='post')
+        d.connect('item', '/items/{key:uuid}', item)
+        d.connect(
+            'files',
+            '/files/{path:path}',
+            files,
+            config={'request.show_tracebacks': False},
+        )
+
+        conf = {'/': {'request.dispatch': d}}
+        cherrypy.tree.mount(root=None, script_name='/radix', config=conf)
+
+    def test_literal_and_params(self):
+        self.getPage('/radix/')
+        self.assertBody('index')
+
+        self.getPage('/radix/users/me')
+        self.assertBody('me')
+
+        self.getPage('/radix/users/12')
+        self.assertBody('user 12')
+
+        self.getPage('/radix/users/12/posts/hello-world')
+        self.assertBody('post 12 hello-world')
+        self.assertHeader('Content-Language', 'en-GB')
+
+        self.getPage('/radix/users/twelve')
+        self.assertStatus(404)
+
+        key = uuid.uuid4()
+        self.getPage('/radix/items/%s' % key)
+        self.assertBody('item %s' % key)
+        self.getPage('/radix/items/not-a-uuid')
+        self.assertStatus(404)
+
+        self.getPage('/radix/files/a/b/c.txt')
+        self.assertBody('files a/b/c.txt')
+        self.getPage('/radix/files/')
+        self.assertStatus(404)
+
+    def test_trailing_slash(self):
+        self.getPage('/radix/docs/')
+        self.assertBody('index')
+
+        self.getPage('/radix/docs')
+        self.assertStatus(301)
+        self.assertHeader('Location', '%s/radix/docs/' % self.base())
+
+        self.getPage('/radix/users/me/')
+        self.assertBody('me')
+
+    def test_methods(self):
+        self.getPage('/radix/users/1', method='POST', body='name=bob')
+        self.assertBody('renamed bob')
+
+        self.getPage('/radix/users/1', method='HEAD')
+        self.assertStatus(200)
+
+        self.getPage('/radix/users/1', method='DELETE')
+        self.assertStatus(405)
+        self.assertHeader('Allow', 'GET, POST, HEAD')
+
+
+def test_find_node_prefers_literals():
+    """Literal segments win, and parameters fall back in order."""
+    d = cherrypy.dispatch.RadixDispatcher()
+    d.connect('n', '/a/{n:int}/x', lambda n: n)
+    d.connect('s', '/a/{s}/y', lambda s: s)
+    d.connect('lit', '/a/1/z', lambda: None)
+
+    node, params = d.find_node('/a/1/y')
+    assert node.routes[None] is d.routes['s']
+    assert params == {'s': '1'}
+
+    node, params = d.find_node('/a/1/x')
+    assert node.routes[None] is d.routes['n']
+    assert params == {'n': 1}
+
+    node, params = d.find_node('/a/1/z')
+    assert node.routes[None] is d.routes['lit']
+    assert params == {}
+
+    assert d.find_node('/a/1/q') == (None, {})
+
+
+def test_float_rejects_non_finite():
+    """The float converter only matches finite numbers."""
+    d = cherrypy.dispatch.RadixDispatcher()
+    d.connect('f', '/f/{x:float}', lambda x: x)
+
+    node, params = d.find_node('/f/2.5')
+    assert params == {'x': 2.5}
+    for value in ('nan', 'inf', '-inf', 'Infinity', '1e999'):
+        assert d.find_node('/f/%s' % value) == (None, {})
+
+
+@pytest.mark.parametrize(
+    'route',
+    [
+        '/a/{x:nope}',
+        '/a/{x}/{x}',
+        '/a/b{x}',
+        '/a/{x:path}/b',
+    ],
+)
+def test_connect_rejects_bad_patterns(route):
+    """Malformed patterns are reported when they are connected."""
+    d = cherrypy.dispatch.RadixDispatcher()
+    with pytest.raises(ValueError):
+        d.connect('bad', route, lambda **kw: None)
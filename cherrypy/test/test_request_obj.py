@@ -1,13 +1,16 @@
 """Basic tests for the cherrypy.Request object."""
 
+import contextvars
 from functools import wraps
 import os
 import sys
+import threading
 import types
 import uuid
 from http.client import IncompleteRead
 
 import cherrypy
+from cherrypy import _cprequest
 from cherrypy._cpcompat import ntou
 from cherrypy.lib import httputil
 from cherrypy.test import helper
@@ -96,6 +99,21 @@ class RequestObjectTests(helper.CPWebCase):
             def default(self, *args, **kwargs):
                 return 'args: %s kwargs: %s' % (args, sorted(kwargs.items()))
 
+            @cherrypy.config(
+                **{
+                    'request.body.max_params': 3,
+                    'request.body.max_param_name_length': 8,
+                },
+            )
+            def limited(self, **kwargs):
+                return repr(sorted(kwargs.items()))
+
+            @cherrypy.config(
+                **{'request.query_string_cache': httputil.QueryStringCache()},
+            )
+            def cached(self, **kwargs):
+                return repr(sorted(kwargs.items()))
+
         @cherrypy.expose
         class ParamErrorsCallable(object):
             def __call__(self):
@@ -425,6 +443,57 @@ class RequestObjectTests(helper.CPWebCase):
             ),
         )
 
+    def test_urlencoded_limits(self):
+        def post(body):
+            self.getPage(
+                '/params/limited',
+                method='POST',
+                headers=[
+                    ('Content-Type', 'application/x-www-form-urlencoded'),
+                    ('Content-Length', str(len(body))),
+                ],
+                body=body,
+            )
+
+        # Empty fields do not count.
+        post(b'a=1&b=%2B+2;n%5B0%5D=&&')
+        self.assertStatus(200)
+        self.assertBody(repr([('a', '1'), ('b', '+ 2'), ('n[0]', '')]))
+
+        post(b'a=1&b=2&c=3&d=4')
+        self.assertStatus(413)
+        self.assertInBody('The request entity has more than 3 fields.')
+
+        post(b'toolongname=1')
+        self.assertStatus(400)
+        self.assertInBody(
+            'The request entity has a field name longer than 8 bytes.',
+        )
+
+    def test_query_string_cache(self):
+        handler = cherrypy.tree.apps[''].root.params.cached
+        cache = handler._cp_config['request.query_string_cache']
+        cache.clear()
+        self.getPage('/params/cached?a=1&a=2')
+        self.assertBody(repr([('a', ['1', '2'])]))
+
+        # Body params are appended to the request's own copy of the
+        # list, not to the cached parse result.
+        body = b'a=3'
+        self.getPage(
+            '/params/cached?a=1&a=2',
+            method='POST',
+            headers=[
+                ('Content-Type', 'application/x-www-form-urlencoded'),
+                ('Content-Length', str(len(body))),
+            ],
+            body=body,
+        )
+        self.assertBody(repr([('a', ['1', '2', '3'])]))
+        self.getPage('/params/cached?a=1&a=2')
+        self.assertBody(repr([('a', ['1', '2'])]))
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
     def testParamErrors(self):
         # test that all of the handlers work when given
         # the correct parameters in order to ensure that the
@@ -1072,3 +1141,142 @@ class RequestObjectTests(helper.CPWebCase):
             self.getPage('/threadlocal/')
             results.append(self.body)
         self.assertEqual(results, [b'None'] * 20)
+
+
+class ServingPoolTests(helper.CPWebCase):
+    @staticmethod
+    def setup_server():
+        created = []
+
+        class CountingRequest(_cprequest.Request):
+            def __init__(self, *args, **kwargs):
+                created.append(self)
+                super(CountingRequest, self).__init__(*args, **kwargs)
+                self.flavor = 'counted'
+
+            def reset(self, *args, **kwargs):
+                super(CountingRequest, self).reset(*args, **kwargs)
+                self.flavor = 'counted'
+
+        class UnresettableRequest(_cprequest.Request):
+            def __init__(self, *args, **kwargs):
+                created.append(self)
+                super(UnresettableRequest, self).__init__(*args, **kwargs)
+                self.flavor = 'unresettable'
+
+        class Root:
+            @cherrypy.expose
+            def created(self):
+                return str(len(created))
+
+            @cherrypy.expose
+            def dirty(self):
+                cherrypy.request.leftover = 'x'
+                cherrypy.response.headers['X-Leftover'] = 'x'
+                cherrypy.response.cookie['leftover'] = 'x'
+                return 'dirty'
+
+            @cherrypy.expose
+            def clean(self):
+                return repr(
+                    (
+                        cherrypy.request.flavor,
+                        getattr(cherrypy.request, 'leftover', None),
+                        'X-Leftover' in cherrypy.response.headers,
+                        len(cherrypy.response.cookie),
+                    ),
+                )
+
+            @cherrypy.expose
+            def redirect(self):
+                raise cherrypy.InternalRedirect('/target')
+
+            @cherrypy.expose
+            def target(self):
+                prev = cherrypy.request.prev
+                assert prev is not cherrypy.request
+                return prev.path_info
+
+        app = cherrypy.tree.mount(Root(), '/pooled')
+        app.request_class = CountingRequest
+        app.serving_pool = True
+
+        app = cherrypy.tree.mount(Root(), '/unpooled')
+        app.request_class = UnresettableRequest
+        app.serving_pool = True
+
+    def test_reuse(self):
+        self.getPage('/pooled/created')
+        before = int(self.body)
+        for x in range(30):
+            self.getPage('/pooled/dirty')
+            self.assertBody('dirty')
+            self.getPage('/pooled/clean')
+            self.assertBody("('counted', None, False, 0)")
+        self.getPage('/pooled/created')
+        # At most one new Request per server thread.
+        self.assertTrue(int(self.body) - before <= cherrypy.server.thread_pool)
+
+    def test_internal_redirect(self):
+        for x in range(5):
+            self.getPage('/pooled/redirect')
+            self.assertBody('/redirect')
+
+    def test_init_without_reset(self):
+        # A request_class which overrides __init__ but not reset is
+        # never reused, since reset would lose what __init__ set.
+        self.getPage('/unpooled/created')
+        before = int(self.body)
+        for x in range(5):
+            self.getPage('/unpooled/clean')
+            self.assertBody("('unresettable', None, False, 0)")
+        self.getPage('/unpooled/created')
+        self.assertEqual(int(self.body) - before, 6)
+
+
+def test_set_cookie_encoding():
+    """Set-Cookie values match SimpleCookie's, cached attributes or not."""
+    for x in range(2):
+        response = _cprequest.Response()
+        response.cookie['session_id'] = 'abc%d' % x
+        response.cookie['session_id']['path'] = '/'
+        response.cookie['session_id']['expires'] = httputil.HTTPDate(0)
+        response.cookie['session_id']['httponly'] = True
+        response.cookie['rel'] = 'x'
+        response.cookie['rel']['max-age'] = 60
+        response.finalize()
+        expected = [
+            tuple(line.encode('ascii').split(b': ', 1))
+            for line in response.cookie.output().split('\r\n')
+        ]
+        assert response.header_list[-2:] == expected
+
+
+def test_serving_state_per_context():
+    """Each context, and so each thread, sees its own serving objects."""
+    default = cherrypy.serving.request
+    seen = []
+
+    def serve(name):
+        req = _cprequest.Request(None, None)
+        req.name = name
+        cherrypy.serving.load(req, _cprequest.Response())
+        cherrypy.serving.session = name
+        seen.append(
+            (
+                cherrypy.request.name,
+                cherrypy.serving.current().request is req,
+                cherrypy.serving.session,
+            ),
+        )
+        cherrypy.serving.clear()
+        seen.append(hasattr(cherrypy.serving, 'session'))
+
+    contextvars.copy_context().run(serve, 'a')
+    thread = threading.Thread(target=serve, args=('b',))
+    thread.start()
+    thread.join()
+
+    assert seen == [('a', True, 'a'), False, ('b', True, 'b'), False]
+    assert cherrypy.serving.request is default
+    assert not hasattr(cherrypy.serving, 'session')
@@ -8,6 +8,8 @@ import unittest
 import operator
 from http.client import IncompleteRead
 
+import pytest
+
 import cherrypy
 from cherrypy import tools
 from cherrypy._cpcompat import ntou
@@ -457,6 +459,76 @@ class ToolTests(helper.CPWebCase):
         self.assertEqual(cherrypy.tools.renamed._priority, 60)
 
 
+class ConfigPlanTests(helper.CPWebCase):
+    @staticmethod
+    def setup_server():
+        plans = ConfigPlanTests.plans = []
+
+        class Counter(cherrypy.Tool):
+            """A tool with its own _setup, which must run per request."""
+
+            def __init__(self):
+                cherrypy.Tool.__init__(self, 'before_finalize', self.count)
+                self.setups = 0
+
+            def count(self):
+                cherrypy.response.headers['X-Setups'] = str(self.setups)
+
+            def _setup(self):
+                self.setups += 1
+                cherrypy.Tool._setup(self)
+
+        cherrypy.tools.plan_counter = Counter()
+
+        def shout():
+            cherrypy.response.headers['X-Shout'] = 'yes'
+
+        class Root:
+            @cherrypy.expose
+            @cherrypy.config(
+                **{
+                    'tools.response_headers.on': True,
+                    'tools.response_headers.headers': [('X-Plan', 'on')],
+                    'tools.plan_counter.on': True,
+                    'hooks.before_finalize': shout,
+                },
+            )
+            def index(self):
+                plans.append(cherrypy.request.config_plan)
+                return cherrypy.request.config_plan.describe()
+
+        cherrypy.tree.mount(
+            Root(),
+            '/plan',
+            {
+                '/': {
+                    'request.dispatch': cherrypy.dispatch.Dispatcher(
+                        config_cache_size=10,
+                    ),
+                },
+            },
+        )
+
+    def test_plan_is_replayed(self):
+        del self.plans[:]
+        self.getPage('/plan/')
+        self.assertHeader('X-Plan', 'on')
+        self.assertHeader('X-Shout', 'yes')
+        first_setups = int(self.assertHeader('X-Setups'))
+        self.assertInBody('tools.response_headers')
+        self.assertInBody('on_start_resource [50]')
+        self.assertInBody('tools.plan_counter')
+        self.assertInBody('(set up for each request)')
+        self.assertInBody('hooks.before_finalize')
+
+        self.getPage('/plan/')
+        self.assertHeader('X-Plan', 'on')
+        self.assertHeader('X-Shout', 'yes')
+        self.assertHeader('X-Setups', str(first_setups + 1))
+        first, second = self.plans
+        assert first is second
+
+
 class SessionAuthTest(unittest.TestCase):
     def test_login_screen_returns_bytes(self):
         """
@@ -486,3 +558,40 @@ class TestHooks:
         by_priority = operator.attrgetter('priority')
         priorities = list(map(by_priority, hooks))
         assert priorities == [48, 49, 50]
+
+    def test_hookmap_keeps_chains_sorted(self):
+        """Attached hooks are kept in stable priority order."""
+        hooks = cherrypy._cprequest.HookMap(['on_start_resource'])
+        calls = []
+
+        def record(name):
+            calls.append(name)
+
+        for name, priority in [('c', 60), ('a', 40), ('b1', 50), ('b2', 50)]:
+            hooks.attach(
+                'on_start_resource',
+                record,
+                priority=priority,
+                name=name,
+            )
+        chain = hooks['on_start_resource']
+        assert isinstance(chain, tuple)
+        assert [h.kwargs['name'] for h in chain] == ['a', 'b1', 'b2', 'c']
+
+        copied = hooks.copy()
+        copied.attach('on_start_resource', record, name='b3')
+        assert len(hooks['on_start_resource']) == 4
+
+        copied.run('on_start_resource')
+        assert calls == ['a', 'b1', 'b2', 'b3', 'c']
+
+    def test_hookmap_append_is_deprecated(self):
+        """Appending to a hook chain still inserts, with a warning."""
+        hooks = cherrypy._cprequest.HookMap(['on_start_resource'])
+        hooks.attach('on_start_resource', len, priority=60, name='b')
+        with pytest.warns(DeprecationWarning, match='HookMap.attach'):
+            hooks['on_start_resource'].append(
+                cherrypy._cprequest.Hook(len, priority=40, name='a'),
+            )
+        chain = hooks['on_start_resource']
+        assert [h.kwargs['name'] for h in chain] == ['a', 'b']
@@ -51,6 +51,7 @@ class VirtualHostTest(helper.CPWebCase):
             'www.mydom2.com': '/mydom2',
             'www.mydom3.com': '/mydom3',
             'www.mydom4.com': '/dom4',
+            '*.mydom3.com': '/mydom3',
         }
         cherrypy.tree.mount(
             root,
@@ -83,6 +84,14 @@ class VirtualHostTest(helper.CPWebCase):
         self.getPage('/', [('Host', 'www.mydom4.com')])
         self.assertBody('Under construction')
 
+        # Wildcard and case-insensitive matches
+        self.getPage('/', [('Host', 'beta.mydom3.com')])
+        self.assertBody('Welcome to Domain 3')
+        self.getPage('/', [('Host', 'WWW.MyDom2.com')])
+        self.assertBody('Welcome to Domain 2')
+        self.getPage('/', [('Host', 'mydom3.com')])
+        self.assertBody('Hello, world')
+
         # Test GET, POST, and positional params
         self.getPage('/method?value=root')
         self.assertBody('You sent root')